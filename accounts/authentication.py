@@ -0,0 +1,98 @@
+import threading
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from config.caches import shared_cache
+from core.models import User
+
+# JWT 인증 + 사용자 캐시
+# - 기본 JWTAuthentication 은 요청마다 User 를 DB 에서 조회함 (채팅 폴링, PDF 페이지 요청마다 쿼리 1회)
+# - 토큰의 user id 로 짧은 TTL(AUTH_USER_CACHE_TTL) 동안 인증 검사에 필요한 필드만 캐시하고,
+#   캐시 적중 시에도 비활성 사용자/비밀번호 변경 검사는 기존과 동일하게 수행
+# - User 저장/삭제 시 signals 에서 캐시 항목을 지움 → 모든 워커가 보는 공유 캐시(AUTH_USER_CACHE_ALIAS)일 때만 사용
+#   (설정이 없거나 프로세스 로컬 캐시면 캐시 없이 기존처럼 DB 조회, 잘못된 설정은 checks.py 에서 오류)
+
+# 캐시에 저장하는 필드 (비밀번호 해시 제외, 나머지 필드는 접근할 때 DB 에서 읽음)
+CACHED_FIELDS = ("id", "user_id", "user_name", "is_active", "is_staff", "is_superuser")
+
+
+def _cache():
+    return shared_cache(getattr(settings, "AUTH_USER_CACHE_ALIAS", ""))
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    cache = _cache()
+    if cache is not None:
+        cache.delete(user_cache_key(user_id))
+
+
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+# 사용자 캐시 적중/미스 횟수 (프로세스 단위)
+def auth_cache_stats():
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+    }
+
+
+# User → 캐시 항목 (비밀번호 변경 검사용으로는 해시 대신 토큰 클레임과 같은 다이제스트만 저장)
+def _cache_entry(user):
+    entry = {name: getattr(user, name) for name in CACHED_FIELDS}
+    if api_settings.CHECK_REVOKE_TOKEN:
+        entry["password_digest"] = get_md5_hash_password(user.password)
+    return entry
+
+
+# 캐시 항목 → User (저장된 필드 외에는 지연 로딩)
+def _user_from_entry(entry):
+    return User.from_db("default", list(CACHED_FIELDS), [entry[name] for name in CACHED_FIELDS])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        cache = _cache()
+        if cache is None:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        key = user_cache_key(user_id)
+        entry = cache.get(key)
+        if entry is None:
+            _count("misses")
+            user = super().get_user(validated_token)  # DB 조회 + 활성/비밀번호 검사
+            cache.set(key, _cache_entry(user), getattr(settings, "AUTH_USER_CACHE_TTL", 60))
+            return user
+
+        _count("hits")
+        if api_settings.CHECK_USER_IS_ACTIVE and not entry["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != entry.get("password_digest"):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return _user_from_entry(entry)
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from config.caches import is_shared_alias
+
+
+# JWT 사용자 캐시는 모든 워커가 같은 캐시를 볼 때만 무효화가 맞게 동작
+@register(Tags.caches)
+def check_auth_user_cache(app_configs, **kwargs):
+    alias = getattr(settings, "AUTH_USER_CACHE_ALIAS", "")
+    if not alias or is_shared_alias(alias):
+        return []
+    return [Error(
+        f"AUTH_USER_CACHE_ALIAS='{alias}' 는 워커 프로세스끼리 공유되지 않는 캐시입니다.",
+        hint="SHARED_CACHE_BACKEND(db/file/redis)로 공유 캐시를 설정하거나 AUTH_USER_CACHE_ALIAS 를 비워 사용자 캐시를 끄세요.",
+        id="accounts.E001",
+    )]
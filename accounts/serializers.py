@@ -1,10 +1,14 @@
 from rest_framework import serializers
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime, timezone as dt_timezone
 from django.db import transaction, IntegrityError
+from django.contrib.auth.models import update_last_login
 from core.models import User, RefreshTokenStore  # core.models에서 User 모델을 가져옴
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenObtainSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 
 # 사용자 회원가입에 사용할 시리얼라이저
 class UserSerializer(serializers.ModelSerializer):
@@ -50,14 +54,17 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @transaction.atomic
     def validate(self, attrs):
         attrs['username'] = attrs.get('user_id')
-        data = super().validate(attrs)
+        # 사용자 인증만 수행 (TokenObtainPairSerializer.validate 는 refresh 를 따로 서명하므로 건너뜀)
+        TokenObtainSerializer.validate(self, attrs)
 
-        # 새 refresh 생성
+        # refresh 1개만 생성 → 응답과 저장소에 같은 토큰 사용
         refresh = self.get_token(self.user)
+        data = {"refresh": str(refresh), "access": str(refresh.access_token)}
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, self.user)
 
-        # 만료 시간 설정 (settings에서 가져오거나 기본 7일)
-        lifetime = getattr(settings, "SIMPLE_JWT", {}).get("REFRESH_TOKEN_LIFETIME", timedelta(days=7))
-        expires = timezone.now() + lifetime
+        # 만료 시간: 토큰의 exp 클레임과 동일
+        expires = datetime.fromtimestamp(refresh["exp"], tz=dt_timezone.utc)
 
         # 만료 토큰 삭제
         RefreshTokenStore.objects.filter(
@@ -66,22 +73,11 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
         # 유저당 1개만 유지
         try:
-            RefreshTokenStore.objects.update_or_create(
-                user=self.user,
-                defaults={
-                    "token": str(refresh),
-                    "expires_at": expires,
-                    "revoked": False,
-                }
-            )
+            with transaction.atomic():
+                RefreshTokenStore.objects.replace_for_user(self.user, str(refresh), expires)
         except IntegrityError:
             RefreshTokenStore.objects.filter(user=self.user).delete()
-            RefreshTokenStore.objects.create(
-                user=self.user,
-                token=str(refresh),
-                expires_at=expires,
-                revoked=False,
-            )
+            RefreshTokenStore.objects.replace_for_user(self.user, str(refresh), expires)
 
         # 응답 데이터 확장
         data.update({
@@ -90,4 +86,32 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         })
         return data
 
-    
\ No newline at end of file
+
+# refresh token 재발급 (저장소 확인 + 회전)
+# 저장소에 있는 유효한 토큰일 때만 새 access/refresh 를 발급하고, 저장된 해시를 새 refresh 로 교체
+# 교체는 token_hash 조건부 UPDATE 한 번이라 같은 refresh 로 동시에 요청해도 한 쪽만 성공
+class StoredTokenRefreshSerializer(serializers.Serializer):
+    refresh = serializers.CharField(write_only=True)
+    access = serializers.CharField(read_only=True)
+
+    def validate(self, attrs):
+        old_token = attrs['refresh']
+        try:
+            refresh = RefreshToken(old_token)  # 서명/만료 검사
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        if not User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}, is_active=True).exists():
+            raise AuthenticationFailed("비활성화되었거나 존재하지 않는 사용자입니다.", code="user_inactive")
+
+        # 같은 클레임으로 jti/iat/exp 만 새로 발급
+        refresh.set_jti()
+        refresh.set_iat()
+        refresh.set_exp()
+        expires = datetime.fromtimestamp(refresh["exp"], tz=dt_timezone.utc)
+
+        if not RefreshTokenStore.objects.rotate(old_token, str(refresh), expires):
+            raise InvalidToken("저장되지 않았거나 이미 사용/폐기된 refresh 토큰입니다.")
+
+        return {"access": str(refresh.access_token), "refresh": str(refresh)}
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+
+from core.models import User
+from .authentication import invalidate_cached_user
+
+# 사용자 정보(is_active, 비밀번호, 이름 등)가 바뀌면 인증 캐시에서 제거
+# 로그인 시각(last_login)만 갱신하는 저장은 인증 결과와 무관하므로 제외
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_on_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    invalidate_cached_user(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+@receiver(post_delete, sender=User)
+def invalidate_user_on_delete(sender, instance, **kwargs):
+    invalidate_cached_user(getattr(instance, api_settings.USER_ID_FIELD))
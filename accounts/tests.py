@@ -1,3 +1,124 @@
-from django.test import TestCase
+import tempfile
 
-# Create your tests here.
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import RefreshTokenStore, User, hash_token
+
+from .authentication import CachedJWTAuthentication, _cache
+from .checks import check_auth_user_cache
+
+
+# refresh 토큰 저장/회전 (/auth/login → /auth/refresh)
+class RefreshRotationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(user_id="tester", user_name="테스터", password="pw-1234")
+
+    def login(self):
+        response = self.client.post("/auth/login", {"user_id": "tester", "password": "pw-1234"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response.data["refresh"]
+
+    def refresh(self, token):
+        return self.client.post("/auth/refresh", {"refresh": token}, format="json")
+
+    def test_login_stores_digest_only(self):
+        token = self.login()
+        stored = RefreshTokenStore.objects.get(user=self.user)
+        self.assertEqual(stored.token_hash, hash_token(token))
+        self.assertNotIn(token, stored.token_hash)
+
+    def test_refresh_rotates_stored_token(self):
+        old = self.login()
+        response = self.refresh(old)
+        self.assertEqual(response.status_code, 200)
+        new = response.data["refresh"]
+        self.assertNotEqual(new, old)
+        self.assertIn("access", response.data)
+        stored = RefreshTokenStore.objects.get(user=self.user)
+        self.assertEqual(stored.token_hash, hash_token(new))
+
+    def test_used_refresh_is_rejected(self):
+        old = self.login()
+        new = self.refresh(old).data["refresh"]
+        self.assertEqual(self.refresh(old).status_code, 401)  # 재사용
+        self.assertEqual(self.refresh(new).status_code, 200)
+
+    def test_logout_revokes_refresh(self):
+        token = self.login()
+        self.assertEqual(self.client.post("/auth/logout", {"refresh": token}, format="json").status_code, 200)
+        self.assertFalse(RefreshTokenStore.objects.filter(user=self.user).exists())
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_rotate_allows_single_winner(self):
+        old = self.login()
+        stored = RefreshTokenStore.objects.get(user=self.user)
+        self.assertTrue(RefreshTokenStore.objects.rotate(old, "first", stored.expires_at))
+        self.assertFalse(RefreshTokenStore.objects.rotate(old, "second", stored.expires_at))
+
+
+# JWT 인증 사용자 캐시와 signal 무효화 (워커 간 공유 캐시: 임시 디렉터리 파일 캐시)
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        shared = {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": tmp.name}
+        override = override_settings(CACHES={**settings.CACHES, "shared": shared}, AUTH_USER_CACHE_ALIAS="shared")
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(user_id="tester", user_name="테스터", password="pw-1234")
+        self.auth = CachedJWTAuthentication()
+
+    def authenticate(self):
+        return self.auth.get_user(AccessToken.for_user(self.user))
+
+    def test_second_request_skips_user_query(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate().pk, self.user.pk)
+
+    def test_user_change_invalidates_cache(self):
+        token = AccessToken.for_user(self.user)
+        self.auth.get_user(token)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.get_user(token)
+
+    def test_user_delete_invalidates_cache(self):
+        token = AccessToken.for_user(self.user)
+        self.auth.get_user(token)
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.get_user(token)
+
+    def test_last_login_update_keeps_cache(self):
+        self.authenticate()
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=["last_login"])
+        with self.assertNumQueries(0):
+            self.authenticate()
+
+    def test_password_hash_is_not_cached(self):
+        self.authenticate()
+        entry = _cache().get(f"auth:user:{self.user.pk}")
+        self.assertNotIn(self.user.password, entry.values())
+        self.assertEqual(entry["user_name"], "테스터")
+
+    def test_process_local_cache_is_not_used(self):
+        with override_settings(AUTH_USER_CACHE_ALIAS="default"):
+            self.assertIsNone(_cache())
+            self.authenticate()
+            with self.assertNumQueries(1):
+                self.authenticate()
+            self.assertEqual([e.id for e in check_auth_user_cache(None)], ["accounts.E001"])
+        with override_settings(AUTH_USER_CACHE_ALIAS=""):
+            self.assertEqual(check_auth_user_cache(None), [])
+        self.assertEqual(check_auth_user_cache(None), [])
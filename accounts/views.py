@@ -3,8 +3,8 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework import serializers
 from core.models import RefreshTokenStore
-from rest_framework_simplejwt.views import TokenObtainPairView
-from .serializers import CustomTokenObtainPairSerializer
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .serializers import CustomTokenObtainPairSerializer, StoredTokenRefreshSerializer
 from accounts.serializers import UserSerializer  # 시리얼라이저 불러오기
 
 # 템플릿용
@@ -108,6 +108,37 @@ class LoginView(TokenObtainPairView):
         return super().post(request, *args, **kwargs)
 
 
+# 토큰 재발급 (저장소에 있는 refresh 만 허용, 사용한 refresh 는 새 토큰으로 교체)
+class RefreshView(TokenRefreshView):
+    serializer_class = StoredTokenRefreshSerializer
+
+    @swagger_auto_schema(
+        operation_summary="JWT 재발급",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=["refresh"],
+            properties={
+                "refresh": openapi.Schema(type=openapi.TYPE_STRING, description="리프레시 토큰"),
+            }
+        ),
+        responses={
+            200: openapi.Response(
+                description="재발급 성공 (이전 refresh 는 더 이상 사용할 수 없음)",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "access": openapi.Schema(type=openapi.TYPE_STRING, description="Access 토큰"),
+                        "refresh": openapi.Schema(type=openapi.TYPE_STRING, description="새 Refresh 토큰"),
+                    },
+                )
+            ),
+            401: openapi.Response(description="만료/폐기되었거나 저장소에 없는 토큰"),
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
+
 # 로그아웃 요청 처리   
 class LogoutView(APIView):
 
@@ -132,7 +163,7 @@ class LogoutView(APIView):
         if not refresh_token:
             return Response({"detail": "refresh 토큰이 필요합니다."}, status=400)
 
-        deleted_count, _ = RefreshTokenStore.objects.filter(token=refresh_token).delete()
+        deleted_count, _ = RefreshTokenStore.objects.revoke(refresh_token)
         
         if deleted_count:
             return Response({"detail": "로그아웃 성공"}, status=200)
@@ -195,5 +226,6 @@ class LogoutFormView(View):
     def post(self, request):
         refresh_token = request.POST.get("refresh")
 
-        RefreshTokenStore.objects.filter(token=refresh_token).delete()
+        if refresh_token:
+            RefreshTokenStore.objects.revoke(refresh_token)
         return redirect("/auth/login-page")
\ No newline at end of file
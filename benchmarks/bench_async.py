@@ -0,0 +1,121 @@
+"""
+채팅 API 동시 처리량 벤치마크 (동기 ChatCreateView vs 비동기 chat_create)
+
+OpenAI 응답을 지연 시간(--latency)만큼 기다렸다가 돌려주는 스텁으로 바꾼 뒤,
+같은 수의 요청을 동시에 보내 모두 끝날 때까지의 시간을 비교함
+
+- sync : 워커 스레드 --workers 개 (WSGI 스레드 워커와 같은 조건) 에서 POST /consult/chat/
+- async: 이벤트 루프 하나에서 POST /consult/chat/async/ 를 모두 동시에 실행
+
+    python -m benchmarks.bench_async
+    python -m benchmarks.bench_async --requests 10 50 200 --latency 1.0 --workers 8
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import AsyncClient, Client  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from benchmarks.stubs import install_openai_stub  # noqa: E402
+from core.models import Document, User  # noqa: E402
+
+
+def setup(latency):
+    call_command("migrate", verbosity=0)
+    install_openai_stub(latency)
+
+    user, _ = User.objects.get_or_create(user_id="bench", defaults={"user_name": "bench"})
+    document = Document.objects.create(
+        user=user,
+        file="documents/bench.pdf",
+        file_name="bench",
+        chat_name="bench",
+        extracted_text="제1조 (근로시간) 1일 8시간, 1주 40시간으로 한다.\n제2조 (임금) 월 250만원을 지급한다.",
+    )
+    return document, f"Bearer {AccessToken.for_user(user)}"
+
+
+def run_sync(document, auth, count, workers, tag):
+    def post(i):
+        try:
+            response = Client().post(
+                "/consult/chat/",
+                {"document_id": document.id, "message": f"{tag} 질문 {i}"},
+                content_type="application/json",
+                headers={"Authorization": auth},
+            )
+            return response.status_code
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        statuses = list(pool.map(post, range(count)))
+    return time.perf_counter() - started, statuses
+
+
+def run_async(document, auth, count, tag):
+    async def main():
+        client = AsyncClient()
+        return await asyncio.gather(*[
+            client.post(
+                "/consult/chat/async/",
+                {"document_id": document.id, "message": f"{tag} 질문 {i}"},
+                content_type="application/json",
+                headers={"Authorization": auth},
+            )
+            for i in range(count)
+        ])
+
+    started = time.perf_counter()
+    responses = asyncio.run(main())
+    return time.perf_counter() - started, [r.status_code for r in responses]
+
+
+def run(request_counts, latency, workers):
+    document, auth = setup(latency)
+    results = []
+    for count in request_counts:
+        # 질문이 매번 달라야 LLM 응답 캐시에 걸리지 않음
+        sync_s, sync_status = run_sync(document, auth, count, workers, tag=f"sync-{count}")
+        async_s, async_status = run_async(document, auth, count, tag=f"async-{count}")
+        results.append({
+            "requests": count,
+            "sync_s": round(sync_s, 2),
+            "sync_rps": round(count / sync_s, 1),
+            "async_s": round(async_s, 2),
+            "async_rps": round(count / async_s, 1),
+            "errors": sum(s != 200 for s in sync_status + async_status),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--latency", type=float, default=1.0, help="스텁 LLM 응답 지연 (초)")
+    parser.add_argument("--workers", type=int, default=8, help="동기 방식 워커 스레드 수")
+    args = parser.parse_args()
+
+    print(f"latency={args.latency}s, sync workers={args.workers}")
+    print(f"{'requests':>8} {'sync s':>8} {'sync rps':>9} {'async s':>8} {'async rps':>10} {'errors':>7}")
+    for row in run(args.requests, args.latency, args.workers):
+        print(
+            f"{row['requests']:>8} {row['sync_s']:>8.2f} {row['sync_rps']:>9.1f} "
+            f"{row['async_s']:>8.2f} {row['async_rps']:>10.1f} {row['errors']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
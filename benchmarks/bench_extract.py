@@ -0,0 +1,82 @@
+"""
+PDF 텍스트 추출 처리량 벤치마크 (페이지 수 × 워커 수)
+
+    python -m benchmarks.bench_extract
+    python -m benchmarks.bench_extract --pages 10 50 100 --workers 1 2 4
+
+워커 수 효과는 코어가 여러 개인 서버에서만 의미가 있음 (nproc 1 에서는 워커를 늘려도 빨라지지 않음)
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from upload.pdf_text import extract_pages
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FONT_PATH = os.path.join(BASE_DIR, "fonts", "NanumGothic-Regular.ttf")
+
+
+# 조항 문장으로 채운 N 페이지짜리 계약서 PDF 생성
+def make_contract_pdf(path, pages, lines_per_page=40):
+    pdfmetrics.registerFont(TTFont("NanumGothic", FONT_PATH))
+    c = canvas.Canvas(path)
+    article = 1
+    for p in range(pages):
+        c.setFont("NanumGothic", 9)
+        for line in range(lines_per_page):
+            if line % 10 == 0:
+                text = f"제{article}조 (근로조건) 사용자는 근로자에게 다음 각 호의 근로조건을 명시하여야 한다."
+                article += 1
+            else:
+                text = f"{line}. 근로자는 1일 8시간, 1주 40시간을 초과하여 근로하지 아니한다. (p.{p + 1})"
+            c.drawString(40, 800 - line * 19, text)
+        c.showPage()
+    c.save()
+
+
+def run(page_counts, worker_counts, pages_per_task=8, repeat=1):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in page_counts:
+            path = os.path.join(tmp, f"contract_{pages}.pdf")
+            make_contract_pdf(path, pages)
+            for workers in worker_counts:
+                extract_pages(path, workers=workers, pages_per_task=pages_per_task)  # 풀 기동 비용 제외(워밍업)
+                best = None
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    extracted = extract_pages(path, workers=workers, pages_per_task=pages_per_task)
+                    elapsed = time.perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                assert len(extracted) == pages
+                results.append({
+                    "pages": pages,
+                    "workers": workers,
+                    "cpus": os.cpu_count(),
+                    "seconds": round(best, 4),
+                    "pages_per_sec": round(pages / best, 1),
+                })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--pages-per-task", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"cpus: {os.cpu_count()}")
+    print(f"{'pages':>6} {'workers':>8} {'seconds':>9} {'pages/s':>9}")
+    for row in run(args.pages, args.workers, args.pages_per_task, args.repeat):
+        print(f"{row['pages']:>6} {row['workers']:>8} {row['seconds']:>9.3f} {row['pages_per_sec']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
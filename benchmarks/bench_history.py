@@ -0,0 +1,148 @@
+"""
+채팅 히스토리 조립 벤치마크 (문서 하나에 쌓인 ChatLog 수별)
+
+OpenAI 는 지연 없는 스텁으로 바꾸고, 문서 하나의 대화 기록을 --rows 단계까지 늘려 가며 측정
+
+- assemble: ChatCreateView 가 OpenAI 호출 전에 하는 일
+            (최근 대화 창 + 누적 요약 조회 → 컨텍스트 예산 배분 → 관련 구절 검색 → 메시지 목록 구성)
+- post    : POST /consult/chat/ 전체 (스텁 응답, 대화 2건 저장 포함)
+- history : GET /consult/<id>/chat/ (최신 페이지)
+
+    python -m benchmarks.bench_history
+    python -m benchmarks.bench_history --rows 10 1000 100000 --repeat 5
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.test import Client  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from benchmarks.stubs import install_openai_stub  # noqa: E402
+from consult.history import load_history_window, load_rolling_summary  # noqa: E402
+from consult.retrieval import PASSAGE_SEPARATOR, document_token_count, retrieve_passages  # noqa: E402
+from consult.views import build_chat_messages, plan_chat_context  # noqa: E402
+from core.models import ChatLog, Document, User  # noqa: E402
+
+QUESTION = "연장근로 수당은 어떻게 계산되나요?"
+BATCH = 5000
+
+
+def make_text(articles=120):
+    return "\n".join(
+        f"제{i}조 (조항 {i}) 근로자는 1일 8시간, 1주 40시간을 초과하여 근로하지 아니한다. "
+        f"연장근로에 대하여는 통상임금의 100분의 50 이상을 가산하여 지급한다."
+        for i in range(1, articles + 1)
+    )
+
+
+def setup():
+    call_command("migrate", verbosity=0)
+    install_openai_stub(0)
+
+    user, _ = User.objects.get_or_create(user_id="bench-history", defaults={"user_name": "bench"})
+    document = Document.objects.create(
+        user=user,
+        file="documents/bench-history.pdf",
+        file_name="bench-history",
+        chat_name="bench-history",
+        extracted_text=make_text(),
+    )
+    return user, document, f"Bearer {AccessToken.for_user(user)}"
+
+
+# 대화 기록을 target 행까지 채움 (사용자 질문/AI 답변 번갈아)
+def grow(user, document, target):
+    current = ChatLog.objects.filter(document=document).count()
+    while current < target:
+        size = min(BATCH, target - current)
+        ChatLog.objects.bulk_create([
+            ChatLog(
+                document=document,
+                user=user,
+                sender="user" if (current + i) % 2 == 0 else "ai",
+                message=f"메시지 {current + i}: 근로계약서의 해당 조항이 법적으로 문제가 없는지 확인 부탁드립니다.",
+            )
+            for i in range(size)
+        ])
+        current += size
+
+
+def assemble(document):
+    history = load_history_window(document)
+    summary = load_rolling_summary(document)
+    history, doc_tokens = plan_chat_context(QUESTION, history, summary, document_token_count(document))
+    passages = retrieve_passages(document, QUESTION, budget_tokens=doc_tokens)
+    return build_chat_messages(
+        message=QUESTION,
+        document_text=PASSAGE_SEPARATOR.join(passages),
+        history=history,
+        doc_title=document.file_name,
+        summary=summary,
+        doc_tokens=doc_tokens,
+    )
+
+
+def _best(func, repeat):
+    best = None
+    for i in range(repeat):
+        started = time.perf_counter()
+        func(i)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(row_counts, repeat=3):
+    user, document, auth = setup()
+    client = Client()
+    assemble(document)  # 검색 인덱스 생성 (최초 1회) 은 측정에서 제외
+
+    def post(i):
+        response = client.post(
+            "/consult/chat/",
+            {"document_id": document.id, "message": f"{QUESTION} ({i})"},
+            content_type="application/json",
+            headers={"Authorization": auth},
+        )
+        assert response.status_code == 200, response.status_code
+
+    def history(i):
+        response = client.get(f"/consult/{document.id}/chat/", headers={"Authorization": auth})
+        assert response.status_code == 200, response.status_code
+
+    results = []
+    for rows in sorted(row_counts):
+        grow(user, document, rows)
+        assemble_s = _best(lambda i: assemble(document), repeat)
+        post_s = _best(post, repeat)
+        history_s = _best(history, repeat)
+        results.append({
+            "rows": rows,
+            "assemble_ms": round(assemble_s * 1000, 2),
+            "post_ms": round(post_s * 1000, 2),
+            "history_ms": round(history_s * 1000, 2),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'assemble ms':>12} {'post ms':>9} {'history ms':>11}")
+    for row in run(args.rows, args.repeat):
+        print(f"{row['rows']:>8} {row['assemble_ms']:>12.2f} {row['post_ms']:>9.2f} {row['history_ms']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+요약본 PDF 렌더링 벤치마크 (콜드 vs 웜, 조항 수별)
+
+- cold: 요청마다 폰트 등록(TTF 파싱) + 스타일시트 구성 후 렌더링 (기존 업로드 뷰 방식)
+- warm: 프로세스 공용 렌더러 재사용 (폰트/스타일 로드 완료 상태)
+
+    python -m benchmarks.bench_render
+    python -m benchmarks.bench_render --clauses 10 100 500 --repeat 5
+"""
+import argparse
+import os
+import time
+
+from upload.rendering import SummaryRenderer
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FONT_DIR = os.path.join(BASE_DIR, "fonts")
+
+
+# build_summary_context 결과와 같은 형태의 조항 목록 생성
+def make_clauses(count):
+    risks = ["low", "mid", "high"]
+    return [
+        {
+            "title": f"근로시간 {i + 1}",
+            "risk": risks[i % 3],
+            "original": "근로자는 1일 8시간, 1주 40시간을 초과하여 근로하지 아니한다. 다만 당사자 간 합의하면 연장할 수 있다.",
+            "law": "근로기준법 제50조",
+            "commentary": "연장근로 한도와 가산수당 지급 여부가 명시되어 있지 않아 근로자에게 불리하게 해석될 수 있습니다.",
+            "recommendation": "연장근로는 1주 12시간을 한도로 하며, 통상임금의 50% 이상을 가산하여 지급한다.",
+            "types": ["toxin"] if i % 3 == 2 else ["main"],
+        }
+        for i in range(count)
+    ]
+
+
+def _timed(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def run(clause_counts, repeat=3):
+    warm_renderer = SummaryRenderer(FONT_DIR)
+    warm_renderer.load()
+
+    results = []
+    for count in clause_counts:
+        clauses = make_clauses(count)
+        highlights = [f"[{c['title']}] {c['commentary']}" for c in clauses if c["risk"] == "high"][:5]
+
+        def cold():
+            renderer = SummaryRenderer(FONT_DIR)
+            renderer.load(force=True)
+            renderer.render("근로계약서", highlights, clauses)
+
+        def warm():
+            warm_renderer.render("근로계약서", highlights, clauses)
+
+        cold_best = min(_timed(cold) for _ in range(repeat))
+        warm_best = min(_timed(warm) for _ in range(repeat))
+        results.append({
+            "clauses": count,
+            "cold_ms": round(cold_best * 1000, 1),
+            "warm_ms": round(warm_best * 1000, 1),
+            "saved_ms": round((cold_best - warm_best) * 1000, 1),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, nargs="+", default=[10, 50, 100, 500])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'clauses':>8} {'cold ms':>9} {'warm ms':>9} {'saved ms':>9}")
+    for row in run(args.clauses, args.repeat):
+        print(f"{row['clauses']:>8} {row['cold_ms']:>9.1f} {row['warm_ms']:>9.1f} {row['saved_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
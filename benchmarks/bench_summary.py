@@ -0,0 +1,85 @@
+"""
+요약 컨텍스트 구성 + 요약본 PDF 렌더링 벤치마크 (조항 수별)
+
+- context: 모델 응답(JSON 배열) → build_summary_context (통계/하이라이트/조항 목록)
+- render : 그 결과로 요약본 PDF 렌더링 (프로세스 공용 렌더러, 폰트 로드 완료 상태)
+
+    python -m benchmarks.bench_summary
+    python -m benchmarks.bench_summary --clauses 10 100 500 --repeat 5
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from upload.rendering import get_renderer  # noqa: E402
+from upload.views import build_summary_context  # noqa: E402
+
+TITLE = "근로계약서_2025.08.20_10:00"
+TYPES = [["main"], ["toxin"], ["ambi"], ["main", "toxin"]]
+RISKS = ["low", "mid", "high"]
+
+
+# 모델이 반환하는 JSON 배열과 같은 형태의 조항 분석 N개
+def make_items(count):
+    return [
+        {
+            "sentence": f"제{i + 1}조 근로자는 1일 8시간, 1주 40시간을 초과하여 근로하지 아니한다. 다만 당사자 간 합의하면 연장할 수 있다.",
+            "types": TYPES[i % len(TYPES)],
+            "law": "근로기준법 제50조",
+            "description": "연장근로 한도와 가산수당 지급 여부가 명시되어 있지 않아 근로자에게 불리하게 해석될 수 있습니다.",
+            "recommend": "연장근로는 1주 12시간을 한도로 하며, 통상임금의 50% 이상을 가산하여 지급한다.",
+            "title": f"근로시간 {i + 1}",
+            "risk": RISKS[i % len(RISKS)],
+            "category": "근로시간",
+        }
+        for i in range(count)
+    ]
+
+
+def _best(func, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(clause_counts, repeat=3):
+    renderer = get_renderer()
+    renderer.load()
+
+    results = []
+    for count in clause_counts:
+        items = make_items(count)
+        context_s, (_, highlights, clauses) = _best(lambda: build_summary_context(items), repeat)
+        render_s, pdf = _best(lambda: renderer.render(TITLE, highlights, clauses), repeat)
+        results.append({
+            "clauses": count,
+            "context_ms": round(context_s * 1000, 3),
+            "render_ms": round(render_s * 1000, 1),
+            "pdf_kb": round(len(pdf) / 1024, 1),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, nargs="+", default=[10, 50, 100, 500])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'clauses':>8} {'context ms':>11} {'render ms':>10} {'pdf KB':>8}")
+    for row in run(args.clauses, args.repeat):
+        print(f"{row['clauses']:>8} {row['context_ms']:>11.3f} {row['render_ms']:>10.1f} {row['pdf_kb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
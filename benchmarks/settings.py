@@ -0,0 +1,33 @@
+"""
+벤치마크 전용 설정 (외부 DB/OpenAI 없이 실행)
+
+- config.settings 를 그대로 사용하되 DB 만 임시 디렉터리의 SQLite 로 교체
+- OpenAI 호출은 각 벤치마크에서 지연 시간을 흉내 내는 스텁으로 대체
+"""
+import os
+import tempfile
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from config.settings import *  # noqa: E402,F401,F403
+
+BENCH_DIR = os.getenv("BENCH_DIR") or tempfile.mkdtemp(prefix="bench-")
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BENCH_DIR, "bench.sqlite3"),
+        "OPTIONS": {"timeout": 30},  # 동시 요청 벤치마크에서 쓰기 잠금 대기
+    }
+}
+
+MEDIA_ROOT = os.path.join(BENCH_DIR, "media")
+
+# 채팅 누적 요약(백그라운드 LLM 호출)이 측정에 끼어들지 않도록 사실상 비활성화
+CONSULT_SUMMARY_BATCH = 10 ** 9
+
+# OpenAI 호출 한도는 측정 대상이 아니므로 충분히 크게 (한도 상태 파일도 임시 디렉터리에)
+LLM_LIMITER_DIR = os.path.join(BENCH_DIR, "llm-limiter")
+LLM_MAX_IN_FLIGHT = 10 ** 4
+LLM_RPM = 10 ** 7
+LLM_TPM = 10 ** 10
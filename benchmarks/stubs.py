@@ -0,0 +1,50 @@
+"""
+벤치마크용 OpenAI 스텁 (네트워크 없이 지연 시간만 흉내 냄)
+
+    from benchmarks.stubs import install_openai_stub
+    install_openai_stub(latency=0.5)   # core.llm 의 동기/비동기 클라이언트를 스텁으로 교체
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import core.llm as llm
+
+
+def _completion(content):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(prompt_tokens=0, completion_tokens=0, total_tokens=0, prompt_tokens_details=None),
+    )
+
+
+class SyncCompletions:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def create(self, **kwargs):
+        time.sleep(self.latency)
+        return _completion("답변: " + kwargs["messages"][-1]["content"])
+
+
+class AsyncCompletions:
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        return _completion("답변: " + kwargs["messages"][-1]["content"])
+
+
+# OpenAI / AsyncOpenAI 클라이언트 중 core.llm 이 쓰는 부분(chat.completions.create, with_options)만 구현
+class StubClient:
+    def __init__(self, completions):
+        self.chat = SimpleNamespace(completions=completions)
+
+    def with_options(self, **kwargs):
+        return self
+
+
+def install_openai_stub(latency=0.0):
+    llm.client = StubClient(SyncCompletions(latency))
+    llm.async_client = StubClient(AsyncCompletions(latency))
@@ -0,0 +1,164 @@
+"""
+벤치마크 묶음 실행 + JSON 결과 저장/비교 (네트워크 없이 실행, OpenAI 는 스텁)
+
+- extract : PDF 텍스트 추출 (페이지 수 × 워커 수)
+- summary : 요약 컨텍스트 구성 + 요약본 PDF 렌더링 (조항 수별)
+- render  : 요약본 PDF 렌더링 폰트 로드 전/후 (조항 수별)
+- history : 채팅 히스토리 조립 / POST /consult/chat/ / GET /consult/<id>/chat/ (대화 기록 수별)
+- async   : 채팅 API 동시 처리량 (동기 vs 비동기)
+
+결과는 커밋별 JSON 파일로 저장하고, --compare 로 이전 결과와 비교해 느려진 항목을 표시함
+(값은 반복 측정 중 최솟값 - 같은 기기에서 잰 결과끼리만 비교)
+
+    python -m benchmarks.suite                                   # benchmarks/results/<커밋>.json
+    python -m benchmarks.suite --quick --only extract history
+    python -m benchmarks.suite --compare benchmarks/results/abc1234.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BASE_DIR, "benchmarks", "results")
+
+# 벤치마크별 (행 구분 필드, {측정값 필드: 작을수록 좋으면 True})
+METRICS = {
+    "extract": (("pages", "workers"), {"seconds": True}),
+    "summary": (("clauses",), {"context_ms": True, "render_ms": True}),
+    "render": (("clauses",), {"cold_ms": True, "warm_ms": True}),
+    "history": (("rows",), {"assemble_ms": True, "post_ms": True, "history_ms": True}),
+    "async": (("requests",), {"sync_rps": False, "async_rps": False}),
+}
+
+
+# 벤치마크별 실행 (--quick: 작은 입력 위주로 빠르게)
+def run_extract(quick):
+    from benchmarks import bench_extract
+    pages = [1, 10, 50] if quick else [1, 10, 50, 100, 200]
+    return bench_extract.run(pages, [1, 4], repeat=1 if quick else 3)
+
+
+def run_summary(quick):
+    from benchmarks import bench_summary
+    return bench_summary.run([10, 100] if quick else [10, 50, 100, 500], repeat=1 if quick else 3)
+
+
+def run_render(quick):
+    from benchmarks import bench_render
+    return bench_render.run([10, 100] if quick else [10, 50, 100, 500], repeat=1 if quick else 3)
+
+
+def run_history(quick):
+    from benchmarks import bench_history
+    rows = [10, 100, 1000] if quick else [10, 100, 1000, 10000, 100000]
+    return bench_history.run(rows, repeat=2 if quick else 5)
+
+
+def run_async(quick):
+    from benchmarks import bench_async
+    return bench_async.run([10, 50] if quick else [10, 50, 200], latency=0.2 if quick else 1.0, workers=8)
+
+
+BENCHMARKS = {
+    "extract": run_extract,
+    "summary": run_summary,
+    "render": run_render,
+    "history": run_history,
+    "async": run_async,
+}
+
+
+def _git(*args):
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def environment():
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD") or "unknown",
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+# 이전 결과 대비 threshold 이상 나빠진 측정값 목록
+def compare(baseline, current, threshold):
+    regressions = []
+    for name, rows in current["results"].items():
+        if name not in baseline.get("results", {}) or name not in METRICS:
+            continue
+        keys, fields = METRICS[name]
+        previous = {tuple(row.get(k) for k in keys): row for row in baseline["results"][name]}
+        for row in rows:
+            base = previous.get(tuple(row.get(k) for k in keys))
+            if base is None:
+                continue
+            for field, lower_is_better in fields.items():
+                old, new = base.get(field), row.get(field)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old if lower_is_better else (old - new) / old
+                if change > threshold:
+                    label = ", ".join(f"{k}={row[k]}" for k in keys)
+                    regressions.append(f"{name} [{label}] {field}: {old} → {new} ({change:+.0%} 나빠짐)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="이 벤치마크만 실행")
+    parser.add_argument("--quick", action="store_true", help="작은 입력으로 빠르게 (비교는 --quick 결과끼리)")
+    parser.add_argument("--out", help="결과 JSON 경로 (기본 benchmarks/results/<커밋>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="느려짐으로 표시할 비율 (기본 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = {"environment": environment(), "quick": args.quick, "results": {}}
+    for name in args.only or BENCHMARKS:
+        print(f"[{name}] 실행 중...", flush=True)
+        started = time.perf_counter()
+        report["results"][name] = BENCHMARKS[name](args.quick)
+        print(f"[{name}] {time.perf_counter() - started:.1f}s", flush=True)
+        for row in report["results"][name]:
+            print("  " + json.dumps(row, ensure_ascii=False))
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{report['environment']['commit']}{'-quick' if args.quick else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("quick") != args.quick:
+            print("경고: --quick 여부가 다른 결과와 비교합니다.")
+        regressions = compare(baseline, report, args.threshold)
+        base_commit = baseline.get("environment", {}).get("commit", "?")
+        if regressions:
+            print(f"{base_commit} 대비 {args.threshold:.0%} 이상 느려진 항목:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"{base_commit} 대비 {args.threshold:.0%} 이상 느려진 항목 없음")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.cache import caches
+
+# 여러 워커 프로세스가 함께 보는 캐시만 허용 (JWT 사용자 캐시, replica 고정에서 사용)
+# LocMem/Dummy 는 프로세스마다 따로이므로 한 워커에서 지운(기록한) 항목이 다른 워커에 보이지 않음
+
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def is_shared_alias(alias):
+    config = settings.CACHES.get(alias) if alias else None
+    return bool(config) and config.get("BACKEND") not in PROCESS_LOCAL_BACKENDS
+
+
+# alias 가 공유 캐시면 캐시 객체, 아니면(미설정/프로세스 로컬) None
+def shared_cache(alias):
+    return caches[alias] if is_shared_alias(alias) else None
@@ -0,0 +1,106 @@
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+from .caches import shared_cache
+
+# 읽기 전용 복제본(replica) 라우팅
+# - settings.DATABASES 에 'replica' 가 있을 때만 동작 (없으면 모든 쿼리가 default)
+# - 쓰기와 마이그레이션은 항상 default(primary)
+# - 읽기는 기본적으로 primary 이고, ReplicaRoutingMixin 을 붙인 조회 API 의 GET 요청 안에서만 replica 사용
+# - 쓰기 요청(업로드, 채팅, 이름 변경 등) 직후 REPLICA_PIN_SECONDS 동안은 해당 사용자의 조회도 primary 로 보냄
+#   (복제 지연 때문에 방금 만든 문서/대화가 목록에서 빠져 보이지 않도록)
+#   고정 정보는 응답 쿠키와 공유 캐시에 함께 기록 → 다음 조회를 다른 워커 프로세스가 받아도 적용됨
+
+PRIMARY = "default"
+REPLICA = "replica"
+
+_use_replica = contextvars.ContextVar("use_replica", default=False)
+
+
+def replica_enabled():
+    return REPLICA in settings.DATABASES
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and replica_enabled():
+            return REPLICA
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # replica 는 primary 와 같은 데이터
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+# with 블록 안의 읽기 쿼리를 replica 로 보냄
+@contextmanager
+def read_from_replica(enabled=True):
+    token = _use_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+# with 블록 안의 읽기 쿼리를 primary 로 고정 (replica 구간 안에서 최신 데이터가 필요할 때)
+def read_from_primary():
+    return read_from_replica(enabled=False)
+
+
+def _pin_key(user_id):
+    return f"db-router:pin:{user_id}"
+
+
+def _pin_cache():
+    return shared_cache(getattr(settings, "REPLICA_PIN_CACHE_ALIAS", "shared"))
+
+
+def _pin_cookie():
+    return getattr(settings, "REPLICA_PIN_COOKIE", "db_pin")
+
+
+def _pin_seconds():
+    return getattr(settings, "REPLICA_PIN_SECONDS", 5)
+
+
+# 사용자가 방금 쓰기를 했음을 공유 캐시에 기록 → 일정 시간 동안 이 사용자의 조회는 primary
+def pin_to_primary(user_id):
+    pins = _pin_cache()
+    if replica_enabled() and user_id is not None and pins is not None:
+        pins.set(_pin_key(user_id), True, _pin_seconds())
+
+
+def is_pinned_to_primary(user_id, request=None):
+    if request is not None and request.COOKIES.get(_pin_cookie()):
+        return True
+    pins = _pin_cache()
+    return user_id is not None and pins is not None and bool(pins.get(_pin_key(user_id)))
+
+
+# APIView 용 믹스인
+# - GET/HEAD: 인증 이후 쿼리를 replica 로 (최근 쓰기가 있는 사용자는 primary)
+# - 그 밖의 메서드: 성공 응답이면 사용자를 primary 에 고정 (공유 캐시 + 짧은 수명의 쿠키)
+class ReplicaRoutingMixin:
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        user_id = getattr(request.user, "pk", None)
+        if request.method in SAFE_METHODS and replica_enabled() and not is_pinned_to_primary(user_id, request):
+            self._replica_token = _use_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_replica_token", None)
+        if token is not None:
+            _use_replica.reset(token)
+            self._replica_token = None
+        elif request.method not in SAFE_METHODS and response.status_code < 400 and replica_enabled():
+            pin_to_primary(getattr(request.user, "pk", None))
+            response.set_cookie(_pin_cookie(), "1", max_age=_pin_seconds(), httponly=True, samesite="Lax")
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',  # 요청/단계별 시간, SQL 쿼리 수 (/metrics)
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -89,6 +90,27 @@ DATABASES = {
     }
 }
 
+# 읽기 전용 복제본 (DATABASE_REPLICA_HOST 를 지정한 경우에만 사용, 계정/DB명은 primary 와 동일하게 기본값)
+# 조회 API 의 GET 요청만 replica 로 보내고, 쓰기 직후 REPLICA_PIN_SECONDS 동안은 해당 사용자를 primary 로 고정
+if os.getenv('DATABASE_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DATABASE_REPLICA_HOST'),
+        'PORT': os.getenv('DATABASE_REPLICA_PORT', '3306'),
+        'USER': os.getenv('DATABASE_REPLICA_USER', os.getenv('DATABASE_USER')),
+        'PASSWORD': os.getenv('DATABASE_REPLICA_PASSWORD', os.getenv('DATABASE_PASSWORD')),
+        'TEST': {'MIRROR': 'default'},  # 테스트 시에는 primary 연결을 그대로 사용
+    }
+
+DATABASE_ROUTERS = ['config.db_router.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "5"))
+# 쓰기 직후 primary 고정은 두 가지로 전달 (어느 워커가 다음 조회를 받아도 적용되도록)
+# - 응답 쿠키(REPLICA_PIN_COOKIE, REPLICA_PIN_SECONDS 동안 유효): 쿠키를 보내는 클라이언트(브라우저)
+# - 공유 캐시(REPLICA_PIN_CACHE_ALIAS, 아래 CACHES['shared']): 쿠키를 보내지 않는 클라이언트까지
+#   공유 캐시가 없거나 프로세스 로컬 캐시면 캐시 고정은 쓰지 않음 → replica 를 쓸 때는 SHARED_CACHE_BACKEND 설정 권장
+REPLICA_PIN_COOKIE = os.getenv("REPLICA_PIN_COOKIE", "db_pin")
+REPLICA_PIN_CACHE_ALIAS = os.getenv("REPLICA_PIN_CACHE_ALIAS", "shared")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -141,7 +163,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',  # JWT 인증 + 사용자 캐시
     ),
 }
 
@@ -171,4 +193,123 @@ SWAGGER_SETTINGS = {
 }
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",   # Vite 개발 서버
-]
\ No newline at end of file
+]
+
+# 백그라운드 워커 풀 크기 (문서 분석 작업 등)
+BACKGROUND_WORKERS = int(os.getenv("BACKGROUND_WORKERS", "4"))
+# 이 시간(분)이 지나도 끝나지 않은 분석 작업은 manage.py maintenance 가 실패로 표시 (재시작으로 사라진 작업 정리)
+ANALYSIS_JOB_TIMEOUT_MINUTES = int(os.getenv("ANALYSIS_JOB_TIMEOUT_MINUTES", "30"))
+
+# PDF 텍스트 추출 병렬도 (프로세스 수, 작업 하나가 맡는 페이지 수)
+# 1 이면 프로세스 풀 없이 순서대로 추출 - 기본값은 멀티코어 서버에서 benchmarks/bench_extract.py --workers 로 측정 후 조정
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_EXTRACT_PAGES_PER_TASK = int(os.getenv("PDF_EXTRACT_PAGES_PER_TASK", "8"))
+
+# 계약서 요약: 조항 단위 청크 크기(토큰 수, 모델 컨텍스트를 넘지 않도록 자동으로 줄어듦)와 동시 요약 호출 수
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "3000"))
+SUMMARY_MAX_PARALLEL = int(os.getenv("SUMMARY_MAX_PARALLEL", "4"))
+
+# 요약본 PDF를 분석 직후 미리 만들지 여부 (False 면 첫 다운로드 시점에 생성)
+SUMMARY_EAGER_RENDER = os.getenv("SUMMARY_EAGER_RENDER", "False") == "True"
+
+# 업로드 PDF 최대 크기 (바이트)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+
+# 캐시 설정
+# - default: 프로세스 로컬 캐시
+# - llm: OpenAI 응답 캐시 (LLM_CACHE_BACKEND = locmem | file | db | none)
+#   db 를 쓰려면 최초 1회 `python manage.py createcachetable` 실행
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "locmem")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(60 * 60 * 24)))             # 초
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+
+_LLM_CACHE_BACKENDS = {
+    'locmem': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'llm-responses'},
+    'file': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': os.path.join(BASE_DIR, '.cache', 'llm')},
+    'db': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'llm_response_cache'},
+    'none': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'llm': {
+        **_LLM_CACHE_BACKENDS[LLM_CACHE_BACKEND],
+        'TIMEOUT': LLM_CACHE_TTL,
+        'OPTIONS': {'MAX_ENTRIES': LLM_CACHE_MAX_ENTRIES},
+    },
+}
+
+# - shared: 여러 워커 프로세스가 함께 보는 캐시 (SHARED_CACHE_BACKEND = none | db | file | redis)
+#   JWT 사용자 캐시(AUTH_USER_CACHE_ALIAS)와 replica 고정(REPLICA_PIN_CACHE_ALIAS)이 사용
+#   none(기본): 공유 캐시 없음 → 사용자 캐시는 꺼지고(요청마다 DB 조회), replica 고정은 쿠키로만 전달
+#   db 는 최초 1회 `python manage.py createcachetable`, file 은 같은 서버의 프로세스끼리만 공유,
+#   redis 는 SHARED_CACHE_LOCATION(redis://호스트:6379/1) 과 redis 패키지 필요
+SHARED_CACHE_BACKEND = os.getenv("SHARED_CACHE_BACKEND", "none")
+
+_SHARED_CACHE_BACKENDS = {
+    'db': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'shared_cache'},
+    'file': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': os.path.join(BASE_DIR, '.cache', 'shared')},
+    'redis': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': os.getenv("SHARED_CACHE_LOCATION", "redis://127.0.0.1:6379/1")},
+}
+
+if SHARED_CACHE_BACKEND in _SHARED_CACHE_BACKENDS:
+    CACHES['shared'] = _SHARED_CACHE_BACKENDS[SHARED_CACHE_BACKEND]
+
+# 상담 채팅: 문서 검색 인덱스 구절 크기(문자 수), 상위 구절 수, 모델에 보내는 문서 발췌 최대 토큰 수
+# (문서 발췌는 모델 컨텍스트에서 응답/시스템 프롬프트/질문/요약을 뺀 남은 예산도 넘지 않음)
+CONSULT_PASSAGE_CHARS = int(os.getenv("CONSULT_PASSAGE_CHARS", "800"))
+CONSULT_RETRIEVAL_TOP_K = int(os.getenv("CONSULT_RETRIEVAL_TOP_K", "6"))
+CONSULT_CONTEXT_TOKENS = int(os.getenv("CONSULT_CONTEXT_TOKENS", "6000"))
+
+# 상담 채팅: 원문으로 보내는 최근 대화 수, 누적 요약을 갱신하는 단위(밀려난 대화 수)
+CONSULT_HISTORY_WINDOW = int(os.getenv("CONSULT_HISTORY_WINDOW", "10"))
+CONSULT_SUMMARY_BATCH = int(os.getenv("CONSULT_SUMMARY_BATCH", "10"))
+
+# JWT 인증 사용자 캐시: 유지 시간(초)과 사용할 캐시
+# - 공유 캐시(CACHES['shared'] 등)를 지정한 경우에만 켜짐, 비워 두면 요청마다 DB 에서 사용자 조회
+# - 사용자 저장/삭제 시 signal 이 항목을 지우므로 모든 워커가 같은 캐시를 봐야 함
+#   → LocMem/Dummy 처럼 프로세스마다 따로인 캐시를 지정하면 system check 오류(accounts.E001)로 시작하지 않음
+# - QuerySet.update() 로 바꾼 사용자는 signal 이 없어 최대 AUTH_USER_CACHE_TTL 초 동안 이전 상태로 인증됨
+# - 캐시에는 인증 검사에 필요한 필드만 저장 (비밀번호 해시는 저장하지 않음)
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+AUTH_USER_CACHE_ALIAS = os.getenv("AUTH_USER_CACHE_ALIAS", "shared" if 'shared' in CACHES else "")
+
+# OpenAI 호출 한도 (워커 프로세스 공용, 모델별 분당 요청/토큰 수는 OpenAI 계정 등급 한도에 맞게 설정)
+# - LLM_MAX_IN_FLIGHT: 서버 전체 동시 호출 수, LLM_QUEUE_TIMEOUT: 자리가 날 때까지 기다리는 최대 시간(초)
+# - LLM_MAX_RETRIES / LLM_BACKOFF_BASE: 일시적 오류(429, 시간 초과, 연결 오류, 5xx) 재시도 횟수와 지수 백오프 기준(초)
+LLM_RPM = int(os.getenv("LLM_RPM", "500"))
+LLM_TPM = int(os.getenv("LLM_TPM", "200000"))
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "120"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))
+LLM_LIMITER_DIR = os.getenv("LLM_LIMITER_DIR", os.path.join(BASE_DIR, '.cache', 'llm-limiter'))
+
+# OpenAI 호출 마감 시간(초, 한도 대기 + 재시도 포함): 기본값, 상담 채팅, 계약서 요약(청크 1개)
+# - LLM_HEDGE_AFTER: 이 시간(초) 안에 응답이 없으면 같은 요청을 한 번 더 보내 먼저 온 응답 사용 (비동기 호출만, 0 이면 사용 안 함, 비용 증가 주의)
+# - LLM_BREAKER_FAILURES / LLM_BREAKER_COOLDOWN: 재시도까지 모두 실패한 호출이 연속으로 이 횟수에 도달하면 쿨다운(초) 동안 호출 없이 바로 503
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_CHAT_TIMEOUT = float(os.getenv("LLM_CHAT_TIMEOUT", "30"))
+LLM_SUMMARY_TIMEOUT = float(os.getenv("LLM_SUMMARY_TIMEOUT", "120"))
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+# 모델별 컨텍스트 크기(토큰) 재정의 - 비워 두면 core.tokens.MODEL_CONTEXT_TOKENS 기본값 사용 (예: "gpt-4o=128000,gpt-4o-mini=128000")
+LLM_CONTEXT_TOKENS = {
+    name.strip(): int(size)
+    for name, _, size in (item.partition("=") for item in os.getenv("LLM_CONTEXT_TOKENS", "").split(",") if "=" in item)
+}
+
+# OpenAI 호출 사용량/지연 기록(LLMCallLog) 사용 여부와 보관 기간(일, manage.py maintenance 가 정리)
+LLM_TELEMETRY_ENABLED = os.getenv("LLM_TELEMETRY_ENABLED", "True") == "True"
+LLM_CALL_LOG_RETENTION_DAYS = int(os.getenv("LLM_CALL_LOG_RETENTION_DAYS", "90"))
+
+# /metrics (Prometheus 형식 요청/단계별 시간, SQL 쿼리 수, OpenAI 호출 상태)
+# - METRICS_TOKEN 을 지정해야 켜짐 (비워 두면 항상 404), 요청에 "Authorization: Bearer <토큰>" 필요
+#   (같은 서버의 리버스 프록시를 거치면 REMOTE_ADDR 가 127.0.0.1 이 되므로 IP 제한만으로는 외부에 열림)
+# - METRICS_ALLOWED_IPS: 토큰과 함께 확인하는 접근 허용 IP - 기본은 같은 서버에서만
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",") if ip.strip()]
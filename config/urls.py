@@ -3,6 +3,7 @@ from django.urls import path, include, re_path
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+from core.views import metrics
 
 
 schema_view = get_schema_view(
@@ -25,4 +26,6 @@ urlpatterns = [
     path('upload/', include('upload.urls')),
     path('document/', include('documents.urls')),
     path('consult/', include('consult.urls')),
+    path('system/', include('core.urls')),  # 운영 상태 조회 (관리자)
+    path('metrics', metrics, name='metrics'),  # Prometheus 스크레이프 (METRICS_TOKEN 설정 시에만)
 ]
@@ -0,0 +1,189 @@
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+
+from config.db_router import pin_to_primary
+from core.llm import achat_completion, astream_chat_completion
+from core.llm_resilience import LLMUnavailable, ensure_available
+from core.metrics import stage
+from core.models import ChatLog, Document
+from .history import aload_history_window, aload_rolling_summary, schedule_summary_update
+from .retrieval import PASSAGE_SEPARATOR, adocument_token_count, aretrieve_passages
+from .views import (
+    CHAT_FAILURE_MESSAGE,
+    CHAT_MAX_TOKENS,
+    CHAT_MODEL,
+    CHAT_TEMPERATURE,
+    CHAT_TIMEOUT,
+    CHAT_UNAVAILABLE_MESSAGE,
+    build_chat_messages,
+    plan_chat_context,
+    sse_event,
+)
+
+logger = logging.getLogger(__name__)
+
+# ASGI 비동기 채팅 API (POST /consult/chat/async/)
+# - 요청/응답 형식은 ChatCreateView 와 동일 (?stream=1 이면 SSE)
+# - OpenAI 응답을 기다리는 동안 워커 스레드를 점유하지 않으므로 한 프로세스에서 많은 대화를 동시에 처리
+# - DRF APIView 는 async 핸들러를 지원하지 않아 Django 함수형 뷰로 작성하고, 인증은 DRF 설정의 인증 클래스를 그대로 사용
+# - Django 4.2 의 csrf_exempt / require_POST 데코레이터는 async 뷰를 감싸지 못하므로 직접 처리
+
+
+# DRF 인증 클래스(JWT)로 사용자 확인 (DB 조회가 있어 스레드에서 실행), 실패 시 None
+@sync_to_async
+def authenticate_request(request):
+    for auth_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = auth_class().authenticate(request)
+        except APIException:
+            return None
+        if result is not None:
+            return result[0]
+    return None
+
+
+def _error(message, status, key="error"):
+    return JsonResponse({key: message}, status=status, json_dumps_params={"ensure_ascii": False})
+
+
+def _unavailable(error):
+    response = JsonResponse(
+        {"error": CHAT_UNAVAILABLE_MESSAGE, "retry_after": error.retry_after},
+        status=503,
+        json_dumps_params={"ensure_ascii": False},
+    )
+    response["Retry-After"] = str(error.retry_after or 1)
+    return response
+
+
+async def astream_chat_events(document, user, user_message, messages):
+    yield sse_event("user_message", {"id": user_message.id, "message": user_message.message})
+
+    parts = []
+    failed = False
+    try:
+        async for delta in astream_chat_completion(
+            model=CHAT_MODEL,
+            messages=messages,
+            max_tokens=CHAT_MAX_TOKENS,
+            temperature=CHAT_TEMPERATURE,
+            timeout=CHAT_TIMEOUT,
+            endpoint="chat_async_stream",
+            user_id=user.pk,
+        ):
+            parts.append(delta)
+            yield sse_event("token", {"delta": delta})
+    except Exception as e:
+        if isinstance(e, LLMUnavailable):
+            logger.warning("OpenAI 스트리밍 중단: %s", e)
+        else:
+            logger.exception("OpenAI 스트리밍 실패")
+        failed = True
+        await user_message.adelete()
+        message = CHAT_UNAVAILABLE_MESSAGE if isinstance(e, LLMUnavailable) else CHAT_FAILURE_MESSAGE
+        yield sse_event("error", {"message": message, "retry_after": getattr(e, "retry_after", None)})
+    finally:
+        if not failed:
+            ai_answer = "".join(parts).strip() or CHAT_FAILURE_MESSAGE
+            ai_message = await ChatLog.objects.acreate(
+                document=document,
+                user=user,
+                sender="ai",
+                message=ai_answer
+            )
+            await sync_to_async(schedule_summary_update)(document.id)
+
+    if not failed:
+        yield sse_event("done", {"id": ai_message.id, "message": ai_answer})
+
+
+async def chat_create(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    user = await authenticate_request(request)
+    if user is None:
+        return _error("액세스 토큰이 만료되었거나 유효하지 않습니다.", 401, key="detail")
+
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return _error("요청 본문이 올바른 JSON 이 아닙니다.", 400)
+    document_id = data.get("document_id")
+    message = data.get("message")
+    if not document_id or not message:
+        return _error("document_id, message는 필수 입력 항목입니다.", 400)
+
+    document = await Document.objects.filter(id=document_id, user=user).afirst()
+    if document is None:
+        return _error("해당 문서를 찾을 수 없습니다.", 404)
+
+    # 대화 히스토리(최근 N개) + 누적 요약 + 컨텍스트 예산 + 질문 관련 구절 (ChatCreateView 와 동일)
+    with stage("history_query"):
+        history = await aload_history_window(document)
+        summary = await aload_rolling_summary(document)
+    history, doc_tokens = plan_chat_context(message, history, summary, await adocument_token_count(document))
+    with stage("retrieval"):
+        passages = await aretrieve_passages(document, message, budget_tokens=doc_tokens)
+    messages = build_chat_messages(
+        message=message,
+        document_text=PASSAGE_SEPARATOR.join(passages),
+        history=history,
+        doc_title=document.file_name or "",
+        summary=summary,
+        doc_tokens=doc_tokens,
+    )
+
+    try:
+        ensure_available(CHAT_MODEL)
+    except LLMUnavailable as e:
+        return _unavailable(e)
+
+    with stage("db_insert"):
+        user_message = await ChatLog.objects.acreate(document=document, user=user, sender="user", message=message)
+    await sync_to_async(pin_to_primary)(user.pk)  # 직후 대화 조회는 primary 에서 (ReplicaRoutingMixin 과 동일)
+
+    stream = request.GET.get("stream", data.get("stream", False))
+    if str(stream).lower() in ("1", "true", "yes"):
+        response = StreamingHttpResponse(
+            astream_chat_events(document, user, user_message, messages),
+            content_type="text/event-stream; charset=utf-8",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    try:
+        ai_answer = await achat_completion(
+            model=CHAT_MODEL,
+            messages=messages,
+            max_tokens=CHAT_MAX_TOKENS,
+            temperature=CHAT_TEMPERATURE,
+            timeout=CHAT_TIMEOUT,
+            endpoint="chat_async",
+            user_id=user.pk,
+        )
+    except LLMUnavailable as e:
+        logger.warning("OpenAI 사용 불가: %s", e)
+        await user_message.adelete()
+        return _unavailable(e)
+    except Exception:
+        logger.exception("OpenAI 호출 실패")
+        await user_message.adelete()
+        raise
+
+    with stage("db_insert"):
+        ai_message = await ChatLog.objects.acreate(document=document, user=user, sender="ai", message=ai_answer)
+    await sync_to_async(schedule_summary_update)(document.id)
+
+    return JsonResponse({
+        "user_message": {"id": user_message.id, "message": message},
+        "ai_message": {"id": ai_message.id, "message": ai_answer},
+    }, json_dumps_params={"ensure_ascii": False})
+
+
+chat_create.csrf_exempt = True  # JWT 헤더 인증 API (세션 쿠키 미사용)
@@ -0,0 +1,158 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.background import submit
+from core.llm import chat_completion
+from core.models import ChatLog, ChatSummary
+from core.tokens import ContextBudget, count_tokens
+
+# 채팅 히스토리 관리
+# - 모델에는 최근 N개 대화(window)만 원문으로 보내고, 그보다 오래된 대화는 누적 요약으로 대체
+# - 요약은 window 밖으로 밀려난 대화가 일정 개수 쌓일 때마다 백그라운드에서 이어서 갱신 (전체 로그를 다시 읽지 않음)
+# - 아직 요약에 반영되지 않은 대화는 window 밖이어도 원문으로 보냄 → 모든 대화가 요약 또는 원문 중 한쪽에 포함
+#   (요약이 밀린 경우에도 _max_rows 개까지, 실제 분량은 뷰에서 컨텍스트 예산에 맞춰 최신 것부터 자름)
+
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_MAX_TOKENS = 600
+
+SUMMARY_PROMPT = (
+    "다음은 계약서 상담 대화의 '기존 요약'과 그 이후에 오간 '추가 대화'입니다.\n"
+    "두 내용을 합쳐 이후 상담에 필요한 맥락(사용자가 물어본 조항, 확인된 사실, 제시된 권고, 남은 질문)을 "
+    "한국어로 10줄 이내로 간결하게 요약하세요. 요약문만 출력하세요.\n\n"
+    "[기존 요약]\n{summary}\n\n[추가 대화]\n{turns}"
+)
+
+
+def _window_size():
+    return getattr(settings, "CONSULT_HISTORY_WINDOW", 10)
+
+
+def _batch_size():
+    return getattr(settings, "CONSULT_SUMMARY_BATCH", 10)
+
+
+# 요약 대기 중인 대화까지 포함해 한 번에 읽는 최대 행 수 (요약 작업 1회가 처리하는 양만큼 여유)
+def _max_rows():
+    return _window_size() + _batch_size() * 4
+
+
+# 요약에 아직 반영되지 않은 대화 (최근 window 개 포함) - (document, id) 인덱스 역순 조회
+# 요약은 window 밖의 대화만 반영하므로 최근 window 개는 항상 last_chat_id 보다 뒤에 있음
+# last_chat_id 는 서브쿼리로 같은 쿼리에서 읽음 (load_rolling_summary 보다 먼저 호출 → 겹칠 수는 있어도 빠지는 대화 없음)
+def _history_queryset(document):
+    summarized = ChatSummary.objects.filter(document=document).values("last_chat_id")[:1]
+    return (
+        ChatLog.objects
+        .filter(document=document, id__gt=Coalesce(Subquery(summarized), 0))
+        .order_by("-id")
+        .values_list("sender", "message")[:_max_rows()]
+    )
+
+
+def _as_messages(rows):
+    return [
+        {"role": ("assistant" if sender == "ai" else "user"), "content": message or ""}
+        for sender, message in reversed(rows)
+    ]
+
+
+# → 시간순 dict 목록 (분량은 뷰에서 컨텍스트 예산에 맞춰 최신 것부터 자름)
+def load_history_window(document):
+    return _as_messages(list(_history_queryset(document)))
+
+
+# 저장된 누적 요약문 (없으면 빈 문자열)
+def load_rolling_summary(document):
+    return (
+        ChatSummary.objects
+        .filter(document=document)
+        .values_list("summary", flat=True)
+        .first()
+    ) or ""
+
+
+# 비동기 뷰용 (async ORM)
+async def aload_history_window(document):
+    return _as_messages([row async for row in _history_queryset(document)])
+
+
+async def aload_rolling_summary(document):
+    return (
+        await ChatSummary.objects
+        .filter(document=document)
+        .values_list("summary", flat=True)
+        .afirst()
+    ) or ""
+
+
+# 대화 저장 후 호출: 요약 갱신이 필요하면 커밋 이후 백그라운드 작업으로 등록
+def schedule_summary_update(document_id):
+    transaction.on_commit(lambda: submit(update_rolling_summary, document_id))
+
+
+# window 밖으로 밀려났지만 아직 요약에 반영되지 않은 대화를 기존 요약에 이어 붙임
+# 예산 때문에 일부만 요약했거나 밀린 대화가 많으면 batch 미만이 남을 때까지 이어서 요약
+def update_rolling_summary(document_id):
+    while _summarize_next_batch(document_id):
+        pass
+
+
+# 요약 1회 → 이어서 더 요약할 대화가 있으면 True
+def _summarize_next_batch(document_id):
+    window = _window_size()
+    batch = _batch_size()
+
+    # 현재 window 의 가장 오래된 대화 id (이보다 작은 id 가 요약 대상)
+    window_start = (
+        ChatLog.objects
+        .filter(document_id=document_id)
+        .order_by("-id")
+        .values_list("id", flat=True)[window - 1:window]
+        .first()
+    )
+    if window_start is None:
+        return False
+
+    state, _ = ChatSummary.objects.select_related("document").get_or_create(document_id=document_id)
+    pending = list(
+        ChatLog.objects
+        .filter(document_id=document_id, id__gt=state.last_chat_id, id__lt=window_start)
+        .order_by("id")
+        .values_list("id", "sender", "message")[:batch * 4]
+    )
+    if len(pending) < batch:
+        return False  # 요약 호출 횟수를 줄이기 위해 일정 개수가 쌓일 때까지 대기 (그동안은 원문으로 전달됨)
+
+    # 모델 컨텍스트 예산 안에 들어가는 대화까지만 이번에 요약 (나머지는 다음 반복에서 이어서)
+    budget = ContextBudget(SUMMARY_MODEL, SUMMARY_MAX_TOKENS)
+    budget.reserve(SUMMARY_PROMPT.format(summary=state.summary or "(없음)", turns=""))
+    lines = []
+    for _, sender, message in pending:
+        line = f"{'AI' if sender == 'ai' else '사용자'}: {message or ''}"
+        tokens = count_tokens(line) + 1
+        if lines and tokens > budget.remaining:
+            break
+        budget.take(tokens)
+        lines.append(line)
+    pending = pending[:len(lines)]
+    turns = "\n".join(lines)
+    new_summary = chat_completion(
+        model=SUMMARY_MODEL,
+        messages=[{"role": "user", "content": SUMMARY_PROMPT.format(summary=state.summary or "(없음)", turns=turns)}],
+        temperature=0.2,
+        max_tokens=SUMMARY_MAX_TOKENS,
+        endpoint="chat_summary",
+        user_id=state.document.user_id,
+    )
+    if not new_summary:
+        return False
+
+    # 다른 워커가 먼저 갱신했다면(last_chat_id 변경) 이번 결과는 버림
+    return bool(ChatSummary.objects.filter(pk=state.pk, last_chat_id=state.last_chat_id).update(
+        summary=new_summary,
+        last_chat_id=pending[-1][0],
+        updated_at=timezone.now(),
+    ))
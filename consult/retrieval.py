@@ -0,0 +1,161 @@
+import math
+import re
+from collections import Counter
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from core.models import Document, DocumentRetrievalIndex
+from core.tokens import count_tokens, truncate_to_tokens
+from upload.chunking import build_chunks
+
+# 문서별 BM25 검색 인덱스
+# - 업로드 시 조항 단위 구절(passage)로 나눠 단어 빈도를 저장하고,
+#   채팅 시 질문과 관련된 상위 구절만 골라 모델에 전달함
+# - 형태소 분석기 없이 한글은 글자 2-gram, 영문/숫자는 단어 단위로 토큰화
+
+INDEX_VERSION = 2  # 2: 구절별 토큰 수(token_counts) 추가
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"[가-힣]+|[0-9A-Za-z]+")
+PASSAGE_SEPARATOR = "\n\n[...]\n\n"  # 모델에 보낼 때 떨어진 구절 사이에 넣는 표시 (예산에 포함)
+
+
+def tokenize(text):
+    tokens = []
+    for word in TOKEN_PATTERN.findall(text.lower()):
+        if "가" <= word[0] <= "힣" and len(word) > 1:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+# 원문 → 인덱스(dict, JSON 저장 가능)
+def build_index(text, passage_chars=None):
+    passage_chars = passage_chars or getattr(settings, "CONSULT_PASSAGE_CHARS", 800)
+    passages = build_chunks(text or "", passage_chars)
+
+    term_freqs = [dict(Counter(tokenize(p))) for p in passages]
+    lengths = [sum(tf.values()) for tf in term_freqs]
+    df = Counter()
+    for tf in term_freqs:
+        df.update(tf.keys())
+
+    return {
+        "version": INDEX_VERSION,
+        "passages": passages,
+        "term_freqs": term_freqs,
+        "lengths": lengths,
+        "token_counts": [count_tokens(p) for p in passages],
+        "df": dict(df),
+        "avgdl": (sum(lengths) / len(lengths)) if lengths else 0.0,
+    }
+
+
+# 질문과 관련도가 높은 구절 인덱스 목록 (점수 내림차순, 점수 0 제외)
+def search(index, query, top_k):
+    passages = index["passages"]
+    df = index["df"]
+    terms = [t for t in set(tokenize(query)) if t in df]
+    if not passages or not terms:
+        return []
+
+    n = len(passages)
+    idf = np.array([math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5)) for t in terms])
+    tf = np.array([[freqs.get(t, 0) for freqs in index["term_freqs"]] for t in terms], dtype=float)
+    lengths = np.array(index["lengths"], dtype=float)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / (index["avgdl"] or 1.0))
+
+    scores = (idf[:, None] * tf * (BM25_K1 + 1) / (tf + norm)).sum(axis=0)
+    order = np.argsort(-scores, kind="stable")[:top_k]
+    return [int(i) for i in order if scores[i] > 0]
+
+
+# 문서 인덱스 생성/갱신 (업로드 분석 작업에서 호출)
+def build_document_index(document):
+    index, _ = DocumentRetrievalIndex.objects.update_or_create(
+        document=document,
+        defaults={"data": build_index(document.extracted_text)},
+    )
+    return index
+
+
+# 저장된 인덱스 조회 (이전에 업로드된 문서는 처음 조회할 때 생성)
+def get_document_index(document):
+    index = DocumentRetrievalIndex.objects.filter(document=document).first()
+    if index is None or index.data.get("version") != INDEX_VERSION:
+        index = build_document_index(document)
+    return index.data
+
+
+# 문서 원문 토큰 수 (업로드 시 저장된 값, 이전 문서는 처음 한 번 계산해 저장)
+def document_token_count(document):
+    if document.token_count is None:
+        document.token_count = count_tokens((document.extracted_text or "").strip())
+        Document.objects.filter(pk=document.pk, token_count__isnull=True).update(token_count=document.token_count)
+    return document.token_count
+
+
+# 비동기 뷰용: 저장된 값이 없어 원문 전체를 토큰화해야 하면 스레드에서 실행
+async def adocument_token_count(document):
+    if document.token_count is not None:
+        return document.token_count
+    return await sync_to_async(document_token_count)(document)
+
+
+def _budget(budget_tokens):
+    return getattr(settings, "CONSULT_CONTEXT_TOKENS", 6000) if budget_tokens is None else budget_tokens
+
+
+# 질문 관련 구절을 문서 순서대로 예산(토큰 수) 안에서 골라 반환
+# 문서 전체가 예산 안에 들어가면 전체 원문을 그대로 사용
+def retrieve_passages(document, query, budget_tokens=None, top_k=None):
+    budget_tokens = _budget(budget_tokens)
+    top_k = top_k or getattr(settings, "CONSULT_RETRIEVAL_TOP_K", 6)
+
+    text = (document.extracted_text or "").strip()
+    if document_token_count(document) <= budget_tokens:
+        return [text] if text else []
+
+    index = get_document_index(document)
+    passages = index["passages"]
+    token_counts = index["token_counts"]
+
+    separator_tokens = count_tokens(PASSAGE_SEPARATOR)
+
+    # 두 번째 구절부터는 앞에 구분 표시가 붙으므로 그 토큰까지 예산에서 차감
+    selected = []
+    used = 0
+    for i in search(index, query, top_k):
+        cost = token_counts[i] + (separator_tokens if selected else 0)
+        if used + cost > budget_tokens:
+            continue
+        selected.append(i)
+        used += cost
+
+    # 관련 구절을 찾지 못하면 문서 앞부분으로 대체
+    if not selected:
+        for i in range(len(passages)):
+            cost = token_counts[i] + (separator_tokens if selected else 0)
+            if used + cost > budget_tokens:
+                break
+            selected.append(i)
+            used += cost
+
+    # 첫 구절 하나도 예산을 넘으면 예산만큼 잘라서라도 보냄 (문서 원문이 통째로 빠지지 않도록)
+    if not selected and passages and budget_tokens > 0:
+        first = truncate_to_tokens(passages[0], budget_tokens)
+        return [first] if first else []
+    return [passages[i] for i in sorted(selected)]
+
+
+# 비동기 뷰용: 짧은 문서는 바로 반환, 인덱스 조회/검색이 필요하면 스레드에서 실행
+async def aretrieve_passages(document, query, budget_tokens=None, top_k=None):
+    budget_tokens = _budget(budget_tokens)
+    if document.token_count is not None and document.token_count <= budget_tokens:
+        text = (document.extracted_text or "").strip()
+        return [text] if text else []
+    return await sync_to_async(retrieve_passages)(document, query, budget_tokens, top_k)
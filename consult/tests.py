@@ -1,3 +1,253 @@
-from django.test import TestCase
+import json
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.llm_resilience import LLMUnavailable
+from core.models import ChatLog, ChatSummary, Document, User
+from core.tokens import count_tokens
+
+from .history import load_history_window, load_rolling_summary, update_rolling_summary
+from .retrieval import PASSAGE_SEPARATOR, build_index, document_token_count, retrieve_passages, search, tokenize
+
+
+# 문서별 대화 히스토리 조회 (/consult/<document_id>/chat/)
+class ChatHistoryViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(user_id="tester", user_name="테스터", password="pw-1234")
+        self.document = Document.objects.create(user=self.user, file="documents/a.pdf", file_name="a", chat_name="a", extracted_text="")
+        self.chats = [self.add_chat(f"메시지{i}") for i in range(5)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f"/consult/{self.document.id}/chat/"
+
+    def add_chat(self, message):
+        return ChatLog.objects.create(document=self.document, user=self.user, sender="user", message=message)
+
+    def ids(self, response):
+        return [chat["id"] for chat in response.data["chats"]]
+
+    def test_without_parameters_returns_everything(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.ids(response), [c.id for c in self.chats])
+        self.assertFalse(response.data["has_more"])
+
+    def test_latest_page_and_before_cursor(self):
+        response = self.client.get(self.url, {"limit": 2})
+        self.assertEqual(self.ids(response), [c.id for c in self.chats[3:]])
+        self.assertTrue(response.data["has_more"])
+
+        response = self.client.get(self.url, {"limit": 2, "before": response.data["next_before"]})
+        self.assertEqual(self.ids(response), [c.id for c in self.chats[1:3]])
+        self.assertTrue(response.data["has_more"])
+
+    def test_after_id_polling(self):
+        response = self.client.get(self.url, {"after_id": self.chats[2].id})
+        self.assertEqual(self.ids(response), [c.id for c in self.chats[3:]])
+
+        response = self.client.get(self.url, {"after_id": self.chats[-1].id})
+        self.assertEqual(response.data["chats"], [])
+        self.assertEqual(response.data["last_id"], self.chats[-1].id)
+
+    def test_unchanged_history_returns_304(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # 다른 페이지의 ETag 와는 일치하지 않음
+        response = self.client.get(self.url, {"limit": 2}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_chat_changes_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.add_chat("새 메시지")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.data["chats"]), 6)
+
+    def test_etag_must_match_exactly(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'{etag.replace("-all", "-al")}, "other"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalid_parameters_and_other_users_document(self):
+        self.assertEqual(self.client.get(self.url, {"limit": "-1"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"before": "abc"}).status_code, 400)
+
+        other = User.objects.create_user(user_id="other", user_name="다른", password="pw-1234")
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+# 최근 window + 누적 요약 히스토리
+@override_settings(CONSULT_HISTORY_WINDOW=2, CONSULT_SUMMARY_BATCH=2)
+class HistoryWindowTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(user_id="tester", user_name="테스터", password="pw-1234")
+        self.document = Document.objects.create(user=self.user, file="documents/a.pdf", file_name="a", chat_name="a", extracted_text="")
+        self.chats = [
+            ChatLog.objects.create(document=self.document, user=self.user, sender="user" if i % 2 == 0 else "ai", message=f"메시지{i}")
+            for i in range(6)
+        ]
+
+    def contents(self):
+        return [m["content"] for m in load_history_window(self.document)]
+
+    def test_without_summary_every_turn_is_sent(self):
+        history = load_history_window(self.document)
+        self.assertEqual([m["content"] for m in history], [f"메시지{i}" for i in range(6)])
+        self.assertEqual(history[1]["role"], "assistant")
+
+    def test_unsummarized_turns_outside_window_are_kept(self):
+        ChatSummary.objects.create(document=self.document, summary="이전 요약", last_chat_id=self.chats[1].id)
+        self.assertEqual(self.contents(), [f"메시지{i}" for i in range(2, 6)])
+
+    @mock.patch("consult.history.chat_completion", return_value="누적 요약")
+    def test_rolling_summary_covers_turns_outside_window(self, completion):
+        update_rolling_summary(self.document.id)
+        completion.assert_called_once()
+        state = ChatSummary.objects.get(document=self.document)
+        self.assertEqual(state.last_chat_id, self.chats[3].id)
+        self.assertEqual(load_rolling_summary(self.document), "누적 요약")
+        self.assertEqual(self.contents(), ["메시지4", "메시지5"])
+
+    @mock.patch("consult.history.chat_completion", return_value="누적 요약")
+    def test_summary_waits_for_a_full_batch(self, completion):
+        ChatLog.objects.filter(id__in=[c.id for c in self.chats[:3]]).delete()
+        update_rolling_summary(self.document.id)  # window 밖 대화 1개 < batch 2
+        completion.assert_not_called()
+        self.assertEqual(self.contents(), ["메시지3", "메시지4", "메시지5"])
+
+
+CONTRACT = "\n".join([
+    "제1조 (목적) 이 계약은 갑과 을 사이의 용역 제공 조건을 정한다.",
+    "제2조 (임금) 을의 월 급여는 삼백만원으로 하며 매월 25일에 지급한다.",
+    "제3조 (근무시간) 근무시간은 오전 9시부터 오후 6시까지로 한다.",
+    "제4조 (해고) 갑은 30일 전에 서면으로 통지하여 계약을 해지할 수 있다.",
+    "제5조 (비밀유지) 을은 업무상 알게 된 비밀을 누설하지 않는다.",
+])
+
+
+# 질문 관련 구절 검색 (BM25)
+@override_settings(CONSULT_PASSAGE_CHARS=50)
+class RetrievalTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(user_id="tester", user_name="테스터", password="pw-1234")
+        self.document = Document.objects.create(user=user, file="documents/a.pdf", file_name="a", chat_name="a", extracted_text=CONTRACT)
+        self.index = build_index(CONTRACT)
+
+    def passage_with(self, word):
+        return next(p for p in self.index["passages"] if word in p)
+
+    def test_tokenize_uses_korean_bigrams(self):
+        self.assertEqual(tokenize("월 급여는 3000원 Pay"), ["월", "급여", "여는", "3000", "원", "pay"])
+
+    def test_search_ranks_relevant_passage_first(self):
+        results = search(self.index, "급여는 언제 지급하나요?", top_k=2)
+        self.assertEqual(self.index["passages"][results[0]], self.passage_with("급여"))
+        self.assertEqual(search(self.index, "zzz", top_k=2), [])
+
+    def test_short_document_is_sent_whole(self):
+        self.assertEqual(retrieve_passages(self.document, "급여", budget_tokens=100000), [CONTRACT])
+
+    def test_long_document_sends_relevant_passages_in_order(self):
+        budget = self.index["token_counts"][1] + self.index["token_counts"][3] + count_tokens(PASSAGE_SEPARATOR)
+        passages = retrieve_passages(self.document, "해고 통지와 급여", budget_tokens=budget)
+        self.assertEqual(passages, [self.passage_with("급여"), self.passage_with("해고")])
+        self.assertLessEqual(count_tokens(PASSAGE_SEPARATOR.join(passages)), budget)
+
+        # 구분 표시 토큰이 모자라면 두 번째 구절은 빠짐
+        passages = retrieve_passages(self.document, "해고 통지와 급여", budget_tokens=budget - 1)
+        self.assertEqual(len(passages), 1)
+
+    def test_unrelated_question_falls_back_to_leading_passages(self):
+        budget = self.index["token_counts"][0]
+        self.assertEqual(retrieve_passages(self.document, "zzz", budget_tokens=budget), self.index["passages"][:1])
+
+    def test_oversized_first_passage_is_truncated(self):
+        budget = self.index["token_counts"][0] // 2
+        passages = retrieve_passages(self.document, "zzz", budget_tokens=budget)
+        self.assertEqual(len(passages), 1)
+        self.assertTrue(self.index["passages"][0].startswith(passages[0]))
+        self.assertLessEqual(count_tokens(passages[0]), budget)
+
+    def test_token_count_is_computed_once(self):
+        count = document_token_count(self.document)
+        self.assertGreater(count, 0)
+        self.assertEqual(Document.objects.get(pk=self.document.pk).token_count, count)
+
+
+# 채팅 답변 Server-Sent Events 스트리밍 (/consult/chat/?stream=1)
+class ChatStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(user_id="tester", user_name="테스터", password="pw-1234")
+        self.document = Document.objects.create(user=self.user, file="documents/a.pdf", file_name="a", chat_name="a", extracted_text=CONTRACT)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def stream(self, deltas):
+        with mock.patch("consult.views.stream_chat_completion", side_effect=lambda **kwargs: deltas()):
+            response = self.client.post("/consult/chat/?stream=1", {"document_id": self.document.id, "message": "급여는?"}, format="json")
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response["Content-Type"].startswith("text/event-stream"))
+            body = b"".join(response.streaming_content).decode()
+        return [
+            (block.split("\n")[0].removeprefix("event: "), json.loads(block.split("\n")[1].removeprefix("data: ")))
+            for block in body.strip().split("\n\n")
+        ]
+
+    def test_tokens_are_streamed_then_saved(self):
+        events = self.stream(lambda: iter(["월 ", "삼백만원", "입니다."]))
+        self.assertEqual([name for name, _ in events], ["user_message", "token", "token", "token", "done"])
+        done = events[-1][1]
+        self.assertEqual(done["message"], "월 삼백만원입니다.")
+        self.assertEqual(ChatLog.objects.get(id=done["id"]).message, "월 삼백만원입니다.")
+        self.assertEqual(ChatLog.objects.get(id=events[0][1]["id"]).sender, "user")
+
+    def test_failure_sends_error_event(self):
+        def deltas():
+            yield "월 "
+            raise LLMUnavailable("차단", retry_after=3)
+
+        with self.assertLogs("consult.views", "WARNING"):
+            events = self.stream(deltas)
+        self.assertEqual([name for name, _ in events], ["user_message", "token", "error"])
+        self.assertEqual(events[2][1]["retry_after"], 3)
+        self.assertFalse(ChatLog.objects.filter(document=self.document).exists())  # 질문도 롤백
+
+    def test_unexpected_error_rolls_back_user_turn(self):
+        def deltas():
+            raise RuntimeError("boom")
+            yield
+
+        with self.assertLogs("consult.views", "ERROR"):
+            events = self.stream(deltas)
+        self.assertEqual([name for name, _ in events], ["user_message", "error"])
+        self.assertFalse(ChatLog.objects.filter(document=self.document).exists())
+
+
+# 채팅 답변 실패 처리 (/consult/chat/): 질문을 지우고 503 / 500, 실패 안내 문구는 저장하지 않음
+class ChatFailureTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(user_id="tester", user_name="테스터", password="pw-1234")
+        self.document = Document.objects.create(user=self.user, file="documents/a.pdf", file_name="a", chat_name="a", extracted_text=CONTRACT)
+        self.client = APIClient(raise_request_exception=False)
+        self.client.force_authenticate(self.user)
+
+    def post(self, error):
+        with mock.patch("consult.views.chat_completion", side_effect=error), self.assertLogs("consult.views"):
+            return self.client.post("/consult/chat/", {"document_id": self.document.id, "message": "급여는?"}, format="json")
+
+    def test_unavailable_returns_503(self):
+        response = self.post(LLMUnavailable("차단", retry_after=3))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "3")
+        self.assertFalse(ChatLog.objects.filter(document=self.document).exists())
+
+    def test_unexpected_error_returns_500(self):
+        response = self.post(RuntimeError("boom"))
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(ChatLog.objects.filter(document=self.document).exists())
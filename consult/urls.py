@@ -1,8 +1,10 @@
 from django.urls import path
 
 from .import views
+from . import async_views
 
 urlpatterns = [
     path('chat/', views.ChatCreateView.as_view(), name='consult'),
+    path('chat/async/', async_views.chat_create, name='consult-async'),  # ASGI 비동기 버전
     path('<int:document_id>/chat/', views.ChatHistoryView.as_view(), name='chat-history'),
-]
\ No newline at end of file
+]
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .metrics import install_query_counter
+
+        connection_created.connect(install_query_counter, dispatch_uid="core.metrics.query_counter")  # 요청별 SQL 쿼리 수 집계
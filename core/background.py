@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+# 요청 스레드를 붙잡지 않도록 오래 걸리는 작업(PDF 분석, LLM 호출 등)을 처리하는 백그라운드 워커 풀
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = getattr(settings, "BACKGROUND_WORKERS", 4)
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="background")
+    return _executor
+
+
+def _run(func, args, kwargs):
+    # 워커 스레드는 요청 사이클 밖에서 돌기 때문에 DB 연결을 직접 정리해야 함
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception("백그라운드 작업 실패: %s", getattr(func, "__qualname__", func))
+        raise
+    finally:
+        connection.close()
+
+
+def submit(func, *args, **kwargs):
+    return get_executor().submit(_run, func, args, kwargs)
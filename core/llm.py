@@ -0,0 +1,359 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import caches
+from openai import AsyncOpenAI, OpenAI
+
+from .background import submit
+from .llm_limiter import alimited, asettle, backoff_seconds, estimate_tokens, limited, penalize, settle
+from .llm_resilience import LLMUnavailable, acall_with_resilience, call_with_resilience, resilience_stats  # noqa: F401
+from .models import LLMCallLog
+from .telemetry import LLMCall, arecord_llm_call, record_llm_call
+
+logger = logging.getLogger(__name__)
+
+# OpenAI 호출 공용 모듈 (upload 요약, consult 채팅이 함께 사용)
+# - 같은 모델/온도/최대 토큰 + 같은 메시지(정규화 후)면 캐시된 응답을 바로 반환
+# - 캐시 저장소는 settings.CACHES['llm'] (locmem / file / db, TTL 과 최대 항목 수 포함)
+# - ASGI 비동기 뷰용 achat_completion / astream_chat_completion 은 AsyncOpenAI 로 같은 캐시를 공유
+# - 실제 호출은 core.llm_limiter 의 프로세스 공용 한도(RPM/TPM/동시 호출 수) 안에서만 실행
+# - 마감 시간/재시도/헤지/회로 차단은 core.llm_resilience (사용할 수 없으면 LLMUnavailable → 뷰에서 503)
+# - 호출마다 모델/토큰/지연/재시도/결과를 LLMCallLog 에 기록 (core.telemetry)
+# - validate(응답 문자열 → bool) 를 넘기면 검사를 통과한 응답만 캐시 (형식이 깨진 응답이 TTL 동안 재사용되지 않도록)
+
+# 클라이언트는 처음 호출할 때 생성 (API 키 없이도 manage.py check / migrate / 벤치마크가 import 할 수 있도록)
+client = None
+async_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global client
+    if client is None:
+        with _client_lock:
+            if client is None:
+                client = OpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)  # 재시도는 한도 관리와 함께 직접 처리
+    return client
+
+
+def get_async_client():
+    global async_client
+    if async_client is None:
+        with _client_lock:
+            if async_client is None:
+                async_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+    return async_client
+
+LLM_CACHE_ALIAS = "llm"
+
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+# 캐시 적중/미스 횟수 (프로세스 단위)
+def cache_stats():
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    total = hits + misses
+    return {
+        "backend": settings.CACHES.get(LLM_CACHE_ALIAS, {}).get("BACKEND", ""),
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+    }
+
+
+# 공백/줄바꿈/유니코드 표기 차이로 캐시 키가 달라지지 않도록 정규화
+def _normalize(content):
+    content = unicodedata.normalize("NFC", content or "").replace("\r\n", "\n")
+    return "\n".join(line.rstrip() for line in content.split("\n")).strip()
+
+
+def cache_key(model, messages, temperature, max_tokens):
+    payload = json.dumps({
+        "model": model,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "messages": [{"role": m["role"], "content": _normalize(m["content"])} for m in messages],
+    }, ensure_ascii=False, sort_keys=True)
+    return "chat:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_completion(key):
+    cached = caches[LLM_CACHE_ALIAS].get(key)
+    _count("hits" if cached is not None else "misses")
+    return cached
+
+
+def set_cached_completion(key, content):
+    if content:
+        caches[LLM_CACHE_ALIAS].set(key, content)
+
+
+async def aget_cached_completion(key):
+    cached = await caches[LLM_CACHE_ALIAS].aget(key)
+    _count("hits" if cached is not None else "misses")
+    return cached
+
+
+async def aset_cached_completion(key, content):
+    if content:
+        await caches[LLM_CACHE_ALIAS].aset(key, content)
+
+
+# 캐시된 응답이 검사를 통과하지 못하면 (검사 기준이 바뀐 경우 등) 캐시에서 지우고 새로 호출
+def _valid_cached(key, cached, validate):
+    if cached is None or validate is None or validate(cached):
+        return cached
+    caches[LLM_CACHE_ALIAS].delete(key)
+    return None
+
+
+async def _avalid_cached(key, cached, validate):
+    if cached is None or validate is None or validate(cached):
+        return cached
+    await caches[LLM_CACHE_ALIAS].adelete(key)
+    return None
+
+
+# 429 응답: Retry-After(없으면 지수 백오프)만큼 모델 전체 쿨다운 등록 → 다음 시도는 limiter 에서 대기
+def _on_rate_limited(model):
+    def handle(attempt, error):
+        delay = backoff_seconds(attempt, error)
+        logger.warning("OpenAI 429 (%s) - %.1f초 쿨다운", model, delay)
+        penalize(model, delay)
+        return delay
+    return handle
+
+
+def _usage_tokens(response):
+    return getattr(getattr(response, "usage", None), "total_tokens", None)
+
+
+def _timeout(timeout):
+    return timeout or getattr(settings, "LLM_TIMEOUT", 60)
+
+
+def _outcome(error):
+    if isinstance(error, LLMUnavailable):
+        return LLMCallLog.OUTCOME_UNAVAILABLE
+    if isinstance(error, (GeneratorExit, asyncio.CancelledError)):
+        return LLMCallLog.OUTCOME_ABORTED
+    return LLMCallLog.OUTCOME_ERROR
+
+
+# Chat Completions 호출 후 응답 본문(문자열) 반환
+# - core.llm_limiter 한도(RPM/TPM/동시 호출 수) 안에서 실행
+# - timeout(초) 안에서 일시적 오류는 재시도, 회로 차단/재시도 소진 시 LLMUnavailable (그 밖의 예외는 그대로 전달)
+# - endpoint / user_id: 사용량 기록(LLMCallLog)용 호출 위치와 사용자
+# - validate: 응답 검사 함수 (통과한 응답만 캐시, 결과는 검사와 상관없이 반환 - 실패 처리는 호출한 쪽에서)
+def chat_completion(model, messages, temperature, max_tokens, use_cache=True, timeout=None, endpoint=None, user_id=None, validate=None):
+    call = LLMCall(model, endpoint, user_id)
+    key = cache_key(model, messages, temperature, max_tokens)
+    if use_cache:
+        cached = _valid_cached(key, get_cached_completion(key), validate)
+        if cached is not None:
+            record_llm_call(call.finish(LLMCallLog.OUTCOME_CACHED))
+            return cached
+
+    estimated = estimate_tokens(messages, max_tokens)
+
+    def once(remaining):
+        with limited(model, estimated, remaining):
+            response = get_client().with_options(timeout=max(remaining, 1.0)).chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+        settle(model, estimated, _usage_tokens(response))
+        return response
+
+    try:
+        response = call_with_resilience(model, once, _timeout(timeout), _on_rate_limited(model), trace=call.trace)
+    except BaseException as e:
+        record_llm_call(call.finish(_outcome(e)))
+        raise
+    record_llm_call(call.finish(LLMCallLog.OUTCOME_OK, response.usage))
+    content = (response.choices[0].message.content or "").strip()
+
+    if use_cache and (validate is None or validate(content)):
+        set_cached_completion(key, content)
+    return content
+
+
+# 스트리밍 호출: 응답 조각(delta 문자열)을 생성되는 대로 yield
+# 끝까지 받은 응답만 캐시에 저장하며, 캐시 적중 시에는 저장된 전체 응답을 한 번에 yield
+# 재시도/헤지는 스트림 시작(create) 단계에만 적용, 동시 호출 슬롯은 스트림이 끝날 때(또는 클라이언트가 끊을 때)까지 유지
+# 사용량은 마지막 조각의 usage(stream_options.include_usage)로 기록
+def stream_chat_completion(model, messages, temperature, max_tokens, use_cache=True, timeout=None, endpoint=None, user_id=None):
+    call = LLMCall(model, endpoint, user_id)
+    key = cache_key(model, messages, temperature, max_tokens)
+    if use_cache:
+        cached = get_cached_completion(key)
+        if cached is not None:
+            record_llm_call(call.finish(LLMCallLog.OUTCOME_CACHED))
+            yield cached
+            return
+
+    timeout = _timeout(timeout)
+    estimated = estimate_tokens(messages, max_tokens)
+    slot = {}
+
+    def once(remaining):
+        guard = limited(model, estimated, remaining)
+        guard.__enter__()
+        try:
+            stream = get_client().with_options(timeout=max(remaining, 1.0)).chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+        except BaseException:
+            guard.__exit__(None, None, None)
+            raise
+        slot["guard"] = guard
+        return stream
+
+    parts = []
+    usage = None
+    try:
+        stream = call_with_resilience(model, once, timeout, _on_rate_limited(model), trace=call.trace)
+        try:
+            for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        finally:
+            slot["guard"].__exit__(None, None, None)
+    except BaseException as e:
+        record_llm_call(call.finish(_outcome(e), usage))
+        raise
+    record_llm_call(call.finish(LLMCallLog.OUTCOME_OK, usage))
+    settle(model, estimated, getattr(usage, "total_tokens", None))
+
+    if use_cache:
+        set_cached_completion(key, "".join(parts).strip())
+
+
+# chat_completion 의 비동기 버전 (응답/한도를 기다리는 동안 이벤트 루프를 점유하지 않음)
+async def achat_completion(model, messages, temperature, max_tokens, use_cache=True, timeout=None, endpoint=None, user_id=None, validate=None):
+    call = LLMCall(model, endpoint, user_id)
+    key = cache_key(model, messages, temperature, max_tokens)
+    if use_cache:
+        cached = await _avalid_cached(key, await aget_cached_completion(key), validate)
+        if cached is not None:
+            await arecord_llm_call(call.finish(LLMCallLog.OUTCOME_CACHED))
+            return cached
+
+    estimated = estimate_tokens(messages, max_tokens)
+
+    async def once(remaining):
+        async with alimited(model, estimated, remaining):
+            response = await get_async_client().with_options(timeout=max(remaining, 1.0)).chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+        await asettle(model, estimated, _usage_tokens(response))
+        return response
+
+    try:
+        response = await acall_with_resilience(model, once, _timeout(timeout), _on_rate_limited(model), trace=call.trace)
+    except BaseException as e:
+        await arecord_llm_call(call.finish(_outcome(e)))
+        raise
+    await arecord_llm_call(call.finish(LLMCallLog.OUTCOME_OK, response.usage))
+    content = (response.choices[0].message.content or "").strip()
+
+    if use_cache and (validate is None or validate(content)):
+        await aset_cached_completion(key, content)
+    return content
+
+
+# stream_chat_completion 의 비동기 버전 (async generator)
+async def astream_chat_completion(model, messages, temperature, max_tokens, use_cache=True, timeout=None, endpoint=None, user_id=None):
+    call = LLMCall(model, endpoint, user_id)
+    key = cache_key(model, messages, temperature, max_tokens)
+    if use_cache:
+        cached = await aget_cached_completion(key)
+        if cached is not None:
+            await arecord_llm_call(call.finish(LLMCallLog.OUTCOME_CACHED))
+            yield cached
+            return
+
+    timeout = _timeout(timeout)
+    estimated = estimate_tokens(messages, max_tokens)
+    slot = {}
+
+    async def once(remaining):
+        guard = alimited(model, estimated, remaining)
+        await guard.__aenter__()
+        try:
+            stream = await get_async_client().with_options(timeout=max(remaining, 1.0)).chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+        except BaseException:
+            await guard.__aexit__(None, None, None)
+            raise
+        slot["guard"] = guard
+        return stream
+
+    parts = []
+    usage = None
+    try:
+        stream = await acall_with_resilience(model, once, timeout, _on_rate_limited(model), hedge=False, trace=call.trace)
+        try:
+            async for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        finally:
+            await slot["guard"].__aexit__(None, None, None)
+    except BaseException as e:
+        # 연결 종료로 취소된 경우 이 태스크에서는 더 기다릴 수 없으므로 기록은 워커 풀에서 저장
+        if isinstance(e, (GeneratorExit, asyncio.CancelledError)):
+            submit(record_llm_call, call.finish(_outcome(e), usage))
+        else:
+            await arecord_llm_call(call.finish(_outcome(e), usage))
+        raise
+    await arecord_llm_call(call.finish(LLMCallLog.OUTCOME_OK, usage))
+    await asettle(model, estimated, getattr(usage, "total_tokens", None))
+
+    if use_cache:
+        await aset_cached_completion(key, "".join(parts).strip())
+
+
+# 모니터링용 상태 (응답 캐시, 재시도/회로 차단기)
+def llm_status():
+    return {
+        "cache": cache_stats(),
+        "resilience": resilience_stats(),
+    }
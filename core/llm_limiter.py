@@ -0,0 +1,208 @@
+import asyncio
+import fcntl
+import json
+import os
+import random
+import re
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .llm_resilience import LLMUnavailable
+from .tokens import count_message_tokens
+
+# OpenAI 호출 속도/동시성 제한 (여러 워커 프로세스가 공유)
+# - 모델별 토큰 버킷 2개: 분당 요청 수(LLM_RPM), 분당 토큰 수(LLM_TPM)
+# - 동시 호출 수(LLM_MAX_IN_FLIGHT): 슬롯 파일 N개에 대한 flock, 프로세스가 죽으면 OS 가 잠금을 풀어줌
+# - 공유 상태는 LLM_LIMITER_DIR 아래 작은 JSON 파일이며 fcntl.flock 으로 갱신 (같은 서버의 프로세스 간 공유)
+# - 자리가 없으면 대기(backpressure)하고, LLM_QUEUE_TIMEOUT 을 넘기면 LLMRateLimited
+# - 429 응답을 받으면 Retry-After(없으면 지수 백오프 + 지터)만큼 모델 전체를 쉬게 함 → 다른 프로세스도 같이 대기
+# - 비동기 버전(alimited / asettle)은 파일 잠금/읽기/쓰기를 스레드에서 실행 (잠금 대기 중 이벤트 루프를 막지 않음)
+
+SLOT_POLL_SECONDS = 0.05
+MAX_SLEEP_SECONDS = 1.0  # 대기 중에도 주기적으로 다시 확인 (다른 호출이 끝나 슬롯이 빌 수 있음)
+
+
+class LLMRateLimited(LLMUnavailable):
+    """대기 시간 안에 호출 한도/동시 호출 자리를 얻지 못함"""
+
+
+def _limiter_dir():
+    path = getattr(settings, "LLM_LIMITER_DIR", None) or os.path.join(settings.BASE_DIR, ".cache", "llm-limiter")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _limits():
+    return (
+        max(1, getattr(settings, "LLM_RPM", 500)),
+        max(1, getattr(settings, "LLM_TPM", 200000)),
+    )
+
+
+@contextmanager
+def _locked_state(model):
+    name = re.sub(r"[^0-9A-Za-z._-]", "_", model)
+    fd = os.open(os.path.join(_limiter_dir(), f"bucket-{name}.json"), os.O_RDWR | os.O_CREAT, 0o644)
+    with os.fdopen(fd, "r+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            raw = f.read()
+            state = json.loads(raw) if raw else {}
+            yield state
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(state))
+            f.flush()
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# 버킷 잔량 (마지막 갱신 이후 분당 capacity 속도로 채움, 최대 capacity)
+def _refill(bucket, capacity, now):
+    if not bucket:
+        return float(capacity)
+    level, updated = bucket
+    return min(float(capacity), level + (now - updated) * capacity / 60.0)
+
+
+# 버킷에서 요청 1개 + 토큰 tokens 개를 꺼냄 → 0(성공) 또는 기다려야 하는 초
+def _try_take(model, tokens):
+    rpm, tpm = _limits()
+    tokens = min(tokens, tpm)  # 한 요청이 분당 한도보다 크면 영원히 기다리지 않도록
+    now = time.time()
+    with _locked_state(model) as state:
+        cooldown = state.get("cooldown_until", 0) - now
+        if cooldown > 0:
+            return cooldown
+        requests_left = _refill(state.get("rpm"), rpm, now)
+        tokens_left = _refill(state.get("tpm"), tpm, now)
+        wait = max((1 - requests_left) * 60 / rpm, (tokens - tokens_left) * 60 / tpm, 0)
+        if wait > 0:
+            return wait
+        state["rpm"] = [requests_left - 1, now]
+        state["tpm"] = [tokens_left - tokens, now]
+        return 0
+
+
+# 동시 호출 슬롯 하나를 잠금 (없으면 None)
+def _try_slot():
+    count = max(1, getattr(settings, "LLM_MAX_IN_FLIGHT", 8))
+    for i in random.sample(range(count), count):
+        f = open(os.path.join(_limiter_dir(), f"slot-{i}.lock"), "a")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return f
+        except BlockingIOError:
+            f.close()
+    return None
+
+
+def _release(slot):
+    if slot is not None:
+        fcntl.flock(slot, fcntl.LOCK_UN)
+        slot.close()
+
+
+# 한 번 시도: (슬롯, 0) 성공 또는 (None, 대기 초)
+def _acquire_step(model, tokens):
+    slot = _try_slot()
+    if slot is None:
+        return None, SLOT_POLL_SECONDS
+    wait = _try_take(model, tokens)
+    if wait > 0:
+        _release(slot)  # 버킷을 기다리는 동안 다른 모델 호출이 슬롯을 쓸 수 있도록 반납
+        return None, wait
+    return slot, 0
+
+
+def _sleep_for(wait, deadline):
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return 0
+    return min(wait, MAX_SLEEP_SECONDS, remaining) + random.uniform(0, SLOT_POLL_SECONDS)
+
+
+def _timeout(timeout):
+    return getattr(settings, "LLM_QUEUE_TIMEOUT", 120) if timeout is None else timeout
+
+
+# with limited(model, tokens): 한도 안에서 호출 1회 (자리가 날 때까지 대기)
+@contextmanager
+def limited(model, tokens, timeout=None):
+    deadline = time.monotonic() + _timeout(timeout)
+    while True:
+        slot, wait = _acquire_step(model, tokens)
+        if slot is not None:
+            break
+        delay = _sleep_for(wait, deadline)
+        if delay <= 0:
+            raise LLMRateLimited(f"{model} 호출 대기 시간 초과", retry_after=5)
+        time.sleep(delay)
+    try:
+        yield
+    finally:
+        _release(slot)
+
+
+# async with alimited(...): 비동기 뷰용 (대기 중 이벤트 루프를 막지 않음)
+@asynccontextmanager
+async def alimited(model, tokens, timeout=None):
+    deadline = time.monotonic() + _timeout(timeout)
+    while True:
+        slot, wait = await sync_to_async(_acquire_step, thread_sensitive=False)(model, tokens)
+        if slot is not None:
+            break
+        delay = _sleep_for(wait, deadline)
+        if delay <= 0:
+            raise LLMRateLimited(f"{model} 호출 대기 시간 초과", retry_after=5)
+        await asyncio.sleep(delay)
+    try:
+        yield
+    finally:
+        _release(slot)
+
+
+# 실제 사용량(usage.total_tokens)으로 토큰 버킷 보정 (추정보다 적게 쓰면 돌려받고, 많이 쓰면 더 차감)
+def settle(model, estimated, actual):
+    if not actual or actual == estimated:
+        return
+    _, tpm = _limits()
+    now = time.time()
+    with _locked_state(model) as state:
+        level = _refill(state.get("tpm"), tpm, now)
+        state["tpm"] = [min(float(tpm), level + estimated - actual), now]
+
+
+async def asettle(model, estimated, actual):
+    if not actual or actual == estimated:
+        return
+    await sync_to_async(settle, thread_sensitive=False)(model, estimated, actual)
+
+
+# 429 응답 후 모델 전체 호출을 seconds 동안 멈춤 (모든 프로세스 공통)
+def penalize(model, seconds):
+    until = time.time() + seconds
+    with _locked_state(model) as state:
+        state["cooldown_until"] = max(state.get("cooldown_until", 0), until)
+
+
+# 429 재시도 대기 시간: Retry-After 헤더 우선, 없으면 지수 백오프 + 지터
+def backoff_seconds(attempt, error=None):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    retry_after = headers.get("retry-after-ms") or headers.get("retry-after")
+    try:
+        if retry_after is not None:
+            seconds = float(retry_after)
+            return seconds / 1000 if "retry-after-ms" in headers else seconds
+    except ValueError:
+        pass
+    base = getattr(settings, "LLM_BACKOFF_BASE", 1.0)
+    return min(base * (2 ** attempt), 60.0) * random.uniform(0.5, 1.0) + random.uniform(0, base)
+
+
+# 요청 토큰 수(core.tokens) + 최대 응답 토큰
+def estimate_tokens(messages, max_tokens):
+    return count_message_tokens(messages) + (max_tokens or 0)
@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+# OpenAI 호출 장애 대응 (core.llm 에서 사용)
+# - 호출마다 전체 마감 시간(deadline) 안에서만 재시도하고, 각 시도의 HTTP timeout 도 남은 시간으로 제한
+# - 일시적 오류(시간 초과, 연결 오류, 5xx, 429)만 지터가 있는 지수 백오프로 재시도 (LLM_MAX_RETRIES)
+# - 선택: LLM_HEDGE_AFTER 초 안에 응답이 없으면 같은 요청을 하나 더 보내 먼저 온 응답 사용 (꼬리 지연 완화)
+#   비동기 호출에만 적용 - 동기 호출은 늦게 온 쪽 요청을 취소할 수 없어 한도 자리와 비용만 두 배로 쓰게 됨
+# - 모델별 회로 차단기: 연속 실패가 LLM_BREAKER_FAILURES 회면 LLM_BREAKER_COOLDOWN 초 동안 즉시 LLMUnavailable
+#   → 뷰에서는 503 으로 응답해 장애 중인 호출이 쌓이지 않게 함 (상태는 프로세스 단위)
+
+RETRYABLE_ERRORS = (APITimeoutError, APIConnectionError, InternalServerError, RateLimitError, asyncio.TimeoutError)
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUnavailable(Exception):
+    """OpenAI 를 지금 사용할 수 없음 (회로 차단, 재시도/마감 시간 소진, 호출 한도 대기 초과)"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+_stats = {"calls": 0, "retries": 0, "timeouts": 0, "failures": 0, "hedges": 0, "hedge_wins": 0, "rejected": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+class Deadline:
+    def __init__(self, seconds):
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+
+# 모델별 회로 차단기 (closed → 연속 실패 → open → cooldown 후 half_open 시험 호출 1건 → closed / open)
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, model):
+        self.model = model
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def _cooldown(self):
+        return getattr(settings, "LLM_BREAKER_COOLDOWN", 30)
+
+    def retry_after(self):
+        return max(0, int(self.opened_at + self._cooldown() - time.monotonic()) + 1)
+
+    # 호출 전 확인: 차단 중이면 LLMUnavailable
+    def before_call(self):
+        with self.lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self._cooldown():
+                    _count("rejected")
+                    raise LLMUnavailable(f"{self.model} 호출이 일시 차단되었습니다.", retry_after=self.retry_after())
+                self.state = self.HALF_OPEN
+                self.probing = False
+            if self.state == self.HALF_OPEN:
+                if self.probing:
+                    _count("rejected")
+                    raise LLMUnavailable(f"{self.model} 복구 확인 중입니다.", retry_after=1)
+                self.probing = True
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= getattr(settings, "LLM_BREAKER_FAILURES", 5):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.probing = False
+
+    # 시험 호출이 재시도 대상이 아닌 오류(잘못된 요청 등)로 끝난 경우: 상태는 유지하고 다음 시험 허용
+    def release_probe(self):
+        with self.lock:
+            self.probing = False
+
+    def snapshot(self):
+        with self.lock:
+            state = self.state
+            if state == self.OPEN and time.monotonic() - self.opened_at >= self._cooldown():
+                state = self.HALF_OPEN
+            return {
+                "state": state,
+                "consecutive_failures": self.failures,
+                "retry_after": self.retry_after() if state == self.OPEN else 0,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(model):
+    with _breakers_lock:
+        if model not in _breakers:
+            _breakers[model] = CircuitBreaker(model)
+        return _breakers[model]
+
+
+# 차단 중이면 LLMUnavailable (뷰에서 DB 기록 전에 빠르게 503 응답할 때 사용)
+def ensure_available(model):
+    snapshot = get_breaker(model).snapshot()
+    if snapshot["state"] == CircuitBreaker.OPEN:
+        _count("rejected")
+        raise LLMUnavailable(f"{model} 호출이 일시 차단되었습니다.", retry_after=snapshot["retry_after"])
+
+
+# 재시도/차단기/헤지 통계 (프로세스 단위, 모니터링용)
+def resilience_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    stats["breakers"] = {b.model: b.snapshot() for b in breakers}
+    return stats
+
+
+def _retry_delay(attempt):
+    base = getattr(settings, "LLM_BACKOFF_BASE", 1.0)
+    return min(base * (2 ** attempt), 30.0) * random.uniform(0.5, 1.0)
+
+
+def _max_retries():
+    return getattr(settings, "LLM_MAX_RETRIES", 4)
+
+
+def _hedge_after(deadline):
+    hedge_after = getattr(settings, "LLM_HEDGE_AFTER", 0)
+    return hedge_after if hedge_after and deadline.remaining() > hedge_after else 0
+
+
+# 시도 1회 (헤지 설정 시 hedge_after 초 후 같은 요청을 한 번 더 보내고 먼저 성공한 응답 사용, 늦게 온 쪽은 취소)
+async def _ahedged(once, deadline, hedge=True):
+    hedge_after = _hedge_after(deadline) if hedge else 0
+    if not hedge_after:
+        return await asyncio.wait_for(once(deadline.remaining()), deadline.remaining())
+
+    tasks = [asyncio.ensure_future(once(deadline.remaining()))]
+    done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+    if not done:
+        _count("hedges")
+        tasks.append(asyncio.ensure_future(once(deadline.remaining())))
+
+    error = None
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=deadline.remaining(), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                raise asyncio.TimeoutError()
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                if task is not tasks[0]:
+                    _count("hedge_wins")
+                return task.result()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()  # 늦게 온 쪽 요청은 취소
+
+
+# 재시도 대상 오류 처리: 재시도하면 대기 시간, 포기하면 LLMUnavailable
+# 차단기 실패는 시도마다가 아니라 재시도까지 모두 소진한 호출 1건당 한 번만 기록
+# (재시도 횟수만큼 세면 실패한 호출 하나만으로도 LLM_BREAKER_FAILURES 에 도달함)
+def _handle_retryable(model, breaker, attempt, error, deadline, on_rate_limited):
+    if isinstance(error, RateLimitError):
+        delay = on_rate_limited(attempt, error)  # 호출 한도 쿨다운(모든 프로세스 공통), 차단기 실패로 세지 않음
+    else:
+        if isinstance(error, (APITimeoutError, asyncio.TimeoutError)):
+            _count("timeouts")
+        delay = _retry_delay(attempt)
+
+    if attempt >= _max_retries() or delay >= deadline.remaining() or breaker.snapshot()["state"] == CircuitBreaker.OPEN:
+        _count("failures")
+        if not isinstance(error, RateLimitError):
+            breaker.record_failure()
+        breaker.release_probe()
+        raise LLMUnavailable(
+            f"{model} 호출 실패: {type(error).__name__}",
+            retry_after=breaker.retry_after() if breaker.snapshot()["state"] == CircuitBreaker.OPEN else None,
+        ) from error
+    _count("retries")
+    logger.warning("OpenAI 호출 재시도 (%s, %d회): %s - %.1f초 후", model, attempt + 1, type(error).__name__, delay)
+    return delay
+
+
+# once(remaining_seconds) 를 마감 시간/재시도/차단기 정책으로 실행 (시도는 한 번에 하나씩, 헤지 없음)
+# trace(dict) 를 넘기면 재시도 횟수를 trace["retries"] 에 기록
+def call_with_resilience(model, once, timeout, on_rate_limited, trace=None):
+    breaker = get_breaker(model)
+    breaker.before_call()
+    deadline = Deadline(timeout)
+    _count("calls")
+    for attempt in range(_max_retries() + 1):
+        if trace is not None:
+            trace["retries"] = attempt
+        try:
+            result = once(deadline.remaining())
+        except RETRYABLE_ERRORS as e:
+            delay = _handle_retryable(model, breaker, attempt, e, deadline, on_rate_limited)
+            if not isinstance(e, RateLimitError):
+                time.sleep(delay)
+            continue
+        except Exception:
+            breaker.release_probe()
+            raise
+        breaker.record_success()
+        return result
+
+
+# 비동기 버전 (헤지 포함, 스트리밍은 hedge=False)
+async def acall_with_resilience(model, once, timeout, on_rate_limited, hedge=True, trace=None):
+    breaker = get_breaker(model)
+    breaker.before_call()
+    deadline = Deadline(timeout)
+    _count("calls")
+    for attempt in range(_max_retries() + 1):
+        if trace is not None:
+            trace["retries"] = attempt
+        try:
+            result = await _ahedged(once, deadline, hedge)
+        except RETRYABLE_ERRORS as e:
+            # 429 처리(on_rate_limited)는 호출 한도 상태 파일을 잠그고 갱신하므로 스레드에서 실행
+            delay = await sync_to_async(_handle_retryable, thread_sensitive=False)(model, breaker, attempt, e, deadline, on_rate_limited)
+            if not isinstance(e, RateLimitError):
+                await asyncio.sleep(delay)
+            continue
+        except Exception:
+            breaker.release_probe()
+            raise
+        breaker.record_success()
+        return result
@@ -0,0 +1,111 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import LLMCallLog
+
+# OpenAI 호출 사용량/지연 집계 (LLMCallLog)
+#   python manage.py llm_usage_report                          # 최근 7일, 호출 위치별
+#   python manage.py llm_usage_report --by user day --days 30  # 사용자 × 날짜별
+#   python manage.py llm_usage_report --by endpoint --json     # JSON 출력
+#
+# - 그룹별 호출 수, 결과별 건수, 재시도 수, 토큰 합계(입력/출력/프롬프트 캐시), 지연 p50/p95
+# - 백분위수는 DB 에 상관없이 같은 결과가 나오도록 그룹 정렬 순서대로 읽으면서 그룹 하나씩 계산
+#   (한 번에 한 그룹의 지연 값만 메모리에 둠)
+
+GROUP_FIELDS = {
+    "user": "user_id",
+    "endpoint": "endpoint",
+    "model": "model",
+}
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _summarize(key, rows):
+    latencies = sorted(r["latency_ms"] for r in rows if r["outcome"] != LLMCallLog.OUTCOME_CACHED)
+    outcomes = {}
+    for r in rows:
+        outcomes[r["outcome"]] = outcomes.get(r["outcome"], 0) + 1
+    return {
+        **key,
+        "calls": len(rows),
+        "outcomes": outcomes,
+        "retries": sum(r["retries"] for r in rows),
+        "prompt_tokens": sum(r["prompt_tokens"] for r in rows),
+        "completion_tokens": sum(r["completion_tokens"] for r in rows),
+        "cached_tokens": sum(r["cached_tokens"] for r in rows),
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+    }
+
+
+class Command(BaseCommand):
+    help = "OpenAI 호출 사용량(토큰)과 지연(p50/p95)을 사용자/호출 위치/날짜별로 집계합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7, help="최근 며칠 (기본 7)")
+        parser.add_argument(
+            "--by", nargs="+", default=["endpoint"], choices=[*GROUP_FIELDS, "day"],
+            help="집계 기준 (user, endpoint, model, day 조합, 기본 endpoint)",
+        )
+        parser.add_argument("--user", type=int, help="이 사용자(pk)만")
+        parser.add_argument("--json", action="store_true", help="JSON 으로 출력")
+
+    def handle(self, *args, **options):
+        group_by = list(dict.fromkeys(options["by"]))
+        since = timezone.now() - timedelta(days=max(1, options["days"]))
+        queryset = LLMCallLog.objects.filter(created_at__gte=since)
+        if options["user"] is not None:
+            queryset = queryset.filter(user_id=options["user"])
+
+        # 날짜는 현지 시간 기준으로 파이썬에서 계산 (created_at 순으로 읽으면 같은 날짜가 연속됨)
+        columns = [GROUP_FIELDS[g] for g in group_by if g != "day"]
+        rows = queryset.order_by(*columns, "created_at").values(
+            *columns, "created_at", "outcome", "latency_ms", "retries",
+            "prompt_tokens", "completion_tokens", "cached_tokens",
+        ).iterator(chunk_size=2000)
+
+        report = []
+        current_key, current_rows = None, []
+        for row in rows:
+            key = {}
+            for g in group_by:
+                key[g] = timezone.localtime(row["created_at"]).date().isoformat() if g == "day" else row[GROUP_FIELDS[g]]
+            if key != current_key and current_rows:
+                report.append(_summarize(current_key, current_rows))
+                current_rows = []
+            current_key = key
+            current_rows.append(row)
+        if current_rows:
+            report.append(_summarize(current_key, current_rows))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+        self.write_table(group_by, report, options["days"])
+
+    def write_table(self, group_by, report, days):
+        self.stdout.write(f"최근 {days}일 OpenAI 호출 ({', '.join(group_by)} 별)")
+        if not report:
+            self.stdout.write("  기록 없음")
+            return
+        header = [*group_by, "calls", "ok", "cached", "failed", "retries", "prompt", "completion", "cached_tok", "p50_ms", "p95_ms"]
+        lines = [header]
+        for item in report:
+            failed = item["calls"] - item["outcomes"].get("ok", 0) - item["outcomes"].get("cached", 0)
+            lines.append([
+                *(str(item[g]) for g in group_by),
+                item["calls"], item["outcomes"].get("ok", 0), item["outcomes"].get("cached", 0), failed, item["retries"],
+                item["prompt_tokens"], item["completion_tokens"], item["cached_tokens"], item["p50_ms"], item["p95_ms"],
+            ])
+        widths = [max(len(str(line[i])) for line in lines) for i in range(len(header))]
+        for line in lines:
+            self.stdout.write("  " + "  ".join(str(v).rjust(w) for v, w in zip(line, widths)))
@@ -0,0 +1,164 @@
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import AnalysisCache, AnalysisJob, Document, LLMCallLog, RefreshTokenStore
+
+# 주기 실행용 정리 작업 (cron 등)
+#   python manage.py maintenance                 # 만료 토큰 삭제 + 고아 미디어 파일 삭제 + 오래된 OpenAI 호출 기록 삭제 + 멈춘 분석 작업 실패 처리
+#   python manage.py maintenance --dry-run       # 삭제 대상과 회수 용량만 출력
+#
+# - 만료된 refresh token 은 batch 단위로 나눠 삭제 (한 번에 큰 DELETE 로 테이블을 오래 잠그지 않음)
+# - media/documents, media/summaries 를 scandir 로 순회하며 batch 단위로 DB 참조 여부를 확인
+#   (Document 의 file, summary_file 과 AnalysisCache 의 file 어디에서도 참조하지 않는 파일만 삭제)
+# - 업로드 직후 DB 행이 커밋되기 전의 파일을 지우지 않도록 최근 수정 파일(--grace-hours)은 제외
+# - OpenAI 호출 기록(LLMCallLog)은 LLM_CALL_LOG_RETENTION_DAYS 일이 지난 것만 batch 단위로 삭제
+# - 분석 작업은 프로세스 안의 워커 풀에서 돌기 때문에 배포/재시작 시 진행 중이던 작업이 사라짐
+#   → ANALYSIS_JOB_TIMEOUT_MINUTES 분이 지나도 끝나지 않은 작업(queued/extracting/...)은 실패로 표시해 클라이언트 폴링이 끝나게 함
+
+MEDIA_DIRS = ("documents", "summaries")
+STALE_JOB_ERROR = "분석이 제한 시간 안에 끝나지 않았습니다. 문서를 다시 업로드해주세요."
+
+
+def _format_bytes(size):
+    if size < 1024:
+        return f"{size}B"
+    for unit in ("KB", "MB", "GB"):
+        size /= 1024
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f}{unit}"
+
+
+# 디렉터리 하위 파일을 (저장소 기준 이름, DirEntry) 로 하나씩 반환 (전체 목록을 메모리에 올리지 않음)
+def iter_files(root, relative):
+    path = os.path.join(root, relative)
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue  # .gitkeep 등 숨김 파일은 대상 아님
+                name = f"{relative}/{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    yield from iter_files(root, name)
+                elif entry.is_file(follow_symlinks=False):
+                    yield name, entry
+    except FileNotFoundError:
+        return
+
+
+# 이름 목록 중 DB 에서 참조하는 이름 집합
+def referenced_names(names):
+    referenced = set()
+    rows = Document.objects.filter(Q(file__in=names) | Q(summary_file__in=names)).values_list("file", "summary_file")
+    for file_name, summary_name in rows:
+        referenced.add(file_name)
+        referenced.add(summary_name)
+    referenced.update(AnalysisCache.objects.filter(file__in=names).values_list("file", flat=True))
+    return referenced
+
+
+class Command(BaseCommand):
+    help = "만료된 refresh token 과 어떤 문서도 참조하지 않는 미디어 파일을 정리합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="삭제하지 않고 대상만 보고")
+        parser.add_argument("--batch-size", type=int, default=500, help="토큰 삭제 / 파일 참조 확인 단위 (기본 500)")
+        parser.add_argument("--grace-hours", type=float, default=24, help="이 시간 안에 수정된 파일은 건너뜀 (기본 24)")
+        parser.add_argument("--skip-tokens", action="store_true", help="토큰 정리 생략")
+        parser.add_argument("--skip-media", action="store_true", help="미디어 정리 생략")
+        parser.add_argument("--skip-llm-logs", action="store_true", help="OpenAI 호출 기록 정리 생략")
+        parser.add_argument("--skip-jobs", action="store_true", help="멈춘 분석 작업 실패 처리 생략")
+        parser.add_argument("--verbose-files", action="store_true", help="삭제(대상) 파일 이름 출력")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        dry_run = options["dry_run"]
+
+        if not options["skip_tokens"]:
+            self.prune_tokens(batch_size, dry_run)
+        if not options["skip_media"]:
+            self.collect_media(batch_size, options["grace_hours"], dry_run, options["verbose_files"])
+        if not options["skip_llm_logs"]:
+            self.prune_llm_logs(batch_size, dry_run)
+        if not options["skip_jobs"]:
+            self.fail_stale_jobs(dry_run)
+
+    def prune_tokens(self, batch_size, dry_run):
+        if dry_run:
+            count = RefreshTokenStore.objects.filter(expires_at__lt=timezone.now()).count()
+            self.stdout.write(f"[tokens] 만료 토큰 {count}개 (dry-run, 삭제하지 않음)")
+            return
+        count = RefreshTokenStore.objects.prune_expired(batch_size=batch_size)
+        self.stdout.write(f"[tokens] 만료 토큰 {count}개 삭제")
+
+    def prune_llm_logs(self, batch_size, dry_run):
+        days = getattr(settings, "LLM_CALL_LOG_RETENTION_DAYS", 90)
+        cutoff = timezone.now() - timedelta(days=days)
+        if dry_run:
+            count = LLMCallLog.objects.filter(created_at__lt=cutoff).count()
+            self.stdout.write(f"[llm-logs] {days}일 지난 호출 기록 {count}개 (dry-run, 삭제하지 않음)")
+            return
+        count = LLMCallLog.objects.prune_before(cutoff, batch_size=batch_size)
+        self.stdout.write(f"[llm-logs] {days}일 지난 호출 기록 {count}개 삭제")
+
+    def fail_stale_jobs(self, dry_run):
+        minutes = getattr(settings, "ANALYSIS_JOB_TIMEOUT_MINUTES", 30)
+        cutoff = timezone.now() - timedelta(minutes=minutes)
+        if dry_run:
+            count = AnalysisJob.objects.stale(cutoff).count()
+            self.stdout.write(f"[jobs] {minutes}분 넘게 끝나지 않은 분석 작업 {count}개 (dry-run, 변경하지 않음)")
+            return
+        count = AnalysisJob.objects.fail_stale(cutoff, STALE_JOB_ERROR)
+        self.stdout.write(f"[jobs] {minutes}분 넘게 끝나지 않은 분석 작업 {count}개 실패 처리")
+
+    def collect_media(self, batch_size, grace_hours, dry_run, verbose):
+        try:
+            root = default_storage.path("")
+        except NotImplementedError:
+            raise CommandError("로컬 파일 시스템 저장소에서만 미디어 정리를 지원합니다.")
+
+        cutoff = time.time() - grace_hours * 3600
+        stats = {"scanned": 0, "recent": 0, "orphaned": 0, "bytes": 0}
+
+        def flush(batch):
+            referenced = referenced_names([name for name, _ in batch])
+            for name, entry in batch:
+                if name in referenced:
+                    continue
+                size = entry.stat().st_size
+                if verbose:
+                    self.stdout.write(f"  {'(dry-run) ' if dry_run else ''}{name} ({_format_bytes(size)})")
+                if not dry_run:
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        continue
+                stats["orphaned"] += 1
+                stats["bytes"] += size
+
+        for directory in MEDIA_DIRS:
+            batch = []
+            for name, entry in iter_files(root, directory):
+                stats["scanned"] += 1
+                if entry.stat().st_mtime > cutoff:
+                    stats["recent"] += 1
+                    continue
+                batch.append((name, entry))
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+            if batch:
+                flush(batch)
+
+        action = "삭제 대상" if dry_run else "삭제"
+        self.stdout.write(
+            f"[media] 파일 {stats['scanned']}개 확인, 최근 파일 {stats['recent']}개 제외, "
+            f"고아 파일 {stats['orphaned']}개 {action}, 회수 용량 {_format_bytes(stats['bytes'])}"
+            + (" (dry-run)" if dry_run else "")
+        )
@@ -0,0 +1,153 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# 요청/단계별 소요 시간과 SQL 쿼리 수 측정 (Prometheus 텍스트 형식으로 /metrics 에서 노출)
+# - core.middleware.RequestMetricsMiddleware 가 요청마다 측정 상태를 열고 닫음 (WSGI/ASGI 모두)
+# - 코드 안에서는 with stage("llm"): ... 로 구간을 측정 → 요청 중이면 해당 뷰 이름으로, 요청 밖(백그라운드)이면 view 인자로 기록
+# - SQL 은 모든 DB 연결에 붙는 execute_wrapper 가 세며, sync_to_async 스레드에서 실행된 쿼리도 같은 요청으로 집계됨
+# - 값은 프로세스 메모리에 누적 (워커 프로세스마다 따로 수집됨)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+HELP = {
+    "http_request_duration_seconds": "요청 처리 시간 (스트리밍 응답은 첫 응답까지)",
+    "http_request_sql_queries": "요청당 SQL 쿼리 수",
+    "http_request_sql_duration_seconds": "요청당 SQL 실행 시간 합계",
+    "app_stage_duration_seconds": "뷰/작업 단계별 소요 시간",
+    "llm_call_duration_seconds": "OpenAI 호출 소요 시간 (한도 대기와 재시도 포함)",
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.series = {}  # labels(tuple) → [버킷별 개수..., +Inf 개수, 합계]
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self.lock:
+            return [(labels, list(series)) for labels, series in self.series.items()]
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def _histogram(name, buckets):
+    with _histograms_lock:
+        if name not in _histograms:
+            _histograms[name] = Histogram(buckets)
+        return _histograms[name]
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    _histogram(name, buckets).observe(tuple(sorted(labels.items())), value)
+
+
+# 요청 하나의 측정 상태 (미들웨어가 설정, 요청이 끝나면 뷰 이름으로 한꺼번에 기록)
+_request = contextvars.ContextVar("request_metrics", default=None)
+
+
+def begin_request():
+    state = {"queries": 0, "sql_seconds": 0.0, "stages": []}
+    return _request.set(state), state
+
+
+def end_request(token, state, view, method, status, seconds):
+    _request.reset(token)
+    observe("http_request_duration_seconds", seconds, view=view, method=method, status=str(status))
+    observe("http_request_sql_queries", state["queries"], buckets=QUERY_BUCKETS, view=view)
+    observe("http_request_sql_duration_seconds", state["sql_seconds"], view=view)
+    for name, elapsed in state["stages"]:
+        observe("app_stage_duration_seconds", elapsed, view=view, stage=name)
+
+
+def in_request():
+    return _request.get() is not None
+
+
+def record_stage(name, seconds, view=None):
+    state = _request.get()
+    if state is not None and view is None:
+        state["stages"].append((name, seconds))
+    else:
+        observe("app_stage_duration_seconds", seconds, view=view or "background", stage=name)
+
+
+# with stage("history_query"): ... → 구간 소요 시간 기록
+@contextmanager
+def stage(name, view=None):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started, view)
+
+
+# DB 연결마다 붙는 execute_wrapper: 요청 중이면 쿼리 수/시간 누적
+def count_queries(execute, sql, params, many, context):
+    state = _request.get()
+    if state is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        state["queries"] += 1
+        state["sql_seconds"] += time.perf_counter() - started
+
+
+def install_query_counter(sender, connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# 수집한 히스토그램 + 추가 게이지/카운터를 Prometheus 텍스트 형식으로
+# extra: [(이름, 종류, 설명, [(labels dict, 값), ...]), ...]
+def render_prometheus(extra=()):
+    lines = []
+    with _histograms_lock:
+        histograms = sorted(_histograms.items())
+    for name, histogram in histograms:
+        lines.append(f"# HELP {name} {HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, series in sorted(histogram.samples()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, series):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_value(float(bound))))} {cumulative}")
+            cumulative += series[len(histogram.buckets)]
+            lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(series[-1])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+    for name, kind, help_text, samples in extra:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
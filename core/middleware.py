@@ -0,0 +1,46 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .metrics import begin_request, end_request
+
+
+def _view_name(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match is not None else "unmatched"  # URL 별 값이 아닌 뷰 이름 단위로 집계
+
+
+# 요청별 처리 시간, SQL 쿼리 수/시간, 단계별 시간 기록 (core.metrics)
+# 동기/비동기 모두 지원 - ASGI 에서 비동기 뷰(consult-async)를 동기 스레드로 감싸지 않도록 함
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token, state = begin_request()
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            end_request(token, state, _view_name(request), request.method, status, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        token, state = begin_request()
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            end_request(token, state, _view_name(request), request.method, status, time.perf_counter() - started)
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.23 on 2026-10-18 01:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_document_page_offsets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('analysis_version', models.CharField(max_length=32)),
+                ('file', models.FileField(upload_to='documents/')),
+                ('extracted_text', models.TextField()),
+                ('page_offsets', models.JSONField(blank=True, default=list)),
+                ('summary_json', models.TextField()),
+                ('summary_file', models.FileField(blank=True, null=True, upload_to='summaries/')),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='analysisjob',
+            name='cache_hit',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='analysiscache',
+            constraint=models.UniqueConstraint(fields=('content_hash', 'analysis_version'), name='uq_analysis_cache_key'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='analysis',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='documents', to='core.analysiscache'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.23 on 2026-10-18 01:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_analysiscache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClauseAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('title', models.CharField(blank=True, default='', max_length=255)),
+                ('category', models.CharField(blank=True, default='', max_length=100)),
+                ('risk', models.CharField(choices=[('low', 'Low'), ('mid', 'Mid'), ('high', 'High')], default='low', max_length=4)),
+                ('types', models.JSONField(blank=True, default=list)),
+                ('is_main', models.BooleanField(default=False)),
+                ('is_toxin', models.BooleanField(default=False)),
+                ('is_ambi', models.BooleanField(default=False)),
+                ('sentence', models.TextField(blank=True, default='')),
+                ('law', models.CharField(blank=True, default='', max_length=255)),
+                ('description', models.TextField(blank=True, default='')),
+                ('recommend', models.TextField(blank=True, default='')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='clauses', to='core.document')),
+            ],
+            options={
+                'ordering': ['document', 'position'],
+                'indexes': [models.Index(fields=['document', 'risk'], name='core_clause_doc_risk_idx'), models.Index(fields=['document', 'is_toxin', 'risk'], name='core_clause_doc_toxin_idx'), models.Index(fields=['risk', 'is_toxin'], name='core_clause_risk_toxin_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.23 on 2026-10-18 02:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_clauseanalysis'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentRetrievalIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now=True)),
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='retrieval_index', to='core.document')),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+from django.db.models import F
+
+
+# updated_at 이 비어 있는 기존 문서는 생성 시각으로 채운 뒤 NOT NULL(auto_now) 로 변경
+def backfill_updated_at(apps, schema_editor):
+    Document = apps.get_model('core', 'Document')
+    Document.objects.filter(updated_at__isnull=True).update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_chatsummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='document',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['user', 'updated_at', 'created_at'], name='core_doc_user_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+import hashlib
+
+from django.db import migrations, models
+
+
+# 기존 토큰 원문 → SHA-256 다이제스트
+def hash_existing_tokens(apps, schema_editor):
+    RefreshTokenStore = apps.get_model('core', 'RefreshTokenStore')
+    for row in RefreshTokenStore.objects.only('id', 'token').iterator():
+        digest = hashlib.sha256(row.token.encode('utf-8')).hexdigest()
+        RefreshTokenStore.objects.filter(pk=row.pk).update(token_hash=digest)
+
+
+# 되돌릴 때는 원문을 복구할 수 없으므로 저장된 토큰을 모두 삭제 (재로그인 필요)
+def clear_tokens(apps, schema_editor):
+    apps.get_model('core', 'RefreshTokenStore').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_document_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='refreshtokenstore',
+            name='token_hash',
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.RunPython(hash_existing_tokens, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='refreshtokenstore',
+            name='token',
+        ),
+        migrations.AlterField(
+            model_name='refreshtokenstore',
+            name='token_hash',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, clear_tokens),
+    ]
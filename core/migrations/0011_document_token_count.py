@@ -0,0 +1,18 @@
+# Generated by Django 4.2.23 on 2026-10-18 02:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_refreshtokenstore_token_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='token_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
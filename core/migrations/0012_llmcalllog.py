@@ -0,0 +1,34 @@
+# Generated by Django 4.2.23 on 2026-10-18 02:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_document_token_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMCallLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=32)),
+                ('model', models.CharField(max_length=32)),
+                ('outcome', models.CharField(choices=[('ok', 'OK'), ('cached', 'Cached'), ('unavailable', 'Unavailable'), ('error', 'Error'), ('aborted', 'Aborted')], max_length=12)),
+                ('prompt_tokens', models.PositiveIntegerField(default=0)),
+                ('completion_tokens', models.PositiveIntegerField(default=0)),
+                ('cached_tokens', models.PositiveIntegerField(default=0)),
+                ('latency_ms', models.PositiveIntegerField(default=0)),
+                ('retries', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='core_llmlog_created_idx'), models.Index(fields=['user', 'created_at'], name='core_llmlog_user_idx'), models.Index(fields=['endpoint', 'created_at'], name='core_llmlog_endpoint_idx')],
+            },
+        ),
+    ]
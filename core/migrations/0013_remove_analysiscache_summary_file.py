@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-18 03:09
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_llmcalllog'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='analysiscache',
+            name='summary_file',
+        ),
+    ]
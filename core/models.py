@@ -1,3 +1,5 @@
+import hashlib
+
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
@@ -36,6 +38,31 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.user_id
 
 
+# 동일 파일(SHA-256) + 동일 분석 버전(프롬프트/모델)에 대한 분석 결과 캐시
+# 원본 PDF 파일은 이 행이 가리키는 저장소 파일 하나를 여러 Document 가 공유함
+# (요약본 PDF 는 제목이 문서마다 달라 Document.summary_file 에만 저장)
+class AnalysisCache(models.Model):
+    content_hash = models.CharField(max_length=64)                                  # 원본 파일 SHA-256 (hex)
+    analysis_version = models.CharField(max_length=32)                              # 프롬프트/모델 버전 해시
+
+    file = models.FileField(upload_to='documents/')                                 # 공유 원본 PDF
+    extracted_text = models.TextField()                                             # 추출된 원문 텍스트
+    page_offsets = models.JSONField(default=list, blank=True)                       # 페이지별 시작 위치
+    summary_json = models.TextField()                                               # 모델이 반환한 JSON 배열 원문
+
+    hit_count = models.PositiveIntegerField(default=0)                              # 재사용 횟수
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_hash', 'analysis_version'], name='uq_analysis_cache_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.analysis_version})"
+
+
 # 문서 모델
 class Document(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)     # 문서 주인
@@ -45,10 +72,20 @@ class Document(models.Model):
     chat_name = models.CharField(max_length=255)                 # 채팅방 이름
 
     extracted_text = models.TextField()                          # 추출된 원문 텍스트
+    page_offsets = models.JSONField(default=list, blank=True)    # 페이지별 시작 위치(extracted_text 문자 오프셋)
+    token_count = models.PositiveIntegerField(null=True, blank=True)  # 원문 토큰 수 (분석 시 core.tokens 로 계산, 이전 문서는 NULL)
     summary_file = models.FileField(upload_to='summaries/', blank=True, null=True)                        # 요약된 파일
 
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)               # 원본 파일 SHA-256
+    analysis = models.ForeignKey(AnalysisCache, on_delete=models.SET_NULL, null=True, blank=True, related_name='documents')  # 재사용한 분석 결과
+
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)                 # 생성/이름 변경 시각 (목록 정렬 기준)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'updated_at', 'created_at'], name='core_doc_user_updated_idx'),  # 문서 목록 키셋 페이지네이션
+        ]
 
     def __str__(self):
         return f"{self.file_name or 'Unnamed'} - {self.user.user_id}"
@@ -66,24 +103,193 @@ class ChatLog(models.Model):
     message = models.TextField(null=True, blank=True)                   # 메시지 내용
     created_at = models.DateTimeField(auto_now_add=True)                # 대화 시각
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['document', 'id'], name='core_chatlog_doc_id_idx'),  # 문서별 최근 N개 / id 범위 조회
+        ]
+
     def __str__(self):
         return f"{self.sender}: {self.message[:30]}"
-    
+
+
+# 문서별 대화 요약 - 최근 대화 창(window) 밖으로 밀려난 오래된 대화를 누적 요약
+class ChatSummary(models.Model):
+    document = models.OneToOneField(Document, on_delete=models.CASCADE, related_name='chat_summary')
+    summary = models.TextField(blank=True, default='')              # 누적 요약문
+    last_chat_id = models.BigIntegerField(default=0)                 # 요약에 반영된 마지막 ChatLog id
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"[{self.document_id}] summary ~#{self.last_chat_id}"
+
+
+# 문서별 검색 인덱스 (채팅 시 질문과 관련된 구절만 골라 보내기 위한 BM25 통계)
+class DocumentRetrievalIndex(models.Model):
+    document = models.OneToOneField(Document, on_delete=models.CASCADE, related_name='retrieval_index')
+    data = models.JSONField(default=dict)           # 구절 목록, 구절별 단어 빈도, 문서 빈도 등
+    created_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"[{self.document_id}] index"
+
+
+# 조항별 분석 결과 (LLM 응답 JSON 배열의 각 항목) - 요약본/하이라이트/통계를 LLM 재호출 없이 재구성하는 데 사용
+class ClauseAnalysis(models.Model):
+    RISK_CHOICES = [('low', 'Low'), ('mid', 'Mid'), ('high', 'High')]
+
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='clauses')   # 분석 대상 문서
+    position = models.PositiveIntegerField()                            # 응답 내 순서
+
+    title = models.CharField(max_length=255, blank=True, default='')    # 조항 제목
+    category = models.CharField(max_length=100, blank=True, default='') # 상위 분류
+    risk = models.CharField(max_length=4, choices=RISK_CHOICES, default='low')   # 위험도
+    types = models.JSONField(default=list, blank=True)                  # ['main', 'toxin', 'ambi'] 중 1~3개
+    is_main = models.BooleanField(default=False)                        # types 조회용 플래그 (인덱스)
+    is_toxin = models.BooleanField(default=False)
+    is_ambi = models.BooleanField(default=False)
+
+    sentence = models.TextField(blank=True, default='')                 # 계약서 원문 문장
+    law = models.CharField(max_length=255, blank=True, default='')      # 관련 법령
+    description = models.TextField(blank=True, default='')              # 해설
+    recommend = models.TextField(blank=True, default='')                # 개선안
+
+    class Meta:
+        ordering = ['document', 'position']
+        indexes = [
+            models.Index(fields=['document', 'risk'], name='core_clause_doc_risk_idx'),
+            models.Index(fields=['document', 'is_toxin', 'risk'], name='core_clause_doc_toxin_idx'),
+            models.Index(fields=['risk', 'is_toxin'], name='core_clause_risk_toxin_idx'),
+        ]
+
+    # LLM 응답 항목(dict) → 모델 인스턴스
+    @classmethod
+    def from_item(cls, document, position, item):
+        types = [t for t in (item.get("types") or []) if isinstance(t, str)]
+        risk = str(item.get("risk") or "low").lower()
+        if risk not in ("low", "mid", "high"):
+            risk = "low"
+        return cls(
+            document=document,
+            position=position,
+            title=str(item.get("title") or "")[:255],
+            category=str(item.get("category") or "")[:100],
+            risk=risk,
+            types=types,
+            is_main="main" in types,
+            is_toxin="toxin" in types,
+            is_ambi="ambi" in types,
+            sentence=item.get("sentence") or "",
+            law=str(item.get("law") or "")[:255],
+            description=item.get("description") or "",
+            recommend=item.get("recommend") or "",
+        )
+
+    # 모델 인스턴스 → LLM 응답과 같은 형태의 dict (build_summary_context 입력)
+    def as_item(self):
+        return {
+            "title": self.title,
+            "category": self.category,
+            "risk": self.risk,
+            "types": self.types,
+            "sentence": self.sentence,
+            "law": self.law or "-",
+            "description": self.description or "-",
+            "recommend": self.recommend or "-",
+        }
+
+    def __str__(self):
+        return f"[{self.document_id}#{self.position}] {self.title} ({self.risk})"
+
+
+# 문서 분석(텍스트 추출 → 요약 → 요약본 렌더링) 백그라운드 작업 모델
+class AnalysisJobManager(models.Manager):
+    def stale(self, cutoff):                                            # cutoff 이전에 시작(시작 전이면 접수)된 채 끝나지 않은 작업
+        return self.filter(status__in=AnalysisJob.ACTIVE_STATUSES).filter(
+            models.Q(started_at__lt=cutoff) | models.Q(started_at__isnull=True, created_at__lt=cutoff)
+        )
+
+    def fail_stale(self, cutoff, error):                               # 멈춘 작업을 실패 처리 (건수 반환)
+        return self.stale(cutoff).update(status=AnalysisJob.STATUS_FAILED, error=error, finished_at=timezone.now())
+
+
+class AnalysisJob(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_EXTRACTING = 'extracting'
+    STATUS_SUMMARIZING = 'summarizing'
+    STATUS_RENDERING = 'rendering'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_EXTRACTING, 'Extracting'),
+        (STATUS_SUMMARIZING, 'Summarizing'),
+        (STATUS_RENDERING, 'Rendering'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_EXTRACTING, STATUS_SUMMARIZING, STATUS_RENDERING)   # 워커가 처리 중(대기 중)인 상태
+
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='analysis_jobs')    # 분석 대상 문서
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)          # 현재 단계
+    stage_timings = models.JSONField(default=dict, blank=True)                                        # 단계별 시작 시각/소요 시간(ms)
+    error = models.TextField(blank=True, default='')                                                  # 실패 사유
+    cache_hit = models.BooleanField(default=False)                                                    # 분석 캐시 재사용 여부
+
+    created_at = models.DateTimeField(auto_now_add=True)                # 작업 접수 시각
+    started_at = models.DateTimeField(null=True, blank=True)            # 워커가 처리를 시작한 시각
+    finished_at = models.DateTimeField(null=True, blank=True)           # 완료/실패 시각
+
+    objects = AnalysisJobManager()
+
+    class Meta:
+        ordering = ['-id']
+
+    def __str__(self):
+        return f"[{self.document_id}] {self.status}"
+
+# refresh token 원문 대신 저장/조회에 쓰는 고정 길이 다이제스트 (SHA-256 hex, 64자)
+def hash_token(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
 class RefreshTokenStoreManager(models.Manager):
-    def prune_expired(self):                                            # 만료 토큰 일괄 삭제
-        return self.filter(expires_at__lt=timezone.now()).delete()
+    def prune_expired(self, batch_size=None):                          # 만료 토큰 삭제 (batch_size 지정 시 나눠서 삭제, 삭제 건수 반환)
+        expired = self.filter(expires_at__lt=timezone.now())
+        if not batch_size:
+            return expired.delete()[0]
+        total = 0
+        while True:
+            ids = list(expired.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return total
+            total += self.filter(id__in=ids).delete()[0]
 
     def replace_for_user(self, user, token, expires_at):                # 사용자 1개 정책: 있으면 갱신, 없으면 생성
         
         return self.update_or_create(
             user=user,
             defaults={
-                "token": token,
+                "token_hash": hash_token(token),
                 "expires_at": expires_at,
                 "revoked": False,
             }
         )
 
+    def rotate(self, old_token, new_token, expires_at):                 # 저장된 유효 토큰이면 새 토큰으로 교체 (조건부 UPDATE 1회)
+        return self.filter(
+            token_hash=hash_token(old_token),
+            revoked=False,
+            expires_at__gt=timezone.now(),
+        ).update(
+            token_hash=hash_token(new_token),
+            expires_at=expires_at,
+            created_at=timezone.now(),
+        ) == 1
+
+    def revoke(self, token):                                            # 로그아웃: 해당 토큰 행 삭제
+        return self.filter(token_hash=hash_token(token)).delete()
+
 class RefreshTokenStore(models.Model): # 어떤 유저의 토큰인지 연결 (1:N 관계)
     user = models.ForeignKey(
         User,
@@ -91,7 +297,7 @@ class RefreshTokenStore(models.Model): # 어떤 유저의 토큰인지 연결 (1
         related_name="refresh_tokens"
     )
 
-    token = models.CharField(max_length=512, unique=True) # 저장된 refresh token 문자열 (JWT 토큰 전체를 저장)
+    token_hash = models.CharField(max_length=64, unique=True) # 저장된 refresh token 의 SHA-256 (hex) - 원문은 저장하지 않음
     created_at = models.DateTimeField(auto_now_add=True) # 토큰이 발급된 시각
     expires_at = models.DateTimeField() # 토큰이 만료되는 시각 (JWT의 exp 클레임과 동일하게 설정)
     revoked = models.BooleanField(default=False,) # 로그아웃 또는 강제 만료 처리된 경우 표시
@@ -116,4 +322,54 @@ class RefreshTokenStore(models.Model): # 어떤 유저의 토큰인지 연결 (1
         return timezone.now() >= self.expires_at    # 현재 시간이 만료시간을 지난 경우 True 반환
 
     def __str__(self):
-        return f"[{self.user.user_id}] refresh @ {self.created_at.strftime('%Y-%m-%d %H:%M:%S')}"
\ No newline at end of file
+        return f"[{self.user.user_id}] refresh @ {self.created_at.strftime('%Y-%m-%d %H:%M:%S')}"
+
+class LLMCallLogManager(models.Manager):
+    def prune_before(self, cutoff, batch_size=500):                     # cutoff 이전 기록을 나눠서 삭제 (삭제 건수 반환)
+        old = self.filter(created_at__lt=cutoff)
+        total = 0
+        while True:
+            ids = list(old.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return total
+            total += self.filter(id__in=ids).delete()[0]
+
+
+# OpenAI 호출 1건당 사용량/지연 기록 (추가만 하는 로그, 집계는 manage.py llm_usage_report, 정리는 manage.py maintenance)
+class LLMCallLog(models.Model):
+    OUTCOME_OK = 'ok'
+    OUTCOME_CACHED = 'cached'            # 응답 캐시 적중 (호출 없음)
+    OUTCOME_UNAVAILABLE = 'unavailable'  # 회로 차단, 재시도/마감 시간 소진, 호출 한도 대기 초과
+    OUTCOME_ERROR = 'error'
+    OUTCOME_ABORTED = 'aborted'          # 스트리밍 도중 클라이언트 연결 종료
+
+    OUTCOME_CHOICES = [
+        (OUTCOME_OK, 'OK'),
+        (OUTCOME_CACHED, 'Cached'),
+        (OUTCOME_UNAVAILABLE, 'Unavailable'),
+        (OUTCOME_ERROR, 'Error'),
+        (OUTCOME_ABORTED, 'Aborted'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, db_constraint=False, related_name='+')  # 호출을 일으킨 사용자
+    endpoint = models.CharField(max_length=32)                                       # 호출 위치 (chat, chat_stream, summary, chat_summary ...)
+    model = models.CharField(max_length=32)
+    outcome = models.CharField(max_length=12, choices=OUTCOME_CHOICES)
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    completion_tokens = models.PositiveIntegerField(default=0)
+    cached_tokens = models.PositiveIntegerField(default=0)                           # OpenAI 프롬프트 캐시 적중 토큰
+    latency_ms = models.PositiveIntegerField(default=0)                              # 한도 대기 + 재시도 포함 전체 소요 시간
+    retries = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = LLMCallLogManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='core_llmlog_created_idx'),
+            models.Index(fields=['user', 'created_at'], name='core_llmlog_user_idx'),
+            models.Index(fields=['endpoint', 'created_at'], name='core_llmlog_endpoint_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.endpoint} {self.model} {self.outcome} {self.latency_ms}ms"
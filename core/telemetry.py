@@ -0,0 +1,88 @@
+import logging
+import time
+
+from django.conf import settings
+
+from .metrics import in_request, observe, record_stage
+from .models import LLMCallLog
+
+logger = logging.getLogger(__name__)
+
+# OpenAI 호출 사용량/지연 기록 (core.llm 이 호출마다 LLMCallLog 한 행 추가)
+# - 기록 실패는 호출 결과에 영향을 주지 않음 (core.telemetry 로거에 예외만 남김)
+# - LLM_TELEMETRY_ENABLED=False 면 기록하지 않음
+# - 소요 시간은 /metrics 의 llm_call_duration_seconds 와 요청 단계("llm")에도 반영 (core.metrics)
+
+
+def _enabled():
+    return getattr(settings, "LLM_TELEMETRY_ENABLED", True)
+
+
+# 응답의 usage → 토큰 수 필드 (스트리밍은 마지막 조각의 usage)
+def usage_fields(usage):
+    if usage is None:
+        return {}
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+    }
+
+
+# 호출 1건의 기록 내용을 모으는 객체
+# call = LLMCall(model, endpoint, user_id) → 호출 → call.finish(outcome, usage) → record_llm_call(call)
+class LLMCall:
+    def __init__(self, model, endpoint=None, user_id=None):
+        self.model = model
+        self.endpoint = endpoint or "other"
+        self.user_id = user_id
+        self.started = time.monotonic()
+        self.trace = {"retries": 0}  # core.llm_resilience 가 재시도 횟수 기록
+        self.outcome = None
+        self.usage = {}
+        self.latency_ms = 0
+
+    def finish(self, outcome, usage=None):
+        self.outcome = outcome
+        self.usage = usage_fields(usage)
+        self.latency_ms = int((time.monotonic() - self.started) * 1000)
+        return self
+
+    def _row(self):
+        return LLMCallLog(
+            user_id=self.user_id,
+            endpoint=self.endpoint[:32],
+            model=self.model[:32],
+            outcome=self.outcome,
+            latency_ms=self.latency_ms,
+            retries=self.trace["retries"],
+            **self.usage,
+        )
+
+
+def _observe(call):
+    seconds = call.latency_ms / 1000
+    observe("llm_call_duration_seconds", seconds, endpoint=call.endpoint, model=call.model, outcome=call.outcome)
+    if in_request():  # 스트리밍 응답은 요청이 끝난 뒤에 완료되므로 호출 지표에만 반영
+        record_stage("llm", seconds)
+
+
+def record_llm_call(call):
+    _observe(call)
+    if not _enabled():
+        return
+    try:
+        call._row().save()
+    except Exception:
+        logger.exception("LLM 사용량 기록 실패")
+
+
+async def arecord_llm_call(call):
+    _observe(call)
+    if not _enabled():
+        return
+    try:
+        await call._row().asave()
+    except Exception:
+        logger.exception("LLM 사용량 기록 실패")
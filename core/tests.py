@@ -1,3 +1,407 @@
-from django.test import TestCase
+import asyncio
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from config.db_router import (
+    PRIMARY, REPLICA, PrimaryReplicaRouter, ReplicaRoutingMixin, is_pinned_to_primary, pin_to_primary,
+    read_from_primary, read_from_replica,
+)
+
+from . import llm
+from .llm_limiter import LLMRateLimited, _try_take, limited, penalize, settle
+from .llm_resilience import CircuitBreaker, LLMUnavailable, call_with_resilience, get_breaker
+from .models import LLMCallLog
+from .telemetry import LLMCall, record_llm_call
+from .tokens import MESSAGE_OVERHEAD, REPLY_OVERHEAD, ContextBudget, count_tokens, truncate_to_tokens
+
+
+# 모델 컨텍스트 예산 배분
+@override_settings(LLM_CONTEXT_TOKENS={"test-model": 200})
+class ContextBudgetTests(SimpleTestCase):
+    def test_answer_tokens_are_set_aside(self):
+        budget = ContextBudget("test-model", 50)
+        self.assertEqual(budget.total, 200 - 50 - REPLY_OVERHEAD)
+        self.assertEqual(budget.remaining, budget.total)
+
+    def test_reserve_counts_message_overhead(self):
+        budget = ContextBudget("test-model", 50)
+        tokens = budget.reserve("계약서 검토 도우미입니다.")
+        self.assertEqual(tokens, count_tokens("계약서 검토 도우미입니다.", "test-model") + MESSAGE_OVERHEAD)
+        self.assertEqual(budget.remaining, budget.total - tokens)
+
+    def test_take_never_exceeds_remaining_or_cap(self):
+        budget = ContextBudget("test-model", 50)
+        self.assertEqual(budget.take(40, cap=30), 30)
+        self.assertEqual(budget.take(1000), budget.total - 30)
+        self.assertEqual(budget.remaining, 0)
+        self.assertEqual(budget.take(10), 0)
+
+    def test_fit_recent_keeps_latest_messages_in_order(self):
+        budget = ContextBudget("test-model", 50)
+        messages = [{"role": "user", "content": "가" * 40} for _ in range(5)]
+        messages[-1] = {"role": "assistant", "content": "마지막"}
+        cost = count_tokens("가" * 40, "test-model") + MESSAGE_OVERHEAD
+        last = count_tokens("마지막", "test-model") + MESSAGE_OVERHEAD
+
+        kept = budget.fit_recent(messages, cap=last + cost * 2)
+        self.assertEqual(kept, messages[-3:])
+        self.assertEqual(budget.used, last + cost * 2)
+
+    def test_unknown_model_uses_default_window(self):
+        self.assertGreater(ContextBudget("unknown-model", 0).total, 0)
+
+    def test_truncate_to_tokens(self):
+        text = "계약 기간은 1년으로 한다. " * 20
+        truncated = truncate_to_tokens(text, 10)
+        self.assertTrue(text.startswith(truncated))
+        self.assertLessEqual(count_tokens(truncated), 10)
+        self.assertEqual(truncate_to_tokens("짧음", 10), "짧음")
+        self.assertEqual(truncate_to_tokens(text, 0), "")
+
+
+# 조회 API 용 뷰 (요청 처리 중 읽기 DB 를 응답으로 돌려줌)
+class RoutedView(ReplicaRoutingMixin, APIView):
+    permission_classes = []
+
+    def get(self, request):
+        return Response({"db": PrimaryReplicaRouter().db_for_read(None)})
+
+    def post(self, request):
+        return Response({"db": PrimaryReplicaRouter().db_for_read(None)})
+
+
+# 읽기 복제본 라우팅과 쓰기 직후 primary 고정 (워커 간 공유 캐시: 임시 디렉터리 파일 캐시)
+@mock.patch("config.db_router.replica_enabled", return_value=True)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        shared = {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": tmp.name}
+        override = override_settings(CACHES={**settings.CACHES, "shared": shared}, REPLICA_PIN_CACHE_ALIAS="shared")
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.router = PrimaryReplicaRouter()
+        self.factory = APIRequestFactory()
+        self.user = SimpleNamespace(pk=7, is_authenticated=True)
+
+    def request(self, method, **cookies):
+        request = getattr(self.factory, method)("/")
+        request.COOKIES.update(cookies)
+        force_authenticate(request, user=self.user)
+        return RoutedView.as_view()(request)
+
+    def test_reads_default_to_primary(self, _):
+        self.assertEqual(self.router.db_for_read(None), PRIMARY)
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(None), REPLICA)
+            self.assertEqual(self.router.db_for_write(None), PRIMARY)
+            with read_from_primary():
+                self.assertEqual(self.router.db_for_read(None), PRIMARY)
+            self.assertEqual(self.router.db_for_read(None), REPLICA)
+        self.assertEqual(self.router.db_for_read(None), PRIMARY)
+
+    def test_without_replica_everything_is_primary(self, enabled):
+        enabled.return_value = False
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(None), PRIMARY)
+        self.assertEqual(self.request("get").data["db"], PRIMARY)
+        self.assertNotIn("db_pin", self.request("post").cookies)
+
+    def test_migrations_only_on_primary(self, _):
+        self.assertTrue(self.router.allow_migrate(PRIMARY, "core"))
+        self.assertFalse(self.router.allow_migrate(REPLICA, "core"))
+
+    def test_get_reads_from_replica(self, _):
+        self.assertEqual(self.request("get").data["db"], REPLICA)
+        self.assertEqual(self.router.db_for_read(None), PRIMARY)  # 요청이 끝나면 원래대로
+
+    def test_write_pins_user_to_primary(self, _):
+        self.assertEqual(self.request("post").data["db"], PRIMARY)
+        self.assertTrue(is_pinned_to_primary(self.user.pk))
+        self.assertEqual(self.request("get").data["db"], PRIMARY)
+
+    def test_write_sets_short_lived_pin_cookie(self, _):
+        cookie = self.request("post").cookies["db_pin"]
+        self.assertEqual(cookie["max-age"], settings.REPLICA_PIN_SECONDS)
+        self.assertTrue(cookie["httponly"])
+
+        # 다른 워커(공유 캐시에 기록 없음)라도 쿠키가 오면 primary
+        caches["shared"].clear()
+        self.assertEqual(self.request("get").data["db"], REPLICA)
+        self.assertEqual(self.request("get", db_pin="1").data["db"], PRIMARY)
+
+    def test_process_local_cache_is_not_used(self, _):
+        with override_settings(REPLICA_PIN_CACHE_ALIAS="default"):
+            pin_to_primary(self.user.pk)
+            self.assertFalse(is_pinned_to_primary(self.user.pk))
+
+    def test_anonymous_user_is_never_pinned(self, _):
+        pin_to_primary(None)
+        self.assertFalse(is_pinned_to_primary(None))
+
+
+# 프로세스 공용 토큰 버킷 (분당 요청 수 / 분당 토큰 수)
+@override_settings(LLM_RPM=2, LLM_TPM=100, LLM_MAX_IN_FLIGHT=1)
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        override = override_settings(LLM_LIMITER_DIR=self.tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(self.tmp.cleanup)
+        self.now = 1000.0
+
+    def take(self, tokens, model="test-model"):
+        with mock.patch("core.llm_limiter.time.time", return_value=self.now):
+            return _try_take(model, tokens)
+
+    def test_request_bucket(self):
+        self.assertEqual(self.take(1), 0)
+        self.assertEqual(self.take(1), 0)
+        self.assertAlmostEqual(self.take(1), 30.0)  # 분당 2개 → 30초에 1개 충전
+        self.now += 30
+        self.assertEqual(self.take(1), 0)
+
+    @override_settings(LLM_RPM=1000)
+    def test_token_bucket(self):
+        self.assertEqual(self.take(80), 0)
+        self.assertAlmostEqual(self.take(40), 12.0)  # 부족한 20 토큰 = 12초
+        self.now += 12
+        self.assertEqual(self.take(40), 0)
+
+    @override_settings(LLM_RPM=1000)
+    def test_oversized_request_waits_for_full_bucket_only(self):
+        self.assertEqual(self.take(500), 0)
+        self.assertAlmostEqual(self.take(500), 60.0)
+
+    @override_settings(LLM_RPM=1000)
+    def test_models_have_separate_buckets(self):
+        self.assertEqual(self.take(100), 0)
+        self.assertEqual(self.take(100, model="other-model"), 0)
+
+    @override_settings(LLM_RPM=1000)
+    def test_settle_refunds_unused_tokens(self):
+        self.assertEqual(self.take(80), 0)
+        with mock.patch("core.llm_limiter.time.time", return_value=self.now):
+            settle("test-model", 80, 20)
+        self.assertEqual(self.take(80), 0)
+
+    def test_cooldown_after_rate_limit(self):
+        with mock.patch("core.llm_limiter.time.time", return_value=self.now):
+            penalize("test-model", 5)
+        self.assertAlmostEqual(self.take(1), 5.0)
+        self.now += 5
+        self.assertEqual(self.take(1), 0)
+
+    def test_in_flight_limit(self):
+        with limited("test-model", 1):
+            with self.assertRaises(LLMRateLimited):
+                with limited("test-model", 1, timeout=0.1):
+                    pass
+        with limited("test-model", 1, timeout=0.1):
+            pass
+
+
+# 회로 차단기 상태 전이 (closed → open → half_open → closed / open)
+@override_settings(LLM_BREAKER_FAILURES=3, LLM_BREAKER_COOLDOWN=30)
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker("test-model")
+
+    def open_breaker(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+
+    def cool_down(self):
+        self.breaker.opened_at -= 30
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(LLMUnavailable) as raised:
+            self.breaker.before_call()
+        self.assertGreater(raised.exception.retry_after, 0)
+
+    def test_success_resets_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_allows_single_probe(self):
+        self.open_breaker()
+        self.cool_down()
+        self.assertEqual(self.breaker.snapshot()["state"], CircuitBreaker.HALF_OPEN)
+
+        self.breaker.before_call()
+        with self.assertRaises(LLMUnavailable):
+            self.breaker.before_call()  # 시험 호출 진행 중
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.snapshot(), {"state": CircuitBreaker.CLOSED, "consecutive_failures": 0, "retry_after": 0})
+
+    def test_failed_probe_reopens(self):
+        self.open_breaker()
+        self.cool_down()
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(LLMUnavailable):
+            self.breaker.before_call()
+
+    def test_released_probe_allows_next_probe(self):
+        self.open_breaker()
+        self.cool_down()
+        self.breaker.before_call()
+        self.breaker.release_probe()
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+
+
+# 재시도 / 포기 (동기 호출)
+@override_settings(LLM_BACKOFF_BASE=0, LLM_MAX_RETRIES=2, LLM_BREAKER_FAILURES=100)
+class CallWithResilienceTests(SimpleTestCase):
+    def call(self, model, outcomes):
+        outcomes = iter(outcomes)
+
+        def once(remaining):
+            outcome = next(outcomes)
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return outcome
+
+        trace = {}
+        return call_with_resilience(model, once, 5, lambda attempt, error: 0, trace=trace), trace
+
+    def test_retries_transient_errors(self):
+        result, trace = self.call("retry-model", [asyncio.TimeoutError(), "ok"])
+        self.assertEqual(result, "ok")
+        self.assertEqual(trace["retries"], 1)
+
+    def test_gives_up_after_max_retries(self):
+        with self.assertRaises(LLMUnavailable):
+            self.call("give-up-model", [asyncio.TimeoutError()] * 3)
+
+    def test_other_errors_are_not_retried(self):
+        with self.assertRaises(KeyError):
+            self.call("error-model", [KeyError("bad"), "ok"])
+
+    @override_settings(LLM_BREAKER_FAILURES=2)
+    def test_exhausted_call_counts_as_one_breaker_failure(self):
+        with self.assertRaises(LLMUnavailable), self.assertLogs("core.llm_resilience", "WARNING"):
+            self.call("exhausted-model", [asyncio.TimeoutError()] * 3)
+        self.assertEqual(get_breaker("exhausted-model").snapshot()["consecutive_failures"], 1)
+        self.assertEqual(get_breaker("exhausted-model").state, CircuitBreaker.CLOSED)
+
+        # 재시도 후 성공한 호출은 실패로 남지 않음
+        with self.assertLogs("core.llm_resilience", "WARNING"):
+            self.call("exhausted-model", [asyncio.TimeoutError(), "ok"])
+        self.assertEqual(get_breaker("exhausted-model").snapshot()["consecutive_failures"], 0)
+
+
+# OpenAI 클라이언트 대역 (chat.completions.create 호출 횟수와 응답만 흉내 냄)
+class FakeClient:
+    def __init__(self, *contents):
+        self.contents = list(contents)
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=self)
+
+    def with_options(self, **kwargs):
+        return self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=self.contents.pop(0)))],
+            usage=SimpleNamespace(prompt_tokens=1, completion_tokens=1, total_tokens=2, prompt_tokens_details=None),
+        )
+
+
+# 응답 캐시 (검사를 통과한 응답만 저장, 저장된 응답도 다시 검사)
+class CompletionCacheTests(TestCase):
+    MESSAGES = [{"role": "user", "content": "요약해 주세요"}]
+
+    def setUp(self):
+        caches[llm.LLM_CACHE_ALIAS].clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(LLM_LIMITER_DIR=self.tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def complete(self, fake, validate=None):
+        with mock.patch.object(llm, "client", fake):
+            return llm.chat_completion("cache-model", self.MESSAGES, 0.5, 100, validate=validate)
+
+    def test_identical_calls_hit_cache(self):
+        fake = FakeClient("답변")
+        self.assertEqual(self.complete(fake), "답변")
+        self.assertEqual(self.complete(fake), "답변")
+        self.assertEqual(fake.calls, 1)
+
+    def test_invalid_response_is_not_cached(self):
+        is_list = lambda content: content.startswith("[")  # noqa: E731
+        fake = FakeClient("형식 오류", "[]")
+        self.assertEqual(self.complete(fake, is_list), "형식 오류")
+        self.assertEqual(self.complete(fake, is_list), "[]")
+        self.assertEqual(self.complete(fake, is_list), "[]")
+        self.assertEqual(fake.calls, 2)
+
+    def test_invalid_cached_entry_is_evicted(self):
+        key = llm.cache_key("cache-model", self.MESSAGES, 0.5, 100)
+        llm.set_cached_completion(key, "예전 형식")
+        fake = FakeClient("[]")
+        self.assertEqual(self.complete(fake, lambda content: content.startswith("[")), "[]")
+        self.assertEqual(fake.calls, 1)
+        self.assertEqual(caches[llm.LLM_CACHE_ALIAS].get(key), "[]")
+
+
+# OpenAI 호출 사용량 기록 (기록 실패는 호출 결과에 영향 없이 로그만)
+class TelemetryTests(TestCase):
+    def test_call_is_recorded(self):
+        record_llm_call(LLMCall("chat-model", "chat").finish("ok"))
+        self.assertEqual(LLMCallLog.objects.get().endpoint, "chat")
+
+    def test_record_failure_is_logged(self):
+        with mock.patch.object(LLMCallLog, "save", side_effect=RuntimeError("db down")):
+            with self.assertLogs("core.telemetry", "ERROR") as logs:
+                record_llm_call(LLMCall("chat-model", "chat").finish("ok"))
+        self.assertIn("RuntimeError: db down", logs.output[0])
+
+
+# /metrics 는 METRICS_TOKEN 을 설정하고 Bearer 토큰을 보낸 허용 IP 요청에만 응답
+class MetricsEndpointTests(TestCase):
+    def get(self, token=None, **extra):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        return self.client.get("/metrics", **headers, **extra)
+
+    def test_disabled_without_token_setting(self):
+        self.assertEqual(self.get().status_code, 404)
+        self.assertEqual(self.get("anything").status_code, 404)
+
+    @override_settings(METRICS_TOKEN="scrape-secret")
+    def test_token_is_required(self):
+        self.assertEqual(self.get().status_code, 404)
+        self.assertEqual(self.get("wrong").status_code, 404)
+        response = self.get("scrape-secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+
+    @override_settings(METRICS_TOKEN="scrape-secret")
+    def test_other_addresses_are_rejected(self):
+        self.assertEqual(self.get("scrape-secret", REMOTE_ADDR="203.0.113.5").status_code, 404)
@@ -0,0 +1,137 @@
+import math
+import re
+
+from django.conf import settings
+
+# 토큰 수 계산과 모델 컨텍스트 예산 배분 (upload 요약 청크, consult 채팅 메시지 구성, core.llm_limiter 가 사용)
+# - tiktoken 이 설치되어 있으면 모델 인코딩으로 정확히 세고, 없으면 문자 종류별 근사치 사용
+#   (근사치는 실제보다 약간 크게 세도록 잡아 컨텍스트를 넘지 않는 쪽으로 틀림)
+# - 문서 원문 토큰 수는 업로드 분석 시 Document.token_count 에 저장해 두고 재사용
+
+# 모델별 컨텍스트 크기(입력 + 출력 토큰)
+MODEL_CONTEXT_TOKENS = {
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+}
+DEFAULT_CONTEXT_TOKENS = 8192
+
+MESSAGE_OVERHEAD = 4  # 메시지 1개당 역할/구분자 토큰
+REPLY_OVERHEAD = 3    # 응답 시작 토큰
+
+# 근사치: 한글/한자 등은 1글자 ≈ 1토큰, 영문 단어는 4글자 ≈ 1토큰, 숫자는 3자리 ≈ 1토큰, 기호는 1개 ≈ 1토큰
+_PIECE_PATTERN = re.compile(r"[A-Za-z]+|[0-9]+|\s+|[^\sA-Za-z0-9]")
+
+try:
+    import tiktoken
+except ImportError:  # 선택 의존성
+    tiktoken = None
+
+_encodings = {}
+
+
+def _encoding(model):
+    if tiktoken is None:
+        return None
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding("o200k_base")
+    return _encodings[model]
+
+
+def _estimate(text):
+    tokens = 0
+    for piece in _PIECE_PATTERN.findall(text):
+        first = piece[0]
+        if first.isspace():
+            continue
+        if first.isascii() and first.isalpha():
+            tokens += math.ceil(len(piece) / 4)
+        elif first.isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += 1
+    return tokens
+
+
+# 텍스트 토큰 수
+def count_tokens(text, model="gpt-4o"):
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return _estimate(text)
+
+
+# 메시지 목록(Chat Completions 입력) 토큰 수
+def count_message_tokens(messages, model="gpt-4o"):
+    return sum(count_tokens(m.get("content") or "", model) + MESSAGE_OVERHEAD for m in messages) + REPLY_OVERHEAD
+
+
+# max_tokens 이하가 되도록 텍스트 앞부분만 남김 (이미 짧으면 그대로)
+def truncate_to_tokens(text, max_tokens, model="gpt-4o"):
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    encoding = _encoding(model)
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+    # 근사치: 길이 기준 이분 탐색
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if _estimate(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+
+def context_window(model):
+    limits = getattr(settings, "LLM_CONTEXT_TOKENS", None) or {}
+    return limits.get(model) or MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS)
+
+
+# 호출 1회의 컨텍스트 예산
+# 응답(max_tokens)을 먼저 떼어 두고, 고정 입력(시스템 프롬프트, 질문 등)을 reserve 한 뒤
+# 남은 토큰을 우선순위 순서대로 take 로 나눠 줌 → 합계가 모델 컨텍스트를 넘지 않음
+class ContextBudget:
+    def __init__(self, model, answer_tokens):
+        self.model = model
+        self.total = context_window(model) - answer_tokens - REPLY_OVERHEAD
+        self.used = 0
+
+    @property
+    def remaining(self):
+        return max(0, self.total - self.used)
+
+    # 반드시 들어가야 하는 텍스트 (메시지 1개 기준)
+    def reserve(self, text):
+        tokens = count_tokens(text, self.model) + MESSAGE_OVERHEAD
+        self.used += tokens
+        return tokens
+
+    # 최대 wanted 토큰(cap 이 있으면 cap 이하)을 배정하고 실제 배정량 반환
+    def take(self, wanted, cap=None):
+        granted = min(wanted, self.remaining, cap if cap is not None else wanted)
+        granted = max(0, granted)
+        self.used += granted
+        return granted
+
+    # 최근 메시지부터 예산(cap) 안에 들어가는 만큼만 남김 (시간순 유지)
+    def fit_recent(self, messages, cap=None):
+        limit = min(self.remaining, cap if cap is not None else self.remaining)
+        kept = []
+        used = 0
+        for message in reversed(messages):
+            tokens = count_tokens(message.get("content") or "", self.model) + MESSAGE_OVERHEAD
+            if used + tokens > limit:
+                break
+            kept.append(message)
+            used += tokens
+        self.used += used
+        return list(reversed(kept))
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('llm/status/', views.LLMStatusView.as_view(), name='llm-status'),
+]
@@ -1,3 +1,60 @@
-from django.shortcuts import render
+import hmac
 
-# Create your views here.
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework import status
+from drf_yasg.utils import swagger_auto_schema
+
+from accounts.authentication import auth_cache_stats
+from .llm import llm_status
+from .metrics import render_prometheus
+
+
+# OpenAI 호출 상태 (응답 캐시 적중률, 재시도/시간 초과/헤지 횟수, 모델별 회로 차단기) - 관리자 전용
+# 값은 요청을 처리한 워커 프로세스 기준
+class LLMStatusView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(operation_summary="OpenAI 호출 상태 조회 (관리자)")
+    def get(self, request):
+        return Response(llm_status(), status=status.HTTP_200_OK)
+
+
+# 캐시/회로 차단기 통계 → Prometheus 카운터/게이지
+def _status_metrics():
+    llm = llm_status()
+    resilience = llm["resilience"]
+    auth = auth_cache_stats()
+    breakers = resilience.pop("breakers")
+    return [
+        ("llm_response_cache_total", "counter", "OpenAI 응답 캐시 조회 수",
+         [({"result": "hit"}, llm["cache"]["hits"]), ({"result": "miss"}, llm["cache"]["misses"])]),
+        ("llm_resilience_events_total", "counter", "OpenAI 호출 재시도/시간 초과/헤지/차단 횟수",
+         [({"event": name}, value) for name, value in sorted(resilience.items())]),
+        ("llm_breaker_open", "gauge", "모델별 회로 차단 여부 (1 = 차단 중)",
+         [({"model": model}, int(state["state"] == "open")) for model, state in sorted(breakers.items())]),
+        ("auth_user_cache_total", "counter", "JWT 인증 사용자 캐시 조회 수",
+         [({"result": "hit"}, auth["hits"]), ({"result": "miss"}, auth["misses"])]),
+    ]
+
+
+# /metrics 접근 허용 여부: METRICS_TOKEN 이 설정돼 있고, Bearer 토큰이 일치하며, METRICS_ALLOWED_IPS 에서 온 요청
+def _metrics_allowed(request):
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if not token:
+        return False
+    if request.META.get("REMOTE_ADDR") not in getattr(settings, "METRICS_ALLOWED_IPS", ["127.0.0.1", "::1"]):
+        return False
+    scheme, _, given = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(given.strip().encode(), token.encode())
+
+
+# GET /metrics - Prometheus 스크레이프용 (scrape 설정의 bearer token 으로 METRICS_TOKEN 전달, 그 밖에는 404)
+# 값은 요청을 처리한 워커 프로세스 기준
+def metrics(request):
+    if not _metrics_allowed(request):
+        raise Http404()
+    return HttpResponse(render_prometheus(_status_metrics()), content_type="text/plain; version=0.0.4; charset=utf-8")
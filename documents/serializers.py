@@ -1,6 +1,5 @@
 from rest_framework import serializers
 from core.models import Document
-from pathlib import Path
 
 class FileNameViewSerializer(serializers.ModelSerializer):
     class Meta:
@@ -36,6 +35,11 @@ class SummaryFileSerializer(serializers.ModelSerializer):
         fields = ['summary_file']       
 
     def get_summary_file(self, obj):
-        # 예: "summaries/근로계약서_summary.pdf" -> "근로계약서_summary"
-        return Path(obj.summary_file.name).stem
+        # 요약본 파일은 내용 해시 이름으로 저장되므로, 문서 이름 기준으로 표시
+        # 예: "근로계약서_2025.08.20_10:00" -> "근로계약서_2025.08.20_10:00_요약본"
+        # 분석이 끝난 문서는 요약본이 아직 렌더링 전이어도 다운로드 시 생성되므로 표시
+        # (has_clauses: 분석 캐시 항목이 지워져도 문서의 조항 분석이 남아 있는지, 목록 쿼리에서 annotate)
+        if not obj.summary_file and not obj.analysis_id and not getattr(obj, 'has_clauses', False):
+            return None
+        return f"{obj.file_name}_요약본"
             
@@ -0,0 +1,116 @@
+import hashlib
+import re
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+# 스토리지 파일(PDF) 다운로드 응답
+# - 파일 전체를 메모리에 읽지 않고 청크 단위로 스트리밍
+# - ETag / Last-Modified 검증자 제공 → If-None-Match / If-Modified-Since 일치 시 304
+# - Range 요청(bytes=시작-끝, 단일 구간)은 206, 범위를 벗어나면 416
+#   (PDF 뷰어가 페이지 이동 시 필요한 부분만 다시 받도록 함)
+
+CHUNK_SIZE = 64 * 1024
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+# 파일 이름/크기/수정 시각 기반 ETag (원본/요약본은 내용 해시 이름이라 내용이 바뀌면 이름도 바뀜)
+def file_etag(name, size, modified):
+    raw = f"{name}:{size}:{modified.timestamp() if modified else ''}"
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+# Range 헤더 → (start, end) 포함 구간, 없거나 해석할 수 없으면 None, 만족할 수 없으면 ValueError
+def parse_range(header, size):
+    match = RANGE_PATTERN.match((header or "").strip())
+    if not match:
+        return None  # 다중 구간 등은 지원하지 않고 전체 전송
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:  # bytes=-N : 마지막 N 바이트
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+# If-Range 가 현재 ETag/Last-Modified 와 일치할 때만 Range 를 적용
+def _if_range_matches(request, etag, last_modified):
+    value = request.META.get("HTTP_IF_RANGE")
+    if not value:
+        return True
+    if value.startswith('"') or value.startswith("W/"):
+        return value == etag
+    since = parse_http_date_safe(value)
+    return since is not None and last_modified is not None and int(last_modified.timestamp()) <= since
+
+
+def _iter_range(fileobj, start, length):
+    try:
+        fileobj.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = fileobj.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+# FieldFile → 다운로드 응답 (200 / 206 / 304 / 412 / 416)
+def serve_file(request, field_file, filename, as_attachment=False, content_type="application/pdf"):
+    storage, name = field_file.storage, field_file.name
+    size = storage.size(name)
+    try:
+        modified = storage.get_modified_time(name)
+    except (NotImplementedError, OSError):
+        modified = None
+    etag = file_etag(name, size, modified)
+    last_modified = int(modified.timestamp()) if modified else None
+
+    # 1) 조건부 요청 (If-None-Match / If-Modified-Since → 304, If-Match 불일치 → 412)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        response = not_modified
+    else:
+        # 2) 범위 요청
+        try:
+            byte_range = parse_range(request.META.get("HTTP_RANGE"), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+        if byte_range and not _if_range_matches(request, etag, modified):
+            byte_range = None
+
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                _iter_range(storage.open(name, "rb"), start, length),
+                status=206,
+                content_type=content_type,
+            )
+            response["Content-Length"] = str(length)
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        else:
+            response = FileResponse(storage.open(name, "rb"), content_type=content_type)
+            response.block_size = CHUNK_SIZE
+            response["Content-Length"] = str(size)
+        response["Content-Disposition"] = content_disposition_header(as_attachment, filename)
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "private, no-cache"  # 사용자별 문서: 브라우저에만 저장하고 매번 재검증
+    return response
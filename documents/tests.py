@@ -1,3 +1,148 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from core.models import Document, User
+
+from .streaming import parse_range, serve_file
+from .views import decode_cursor, encode_cursor
+
+CONTENT = bytes(range(256)) * 4  # 1024 바이트
+
+
+# Range 헤더 해석
+class ParseRangeTests(SimpleTestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range("bytes=0-99", 1024), (0, 99))
+        self.assertEqual(parse_range("bytes=1000-", 1024), (1000, 1023))
+        self.assertEqual(parse_range("bytes=1000-5000", 1024), (1000, 1023))
+        self.assertEqual(parse_range("bytes=-24", 1024), (1000, 1023))
+        self.assertEqual(parse_range("bytes=-5000", 1024), (0, 1023))
+
+    def test_unsupported_ranges_are_ignored(self):
+        for header in (None, "", "bytes=-", "bytes=0-1,5-9", "items=0-1"):
+            self.assertIsNone(parse_range(header, 1024))
+
+    def test_unsatisfiable_ranges(self):
+        for header in ("bytes=1024-", "bytes=10-5", "bytes=-0"):
+            with self.assertRaises(ValueError):
+                parse_range(header, 1024)
+
+
+# 다운로드 응답 (200 / 206 / 304 / 416)
+class ServeFileTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        storage = FileSystemStorage(location=self.tmp.name)
+        self.field_file = SimpleNamespace(storage=storage, name=storage.save("sample.pdf", ContentFile(CONTENT)))
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def get(self, **headers):
+        return serve_file(self.factory.get("/", **headers), self.field_file, "sample.pdf")
+
+    def body(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_full_download(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Length"], str(len(CONTENT)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(self.body(response), CONTENT)
+
+    def test_partial_download(self):
+        response = self.get(HTTP_RANGE="bytes=100-199")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 100-199/{len(CONTENT)}")
+        self.assertEqual(self.body(response), CONTENT[100:200])
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HTTP_RANGE=f"bytes={len(CONTENT)}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(CONTENT)}")
+
+    def test_if_range_with_current_etag(self):
+        etag = self.get()["ETag"]
+        response = self.get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.body(response), CONTENT[:10])
+
+    def test_if_range_with_stale_validator_sends_whole_file(self):
+        response = self.get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), CONTENT)
+
+        response = self.get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=http_date(0))
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_range_with_last_modified(self):
+        last_modified = self.get()["Last-Modified"]
+        response = self.get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=last_modified)
+        self.assertEqual(response.status_code, 206)
+
+    def test_not_modified(self):
+        first = self.get()
+        response = self.get(HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], first["ETag"])
+
+        response = self.get(HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+
+# 문서 목록 키셋 페이지네이션 (/document/index)
+class DocumentIndexTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(user_id="tester", user_name="테스터", password="pw-1234")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_documents(self, count):
+        for i in range(count):
+            Document.objects.create(user=self.user, file=f"documents/{i}.pdf", file_name=f"문서{i}", chat_name=f"채팅{i}", extracted_text="")
+
+    def test_cursor_round_trip(self):
+        now = timezone.now()
+        row = {"updated_at": now, "created_at": now - timedelta(days=1), "id": 42}
+        self.assertEqual(decode_cursor(encode_cursor(row)), (row["updated_at"], row["created_at"], 42))
+        self.assertIsNone(decode_cursor(None))
+        self.assertIsNone(decode_cursor(""))
+
+    def test_pages_cover_every_document_once(self):
+        self.create_documents(5)
+        same = timezone.now()
+        Document.objects.filter(id__in=Document.objects.order_by("id").values("id")[:3]).update(updated_at=same, created_at=same)
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = self.client.get("/document/index", params)
+            self.assertEqual(response.status_code, 200)
+            seen += [item["id"] for item in response.data["documents"]]
+            cursor = response.data["next_cursor"]
+            if cursor is None:
+                break
+
+        expected = list(Document.objects.order_by("-updated_at", "-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_only_own_documents(self):
+        other = User.objects.create_user(user_id="other", user_name="다른", password="pw-1234")
+        Document.objects.create(user=other, file="documents/x.pdf", file_name="x", chat_name="x", extracted_text="")
+        self.create_documents(1)
+        response = self.client.get("/document/index")
+        self.assertEqual([item["file_name"] for item in response.data["documents"]], ["문서0"])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get("/document/index", {"cursor": "잘못된값"}).status_code, 400)
+        self.assertEqual(self.client.get("/document/index", {"limit": "many"}).status_code, 400)
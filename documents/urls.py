@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import DocumentListView, UpdateFileNameView, ChatListView, UpdateChatNameView, DocumentPDFView,SummaryListView, SummaryPDFView
+from .views import DocumentIndexView, DocumentListView, UpdateFileNameView, ChatListView, UpdateChatNameView, DocumentPDFView,SummaryListView, SummaryPDFView
 
 urlpatterns = [
+    path('index', DocumentIndexView.as_view(), name='document-index'),  #get /document/index
     path('document-list', DocumentListView.as_view()),          #get /doc/document-list
     path('chat-list', ChatListView.as_view()),                  #get /doc/chat-list
     path('documents/<int:pk>/document-name/', UpdateFileNameView.as_view(), name='document-name'),
@@ -1,6 +1,9 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import FileResponse
-from django.http import HttpResponse
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+import base64
+import json
+from datetime import datetime
 
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
@@ -10,7 +13,10 @@ from rest_framework import status
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-from core.models import Document
+from core.models import ClauseAnalysis, Document
+from config.db_router import ReplicaRoutingMixin, read_from_primary
+from upload.views import ensure_summary_pdf
+from documents.streaming import serve_file
 from documents.serializers import (
     FileNameViewSerializer,
     FileNameUpdateSerializer,
@@ -20,24 +26,24 @@ from documents.serializers import (
 )
 
 # 문서 목록 조회
-class DocumentListView(APIView): 
+class DocumentListView(ReplicaRoutingMixin, APIView): 
     permission_classes = [IsAuthenticated]  # JWT 인증 필요
 
     @swagger_auto_schema(
         operation_summary="문서 목록 조회",
         operation_description="로그인한 유저가 업로드한 문서 목록(file_name)을 반환합니다.",
         responses={200: FileNameViewSerializer(many=True)},
-        security=[{"Bearer": []}]  # Swagger에서 Authorization 헤더 요구
-        
+        security=[{"Bearer": []}],  # Swagger에서 Authorization 헤더 요구
+        deprecated=True,  # 페이지네이션되는 /document/index 사용
     )
     def get(self, request):
         user = request.user
-        documents = Document.objects.filter(user=user)
+        documents = Document.objects.filter(user=user).only('id', 'file_name')
         serializer = FileNameViewSerializer(documents, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 # 요약된 문서 목록 조회
-class SummaryListView(APIView):
+class SummaryListView(ReplicaRoutingMixin, APIView):
     permission_classes = [IsAuthenticated]  # JWT 인증 필요
 
     @swagger_auto_schema(
@@ -45,37 +51,136 @@ class SummaryListView(APIView):
         operation_description="로그인한 유저의 문서에서 summary_file만 반환합니다.",
         responses={200: SummaryFileSerializer(many=True)},
         security=[{"Bearer": []}],
+        deprecated=True,  # 페이지네이션되는 /document/index 사용
     )
     def get(self, request):
         user = request.user
         documents = (
             Document.objects
             .filter(user=user)
+            .only('id', 'file_name', 'summary_file', 'analysis')
+            .annotate(has_clauses=Exists(ClauseAnalysis.objects.filter(document=OuterRef('pk'))))
             .order_by('-updated_at', '-created_at')
         )
         serializer = SummaryFileSerializer(documents, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
 # 채팅방 목록 조회
-class ChatListView(APIView):
+class ChatListView(ReplicaRoutingMixin, APIView):
     permission_classes = [IsAuthenticated]  # JWT 인증 필요
 
     @swagger_auto_schema(
         operation_summary="채팅방 목록 조회",
         operation_description="로그인한 유저의 채팅방 목록(chat_name)을 반환합니다.",
         responses={200: ChatNameViewSerializer(many=True)},
-        security=[{"Bearer": []}]  # Swagger에서 Authorization 헤더 요구
-        
+        security=[{"Bearer": []}],  # Swagger에서 Authorization 헤더 요구
+        deprecated=True,  # 페이지네이션되는 /document/index 사용
     )
     def get(self, request):
         user = request.user
-        documents = Document.objects.filter(user=user)
+        documents = Document.objects.filter(user=user).only('id', 'chat_name')
         serializer = ChatNameViewSerializer(documents, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+# 문서 목록 통합 조회 (문서명/채팅방명/요약본명 + 시각, 키셋 페이지네이션)
+class DocumentIndexView(ReplicaRoutingMixin, APIView):
+    permission_classes = [IsAuthenticated]  # JWT 인증 필요
+
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 100
+
+    @swagger_auto_schema(
+        operation_summary="문서 목록 통합 조회",
+        operation_description=(
+            "최근 수정 순(updated_at, created_at, id 내림차순)으로 문서 목록을 반환합니다.\n"
+            "응답의 next_cursor 를 cursor 파라미터로 넘기면 다음 페이지를 조회합니다 (마지막 페이지면 null)."
+        ),
+        manual_parameters=[
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="이전 응답의 next_cursor", type=openapi.TYPE_STRING),
+            openapi.Parameter('limit', openapi.IN_QUERY, description=f"페이지 크기 (기본 {DEFAULT_LIMIT}, 최대 {MAX_LIMIT})", type=openapi.TYPE_INTEGER),
+        ],
+        responses={
+            200: openapi.Response(
+                description="문서 목록",
+                examples={
+                    "application/json": {
+                        "documents": [
+                            {
+                                "id": 3,
+                                "file_name": "근로계약서_2025.08.20_10:00",
+                                "chat_name": "근로계약서_2025.08.20_10:00",
+                                "summary_name": "근로계약서_2025.08.20_10:00_요약본",
+                                "created_at": "2025-08-20T10:00:00+09:00",
+                                "updated_at": "2025-08-20T10:00:00+09:00",
+                            }
+                        ],
+                        "next_cursor": "WyIyMDI1LTA4LTIwVDAxOjAwOjAwKzAwOjAwIiwgIjIwMjUtMDgtMjBUMDE6MDA6MDArMDA6MDAiLCAzXQ",
+                    }
+                }
+            ),
+            400: openapi.Response(description="잘못된 cursor/limit"),
+        },
+        security=[{"Bearer": []}],
+    )
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit') or self.DEFAULT_LIMIT)
+            cursor = decode_cursor(request.query_params.get('cursor'))
+        except (TypeError, ValueError):
+            return Response({"error": "cursor 또는 limit 값이 올바르지 않습니다."}, status=400)
+        limit = max(1, min(limit, self.MAX_LIMIT))
+
+        # 목록에 필요한 컬럼만 조회 (extracted_text 등 큰 컬럼 제외), (user, updated_at, created_at) 인덱스 사용
+        documents = (
+            Document.objects
+            .filter(user=request.user)
+            .order_by('-updated_at', '-created_at', '-id')
+            .annotate(has_clauses=Exists(ClauseAnalysis.objects.filter(document=OuterRef('pk'))))
+            .values('id', 'file_name', 'chat_name', 'summary_file', 'analysis_id', 'has_clauses', 'created_at', 'updated_at')
+        )
+        if cursor:
+            updated_at, created_at, last_id = cursor
+            documents = documents.filter(
+                Q(updated_at__lt=updated_at)
+                | Q(updated_at=updated_at, created_at__lt=created_at)
+                | Q(updated_at=updated_at, created_at=created_at, id__lt=last_id)
+            )
+
+        rows = list(documents[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        items = [{
+            "id": row['id'],
+            "file_name": row['file_name'],
+            "chat_name": row['chat_name'],
+            # 분석이 끝난 문서는 요약본이 다운로드 시 생성되므로 이름을 함께 표시
+            "summary_name": f"{row['file_name']}_요약본" if (row['summary_file'] or row['analysis_id'] or row['has_clauses']) else None,
+            "created_at": timezone.localtime(row['created_at']).isoformat(),
+            "updated_at": timezone.localtime(row['updated_at']).isoformat(),
+        } for row in rows]
+
+        next_cursor = encode_cursor(rows[-1]) if has_more else None
+        return Response({"documents": items, "next_cursor": next_cursor}, status=status.HTTP_200_OK)
+
+
+# 키셋 커서 (마지막 행의 updated_at, created_at, id) ↔ URL-safe 문자열
+def encode_cursor(row):
+    payload = json.dumps([row['updated_at'].isoformat(), row['created_at'].isoformat(), row['id']])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(value):
+    if not value:
+        return None
+    payload = json.loads(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode())
+    updated_at, created_at, last_id = payload
+    return datetime.fromisoformat(updated_at), datetime.fromisoformat(created_at), int(last_id)
     
 
 #문서 목록 이름 변경    
-class UpdateFileNameView(APIView):
+class UpdateFileNameView(ReplicaRoutingMixin, APIView):
     permission_classes = [IsAuthenticated]  # JWT 인증 필요
 
     @swagger_auto_schema(
@@ -101,7 +206,7 @@ class UpdateFileNameView(APIView):
 
 
 # 채팅방 이름 변경
-class UpdateChatNameView(APIView):
+class UpdateChatNameView(ReplicaRoutingMixin, APIView):
     permission_classes = [IsAuthenticated]  # JWT 인증 필요
 
     @swagger_auto_schema(
@@ -127,14 +232,16 @@ class UpdateChatNameView(APIView):
 
 
 # 원본 문서 PDF 조회
-class DocumentPDFView(APIView):
+class DocumentPDFView(ReplicaRoutingMixin, APIView):
     permission_classes = [IsAuthenticated]  # JWT 인증 필요
 
     @swagger_auto_schema(
         operation_summary="문서 PDF 조회",
-        operation_description="해당 문서의 PDF 파일을 반환합니다 (inline).",
-        
-        responses={200: 'application/pdf'},
+        operation_description=(
+            "해당 문서의 PDF 파일을 반환합니다 (inline).\n"
+            "Range 요청 시 206(부분 응답), If-None-Match/If-Modified-Since 가 일치하면 304를 반환합니다."
+        ),
+        responses={200: 'application/pdf', 206: '부분 응답 (Range)', 304: '변경 없음', 416: '잘못된 Range'},
         security=[{"Bearer": []}],
     )
     def get(self, request, document_id: int):
@@ -144,36 +251,23 @@ class DocumentPDFView(APIView):
         except Document.DoesNotExist:
             return Response({"detail": "문서를 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
 
-        # 2) PDF 파일 필드 찾기 (모델 필드명에 맞춰 조정)
-        file_field = None
-        for attr in ("pdf_file", "file", "uploaded_file"):
-            if hasattr(doc, attr):
-                file_field = getattr(doc, attr)
-                break
-        if not file_field:
-            return Response({"detail": "PDF 파일 필드가 없습니다."}, status=400)
-        if not file_field:  # 파일이 비어있을 때
+        # 2) 파일이 비어있을 때
+        if not doc.file:
             return Response({"detail": "파일이 존재하지 않습니다."}, status=404)
 
-        # 3) 파일 열기(로컬/스토리지 모두 대응)
-        try:
-            file_field.open('rb')
-            fileobj = file_field.file 
-        except Exception:
-            fileobj = getattr(file_field, 'file', None) or file_field
-
-        # 4) 파일 스트리밍 응답
-        resp = FileResponse(fileobj, content_type='application/pdf')
-
-        # 파일명: 모델에 file_name이 있으면 사용, 아니면 업로드 이름
-        filename = getattr(doc, 'file_name', None) or getattr(file_field, 'name', 'document.pdf')
+        # 3) 파일명: 모델에 file_name이 있으면 사용, 아니면 업로드 이름
+        filename = doc.file_name or doc.file.name
         if not str(filename).lower().endswith('.pdf'):
             filename = f"{filename}.pdf"
-        resp['Content-Disposition'] = f'inline; filename="{filename}"'
-        return resp        
+
+        # 4) 청크 스트리밍 응답 (Range/ETag/Last-Modified 지원)
+        try:
+            return serve_file(request, doc.file, filename)
+        except FileNotFoundError:
+            return Response({"detail": "파일이 존재하지 않습니다."}, status=404)
 
 # 요약본 PDF 조회
-class SummaryPDFView(APIView):
+class SummaryPDFView(ReplicaRoutingMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
@@ -183,6 +277,8 @@ class SummaryPDFView(APIView):
                 description="PDF 파일 반환",
                 schema=openapi.Schema(type=openapi.TYPE_STRING, format='binary')
             ),
+            206: openapi.Response(description="부분 응답 (Range 요청)"),
+            304: openapi.Response(description="변경 없음 (If-None-Match / If-Modified-Since)"),
             404: openapi.Response(description="문서 없음"),
             401: openapi.Response(description="인증 실패 또는 토큰 만료")
         }
@@ -193,14 +289,16 @@ class SummaryPDFView(APIView):
         except Document.DoesNotExist:
             return Response({"error": "해당 문서를 찾을 수 없습니다."}, status=404)
 
-        if not document.summary_file:
+        # 요약본은 첫 다운로드 시점에 저장된 조항 분석으로 생성 (분석 전이면 None)
+        # 생성된 파일은 재사용되므로 조항 분석은 복제 지연이 없는 primary 에서 읽음
+        with read_from_primary():
+            summary_name = ensure_summary_pdf(document)
+        if not summary_name:
             return Response({"error": "요약 PDF 파일이 존재하지 않습니다."}, status=404)
 
         try:
-            with document.summary_file.open("rb") as pdf_file:
-                response = HttpResponse(pdf_file.read(), content_type="application/pdf")
-                filename = f"{document.file_name}_요약본.pdf"
-                response["Content-Disposition"] = f'attachment; filename="{filename}"'
-                return response
+            return serve_file(request, document.summary_file, f"{document.file_name}_요약본.pdf", as_attachment=True)
+        except FileNotFoundError:
+            return Response({"error": "요약 PDF 파일이 존재하지 않습니다."}, status=404)
         except Exception as e:
-            return Response({"error": f"PDF 파일을 읽는 도중 오류가 발생했습니다: {str(e)}"}, status=500)
\ No newline at end of file
+            return Response({"error": f"PDF 파일을 읽는 도중 오류가 발생했습니다: {str(e)}"}, status=500)
@@ -0,0 +1,74 @@
+import re
+
+# 계약서 원문을 조항(제N조) 경계 기준으로 나누는 청크 분할기
+
+# 줄 맨 앞의 "제3조", "제 12 조", "제3조의2" 등을 조항 시작으로 인식
+ARTICLE_START = re.compile(r"^[ \t]*제\s*\d+\s*조(?:\s*의\s*\d+)?", re.MULTILINE)
+
+
+# 조항 단위 분할 (첫 조항 앞의 머리말도 하나의 조각으로 유지)
+def split_clauses(text):
+    starts = [m.start() for m in ARTICLE_START.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+
+    clauses = []
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(text)
+        clause = text[start:end].strip()
+        if clause:
+            clauses.append(clause)
+    return clauses
+
+
+# size(text) 가 limit 이하인 가장 긴 앞부분의 길이 (최소 1글자)
+def _prefix_length(text, limit, size):
+    if size is len:
+        return max(1, limit)
+    low, high = 1, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if size(text[:mid]) <= limit:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+# 한 조항이 limit 보다 길면 줄 단위로, 그래도 길면 글자 수로 자름
+def _split_long(clause, limit, size):
+    pieces = []
+    current = ""
+    for line in clause.splitlines():
+        while size(line) > limit:
+            if current:
+                pieces.append(current)
+                current = ""
+            cut = _prefix_length(line, limit, size)
+            pieces.append(line[:cut])
+            line = line[cut:]
+        if current and size(f"{current}\n{line}") > limit:
+            pieces.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+# 조항을 순서대로 limit 이하 청크로 묶음 (조항 중간에서 끊기지 않도록)
+# 크기 기준은 size 함수 (기본 글자 수, 토큰 기준이면 core.tokens.count_tokens)
+def build_chunks(text, limit, size=len):
+    chunks = []
+    current = ""
+    for clause in split_clauses(text):
+        for piece in (_split_long(clause, limit, size) if size(clause) > limit else [clause]):
+            if current and size(f"{current}\n\n{piece}") > limit:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,70 @@
+import hashlib
+
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from core.models import AnalysisCache
+from core.tokens import count_tokens
+
+# 업로드 파일 내용(SHA-256) 기반 분석 결과 재사용
+# - 원본 PDF는 해시 이름으로 한 번만 저장하고, 여러 Document 가 같은 파일을 가리킴
+# - 요약본 PDF는 문서 이름이 제목으로 들어가므로 공유하지 않음 (문서별로 첫 다운로드 때 생성)
+
+
+# 업로드 파일의 SHA-256 계산 (청크 단위로 읽은 뒤 읽기 위치 복구)
+def compute_sha256(file):
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+# 재사용 가능한 분석 결과 조회 (요약 JSON이 있는 항목만)
+def find_cached_analysis(content_hash, analysis_version):
+    return (
+        AnalysisCache.objects
+        .filter(content_hash=content_hash, analysis_version=analysis_version)
+        .exclude(summary_json='')
+        .first()
+    )
+
+
+# 원본 PDF를 해시 이름으로 저장 (이미 있으면 복사하지 않고 기존 파일 이름 반환)
+# 같은 파일이 동시에 업로드되면 둘 다 exists 검사를 통과할 수 있음 → 스토리지가 이름을 바꿔 저장했다면
+# (<해시>_XXXX.pdf) 먼저 저장된 파일과 내용이 같으므로 사본을 지우고 해시 이름을 사용
+def store_original(file, content_hash):
+    name = f"documents/{content_hash}.pdf"
+    if default_storage.exists(name):
+        return name
+    saved = default_storage.save(name, file)
+    if saved != name:
+        default_storage.delete(saved)
+    return name
+
+
+# 캐시 항목의 결과를 새 문서에 연결 (파일은 이름만 공유)
+def attach_cached_analysis(document, entry):
+    document.analysis = entry
+    document.file.name = entry.file.name
+    document.extracted_text = entry.extracted_text
+    document.page_offsets = entry.page_offsets
+    document.token_count = count_tokens(entry.extracted_text)
+    AnalysisCache.objects.filter(pk=entry.pk).update(hit_count=F('hit_count') + 1)
+
+
+# 분석이 끝난 문서의 결과를 캐시에 등록 (동시 업로드로 이미 등록된 경우 기존 항목 반환)
+def remember_analysis(document, analysis_version, summary_json):
+    try:
+        with transaction.atomic():
+            return AnalysisCache.objects.create(
+                content_hash=document.content_hash,
+                analysis_version=analysis_version,
+                file=document.file.name,
+                extracted_text=document.extracted_text,
+                page_offsets=document.page_offsets,
+                summary_json=summary_json,
+            )
+    except IntegrityError:
+        return AnalysisCache.objects.get(content_hash=document.content_hash, analysis_version=analysis_version)
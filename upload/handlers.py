@@ -0,0 +1,62 @@
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+# PDF 업로드 스트리밍 수집 핸들러
+# - 크기와 상관없이 청크 단위로 디스크 임시 파일에 기록 (업로드당 메모리 사용량 일정)
+# - 읽는 동안 SHA-256 과 크기를 함께 계산 → 저장/중복 확인 시 파일을 다시 읽지 않음
+# - 파싱 전에 %PDF 시그니처와 최대 크기를 검사하고, 어긋나면 이후 청크는 버림
+#   (결과는 file.ingest_error 로 전달되어 뷰에서 400/413 응답)
+
+PDF_MAGIC = b"%PDF-"
+MAGIC_SEARCH_BYTES = 1024  # PDF 규격상 시그니처는 앞 1KB 안에 있으면 됨
+
+ERROR_NOT_PDF = "not_pdf"
+ERROR_TOO_LARGE = "too_large"
+
+
+class PDFIngestUploadHandler(TemporaryFileUploadHandler):
+    def __init__(self, request=None, max_bytes=None):
+        super().__init__(request)
+        self.max_bytes = max_bytes or getattr(settings, "UPLOAD_MAX_BYTES", 20 * 1024 * 1024)
+        self.request_too_large = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Content-Length 가 이미 한도를 넘으면 파일 내용을 기록하지 않음 (multipart 헤더 여유분 고려)
+        self.request_too_large = content_length > self.max_bytes + 64 * 1024
+        return None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.head = b""
+        self.error = ERROR_TOO_LARGE if self.request_too_large else None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.error:
+            return None  # 이미 거절된 파일: 남은 청크는 버림
+
+        self.size += len(raw_data)
+        if self.size > self.max_bytes:
+            self.error = ERROR_TOO_LARGE
+            return None
+
+        if len(self.head) < MAGIC_SEARCH_BYTES:
+            self.head += raw_data[:MAGIC_SEARCH_BYTES - len(self.head)]
+            if len(self.head) >= MAGIC_SEARCH_BYTES and PDF_MAGIC not in self.head:
+                self.error = ERROR_NOT_PDF
+                return None
+
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        file = super().file_complete(self.size)
+        if not self.error and PDF_MAGIC not in self.head:  # 1KB 보다 작은 파일
+            self.error = ERROR_NOT_PDF
+        file.sha256 = self.digest.hexdigest()
+        file.ingest_error = self.error
+        return file
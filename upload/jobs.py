@@ -0,0 +1,123 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.background import submit
+from core.metrics import record_stage
+from core.models import AnalysisJob
+from core.tokens import count_tokens
+
+from consult.retrieval import build_document_index
+
+from .dedupe import remember_analysis
+
+logger = logging.getLogger(__name__)
+
+
+# 분석 파이프라인에서 사용자에게 그대로 보여줄 오류
+class AnalysisError(Exception):
+    pass
+
+
+# 문서 분석 작업 등록 (트랜잭션 커밋 이후 워커 풀에 전달)
+def enqueue_analysis(document):
+    job = AnalysisJob.objects.create(document=document)
+    transaction.on_commit(lambda: submit(run_analysis_job, job.id))
+    return job
+
+
+# 단계 진입/종료 시각을 기록하는 컨텍스트 매니저
+@contextmanager
+def _stage(job, name):
+    job.status = name
+    job.stage_timings[name] = {"started_at": timezone.now().isoformat()}
+    job.save(update_fields=["status", "stage_timings"])
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        job.stage_timings[name]["duration_ms"] = round(elapsed * 1000, 1)
+        job.save(update_fields=["stage_timings"])
+        record_stage(name, elapsed, view="analysis_job")  # /metrics 단계별 시간
+
+
+# 분석 캐시를 재사용한 업로드는 완료 상태의 작업으로 기록
+def record_cache_hit(document):
+    now = timezone.now()
+    return AnalysisJob.objects.create(
+        document=document,
+        status=AnalysisJob.STATUS_DONE,
+        cache_hit=True,
+        started_at=now,
+        finished_at=now,
+    )
+
+
+# 워커 스레드에서 실행되는 분석 작업 본체
+def run_analysis_job(job_id):
+    from .views import (
+        analysis_version,
+        ensure_summary_pdf,
+        extract_pages_from_pdf,
+        save_clause_analysis,
+        summarize_contract,
+    )
+
+    job = AnalysisJob.objects.select_related("document").get(pk=job_id)
+    document = job.document
+
+    job.started_at = timezone.now()
+    job.save(update_fields=["started_at"])
+
+    try:
+        # 1) 원본 PDF 텍스트 추출
+        with _stage(job, AnalysisJob.STATUS_EXTRACTING):
+            try:
+                extracted_text, page_offsets = extract_pages_from_pdf(document.file.path)
+            except NotImplementedError:  # 로컬 경로가 없는 스토리지는 파일 객체로 순차 추출
+                with document.file.open("rb") as f:
+                    extracted_text, page_offsets = extract_pages_from_pdf(f)
+
+            # 추출 결과는 이 단계에서 바로 저장 (요약이 실패해도 원문으로 채팅할 수 있도록)
+            # + 채팅용 검색 인덱스 생성, 원문 토큰 수 (채팅 시 컨텍스트 예산 계산용)
+            document.extracted_text = extracted_text
+            document.page_offsets = page_offsets
+            document.token_count = count_tokens(extracted_text)
+            document.save(update_fields=["extracted_text", "page_offsets", "token_count"])
+            build_document_index(document)
+
+        # 2) OpenAI 요약 (조항 단위 청크 동시 요약 후 병합)
+        with _stage(job, AnalysisJob.STATUS_SUMMARIZING):
+            try:
+                summary_data = summarize_contract(extracted_text, user_id=document.user_id)
+            except ValueError as e:
+                raise AnalysisError(str(e))
+            summary_text = json.dumps(summary_data, ensure_ascii=False)
+            save_clause_analysis(document, summary_data)
+
+        document.analysis = remember_analysis(document, analysis_version(), summary_text)
+        document.save(update_fields=["analysis"])
+
+        # 3) 요약본 PDF 렌더링 - 기본은 첫 다운로드 시점에 생성(SummaryPDFView), 설정 시 미리 생성
+        if getattr(settings, "SUMMARY_EAGER_RENDER", False):
+            with _stage(job, AnalysisJob.STATUS_RENDERING):
+                ensure_summary_pdf(document)
+
+    except Exception as e:
+        logger.exception("문서 분석 실패 (job=%s, document=%s)", job.id, document.id)
+        job.status = AnalysisJob.STATUS_FAILED
+        job.error = str(e) if isinstance(e, AnalysisError) else "문서 분석 중 오류가 발생했습니다."
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+        return
+
+    job.status = AnalysisJob.STATUS_DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "finished_at"])
@@ -0,0 +1,89 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pdfplumber
+
+# 페이지 병렬 PDF 텍스트 추출 엔진 (페이지 경계 위치 포함)
+# - 페이지 구간을 프로세스 풀에 나눠 맡기고, 결과는 페이지 순서대로 한 번만 이어 붙임
+# - 워커 1개이거나 페이지가 한 구간 이하인 PDF, 파일 객체는 호출한 프로세스에서 순서대로 추출
+# - 각 페이지를 처리한 직후 레이아웃 캐시를 비워 메모리가 페이지 수에 비례해 늘지 않도록 함
+# - 페이지 텍스트는 구분자 없이 이어 붙임 (기존 추출 결과와 같은 텍스트 → 해시/요약 입력이 달라지지 않음)
+# - Django 설정에 의존하지 않음 (spawn 된 자식 프로세스에서 그대로 import 됨)
+# - 워커 수별 처리량은 benchmarks/bench_extract.py (--workers) 로 측정
+
+PAGE_SEPARATOR = ""
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # 멀티스레드 서버에서 fork 하면 잠금 상태까지 복제되므로 spawn 사용
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+    return _pool
+
+
+def _extract_page(page):
+    try:
+        return page.extract_text() or ""
+    finally:
+        page.close()  # 페이지별 캐시(문자/레이아웃 객체) 해제
+
+
+# 프로세스 풀 작업 단위: [start, stop) 구간 페이지 텍스트 목록 반환
+def _extract_range(path, start, stop):
+    with pdfplumber.open(path, pages=list(range(start + 1, stop + 1))) as pdf:
+        return [_extract_page(page) for page in pdf.pages]
+
+
+def count_pages(path_or_file):
+    with pdfplumber.open(path_or_file) as pdf:
+        return len(pdf.pages)
+
+
+# 페이지별 텍스트 목록 추출 (파일 경로 또는 파일 객체, 페이지 순서 보장)
+def extract_pages(path_or_file, workers=1, pages_per_task=8):
+    # 파일 경로가 아니면(메모리 업로드 등) 자식 프로세스에 넘길 수 없으므로 단일 프로세스로 처리
+    if workers <= 1 or not isinstance(path_or_file, str):
+        with pdfplumber.open(path_or_file) as pdf:
+            return [_extract_page(page) for page in pdf.pages]
+
+    page_count = count_pages(path_or_file)
+    if page_count <= pages_per_task:
+        return _extract_range(path_or_file, 0, page_count)
+
+    pool = _get_pool(workers)
+    futures = [
+        pool.submit(_extract_range, path_or_file, start, min(start + pages_per_task, page_count))
+        for start in range(0, page_count, pages_per_task)
+    ]
+
+    pages = []
+    for future in futures:  # 제출 순서대로 모으면 페이지 순서가 유지됨
+        pages.extend(future.result())
+    return pages
+
+
+# 페이지 목록을 한 번에 이어 붙이고, 각 페이지의 시작 위치(문자 오프셋)를 함께 반환
+def join_pages(pages):
+    offsets = []
+    position = 0
+    for page_text in pages:
+        offsets.append(position)
+        position += len(page_text) + len(PAGE_SEPARATOR)
+    return PAGE_SEPARATOR.join(pages), offsets
+
+
+# 문서 전체 텍스트에서 n번째(0부터) 페이지 텍스트 잘라내기
+def page_text(text, page_offsets, index):
+    start = page_offsets[index]
+    end = page_offsets[index + 1] - len(PAGE_SEPARATOR) if index + 1 < len(page_offsets) else len(text)
+    return text[start:end]
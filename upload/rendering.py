@@ -0,0 +1,179 @@
+import hashlib
+import io
+import json
+import os
+import threading
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from core.metrics import stage
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import KeepTogether, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+# 요약본 PDF 렌더러
+# - 폰트 등록(TTF 파싱)과 스타일시트 구성은 프로세스당 한 번만 수행
+# - 렌더링 결과는 입력 내용 해시 이름으로 저장해, 같은 내용이면 다시 그리지 않음
+#   (제목은 문서마다 다르므로 내용 해시와 따로 이름에 붙임 → 같은 분석 결과라도 다른 사람의 파일명이 들어간 PDF 를 공유하지 않음)
+
+# 레이아웃/스타일을 바꾸면 올려서 기존에 저장된 요약본을 무효화
+RENDERER_VERSION = "1"
+
+FONTS = {
+    'NanumGothic': 'NanumGothic-Regular.ttf',
+    'NanumGothic-Bold': 'NanumGothic-Bold.ttf',
+    'NanumGothic-ExtraBold': 'NanumGothic-ExtraBold.ttf',
+}
+
+RISK_BADGE_COLORS = {
+    'low': (colors.HexColor('#E8F5E9'), colors.HexColor('#1B5E20')),
+    'mid': (colors.HexColor('#FFF3E0'), colors.HexColor('#E65100')),
+    'high': (colors.HexColor('#FFEBEE'), colors.HexColor('#B71C1C')),
+}
+
+
+class SummaryRenderer:
+    def __init__(self, font_dir):
+        self.font_dir = font_dir
+        self.styles = None
+        self.badge_styles = {}
+        self._lock = threading.Lock()
+
+    # 폰트 등록 + 스타일 구성 (최초 1회)
+    def load(self, force=False):
+        if self.styles is not None and not force:
+            return
+        with self._lock:
+            if self.styles is not None and not force:
+                return
+
+            registered = pdfmetrics.getRegisteredFontNames()
+            for name, file_name in FONTS.items():
+                if force or name not in registered:
+                    pdfmetrics.registerFont(TTFont(name, os.path.join(self.font_dir, file_name)))
+
+            styles = getSampleStyleSheet()
+            styles.add(ParagraphStyle(name='H1', parent=styles['Normal'], fontName='NanumGothic-ExtraBold', fontSize=18, spaceAfter=12))
+            styles.add(ParagraphStyle(name='H2', parent=styles['Normal'], fontName='NanumGothic-Bold', fontSize=14, spaceBefore=6, spaceAfter=6))
+            styles.add(ParagraphStyle(name='Label', parent=styles['Normal'], fontName='NanumGothic-Bold', fontSize=11, textColor=colors.HexColor('#374151'), spaceBefore=4, spaceAfter=2))
+            styles.add(ParagraphStyle(name='Body', parent=styles['Normal'], fontName='NanumGothic', fontSize=11, leading=16))
+            styles.add(ParagraphStyle(name='Quote', parent=styles['Normal'], fontName='NanumGothic', fontSize=10.5, backColor=colors.HexColor('#F9FAFB'), borderWidth=1, borderColor=colors.HexColor('#E5E7EB'), borderPadding=6, leading=15))
+
+            self.badge_styles = {
+                risk: ParagraphStyle(name=f'Badge-{risk}', fontName='NanumGothic-Bold', fontSize=9, textColor=fg)
+                for risk, (_, fg) in RISK_BADGE_COLORS.items()
+            }
+            self.styles = styles
+
+    def _risk_badge(self, text, risk):
+        # 작은 1행 테이블로 배지 스타일 구성
+        bg, fg = RISK_BADGE_COLORS.get(risk, (colors.whitesmoke, colors.black))
+        style = self.badge_styles.get(risk) or ParagraphStyle(name='Badge', fontName='NanumGothic-Bold', fontSize=9, textColor=fg)
+        t = Table([[Paragraph(text, style)]], colWidths=[45])
+        t.setStyle(TableStyle([
+            ('BACKGROUND', (0,0), (-1,-1), bg),
+            ('BOX', (0,0), (-1,-1), 0.5, bg),
+            ('INNERPADDING', (0,0), (-1,-1), 3),
+        ]))
+        return t
+
+    def _divider(self):
+        line = Table([['']], colWidths=['*'], rowHeights=[1])
+        line.setStyle(TableStyle([
+            ('BACKGROUND', (0,0), (-1,-1), colors.HexColor('#E5E7EB')),
+        ]))
+        return line
+
+    # 요약 컨텍스트(하이라이트, 조항 목록) → PDF bytes
+    def render(self, title, highlights, clauses):
+        self.load()
+        styles = self.styles
+
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4)
+
+        elements = []
+        # 문서 제목
+        elements.append(Paragraph(f"{title} 요약본", styles['H1']))
+        elements.append(self._divider())
+        elements.append(Spacer(1, 8))
+
+        if highlights:
+            elements.append(Spacer(1, 10))
+            elements.append(Paragraph('핵심 시정 권고', styles['H2']))
+            for h in highlights[:5]:
+                elements.append(Paragraph(f"• {h}", styles['Body']))
+
+        elements.append(Spacer(1, 12))
+        elements.append(self._divider())
+        elements.append(Spacer(1, 8))
+        elements.append(Paragraph('조항별 분석', styles['H2']))
+
+        # 조항 카드 반복
+        for idx, c in enumerate(clauses, 1):
+            header = Table([[Paragraph(f"[{idx}] {c['title']}", styles['H2']), self._risk_badge(c['risk'].upper(), c['risk'])]], colWidths=['*', 55])
+            header.setStyle(TableStyle([
+                ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+                ('ALIGN', (1,0), (1,0), 'RIGHT'),
+            ]))
+
+            # 섹션 블록들(원문/법령/해설/개선안)
+            blocks = []
+            blocks.append(Paragraph('원문', styles['Label']))
+            blocks.append(Paragraph(f"\"{c['original']}\"", styles['Body']))
+            blocks.append(Paragraph('관련 법령', styles['Label']))
+            blocks.append(Paragraph(c['law'], styles['Body']))
+            blocks.append(Paragraph('해설', styles['Label']))
+            blocks.append(Paragraph(c['commentary'], styles['Body']))
+            blocks.append(Paragraph('개선안', styles['Label']))
+            blocks.append(Paragraph(c['recommendation'], styles['Body']))
+
+            elements.append(KeepTogether([header] + blocks + [Spacer(1, 10)]))
+
+        doc.build(elements)
+        return buffer.getvalue()
+
+
+# 렌더링 입력 내용 해시 (제목 제외)
+def content_key(highlights, clauses):
+    payload = json.dumps([RENDERER_VERSION, highlights, clauses], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# 저장 이름: 내용 해시 + 제목 해시 (같은 내용, 같은 제목이면 같은 PDF)
+def summary_name(title, highlights, clauses):
+    title_key = hashlib.sha256((title or "").encode("utf-8")).hexdigest()[:16]
+    return f"summaries/{content_key(highlights, clauses)}-{title_key}.pdf"
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+# 프로세스 공용 렌더러 (폰트/스타일이 로드된 상태로 재사용)
+def get_renderer():
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = SummaryRenderer(os.path.join(settings.BASE_DIR, 'fonts'))
+    return _renderer
+
+
+def render_summary_pdf(title, highlights, clauses):
+    return get_renderer().render(title, highlights, clauses)
+
+
+# 요약본을 내용 해시 이름으로 저장 (이미 있으면 렌더링하지 않고 기존 파일 이름 반환)
+def render_to_storage(title, highlights, clauses):
+    name = summary_name(title, highlights, clauses)
+    if default_storage.exists(name):
+        return name
+    with stage("render"):
+        content = render_summary_pdf(title, highlights, clauses)
+    with stage("storage_write"):
+        return default_storage.save(name, ContentFile(content))
@@ -1,50 +1,295 @@
-from django.test import TestCase
-from rest_framework.parsers import MultiPartParser
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from core.models import Document
-from core.models import User
-
-# PDF 문서 업로드 기능
-class DocumentUploadView(APIView):
-    # 로그인 api 추가되면 주석 삭제하면 됨 
-    # permission_classes = [IsAuthenticated]
-    parser_classes = [MultiPartParser]
-
-    @swagger_auto_schema(
-        operation_summary="PDF 문서 업로드 API",
-        manual_parameters=[
-            openapi.Parameter(
-                'file', openapi.IN_FORM,  # form-data에 들어가는 값
-                description="업로드할 PDF 파일",
-                type=openapi.TYPE_FILE,
-                required=True
-            ),
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import AnalysisJob, ClauseAnalysis, Document, User
+
+from .chunking import _prefix_length, build_chunks, split_clauses
+from .jobs import enqueue_analysis, run_analysis_job
+from .handlers import ERROR_NOT_PDF, ERROR_TOO_LARGE, PDFIngestUploadHandler
+from .views import (
+    SUMMARY_MODEL, analysis_version, clause_stats, ensure_summary_pdf, load_summary_context, merge_summary_items,
+    save_clause_analysis, summarize_contract, summary_chunk_tokens,
+)
+
+CONTRACT = "용역 계약서\n제1조 (목적) 이 계약은 용역의 범위를 정한다.\n제2조 (기간) 계약 기간은 1년으로 한다.\n제 3 조의2 (해지) 갑은 언제든지 해지할 수 있다."
+
+
+# 업로드/렌더링 파일은 테스트마다 임시 MEDIA_ROOT 에 저장하고 끝나면 삭제
+def use_temp_media(test):
+    media_root = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+    override = override_settings(MEDIA_ROOT=media_root)
+    override.enable()
+    test.addCleanup(override.disable)
+    return media_root
+
+
+# 조항 경계 기준 청크 분할
+class ChunkingTests(SimpleTestCase):
+    def test_split_clauses_keeps_preamble(self):
+        clauses = split_clauses(CONTRACT)
+        self.assertEqual(len(clauses), 4)
+        self.assertEqual(clauses[0], "용역 계약서")
+        self.assertTrue(clauses[3].startswith("제 3 조의2"))
+
+    def test_chunks_do_not_cut_clauses(self):
+        clauses = split_clauses(CONTRACT)
+        limit = len(clauses[0]) + len(clauses[1]) + 2  # 머리말 + 제1조 까지만 들어감
+        chunks = build_chunks(CONTRACT, limit)
+        self.assertEqual(chunks[0], f"{clauses[0]}\n\n{clauses[1]}")
+        for chunk in chunks[1:]:
+            self.assertIn(chunk, clauses)
+
+    def test_long_clause_is_split_within_limit(self):
+        clause = "제1조 (정의)\n" + "\n".join("가" * 30 for _ in range(5)) + "\n" + "나" * 100
+        chunks = build_chunks(clause, 40)
+        self.assertTrue(all(len(chunk) <= 40 for chunk in chunks))
+        self.assertEqual("".join(chunks).replace("\n", ""), clause.replace("\n", ""))
+
+    def test_custom_size_function(self):
+        double = lambda text: len(text) * 2  # noqa: E731
+        chunks = build_chunks("제1조 " + "다" * 50, 20, size=double)
+        self.assertTrue(all(double(chunk) <= 20 for chunk in chunks))
+
+    def test_prefix_length(self):
+        self.assertEqual(_prefix_length("가" * 10, 4, len), 4)
+        self.assertEqual(_prefix_length("가" * 10, 7, lambda text: len(text) * 2), 3)
+        self.assertEqual(_prefix_length("가" * 10, 1, lambda text: len(text) * 2), 1)  # 최소 1글자
+
+
+# 청크별 요약 결과 병합
+class MergeSummaryTests(SimpleTestCase):
+    def test_duplicate_sentences_are_merged(self):
+        first = [{"sentence": "갑은 해지할 수 있다.", "types": ["toxin"], "risk": "mid"}]
+        second = [
+            {"sentence": "갑은  해지할 수\n있다.", "types": ["ambiguous", "toxin"], "risk": "High"},
+            {"sentence": "을은 비밀을 유지한다.", "types": [], "risk": "low"},
         ]
-    )
-
-    # 클라이언트가 보낸 파일 받아오기
-    def post(self, request):
-        user = User.objects.get(user_id='testuser')
-        # user = request.user
-        file = request.FILES.get('file')
-
-        if not file:
-            return Response({'error': '파일이 없습니다.'}, status=400)
-
-        if not file.name.endswith('.pdf'):
-            return Response({'error': 'PDF 파일만 업로드 가능합니다.'}, status=400)
-
-        document = Document.objects.create(
-            user=user,
-            file=file,  # /media/documents 디렉터리에 저장됨 
-            file_name=file.name,
-            extracted_text='',
-            summary_text='',
-            chat_name=''
-        )
-
-        return Response({'message': '업로드 성공', 'document_id': document.id})
\ No newline at end of file
+        merged = merge_summary_items([first, second])
+        self.assertEqual(len(merged), 2)
+        self.assertEqual(merged[0]["types"], ["toxin", "ambiguous"])
+        self.assertEqual(merged[0]["risk"], "High")
+
+    def test_lower_risk_does_not_override(self):
+        items = [[{"sentence": "문장", "risk": "high"}], [{"sentence": "문장", "risk": "low"}]]
+        self.assertEqual(merge_summary_items(items)[0]["risk"], "high")
+
+    def test_items_without_sentence_use_title_and_law(self):
+        items = [[{"title": "해지", "law": "민법"}, {"title": "해지", "law": "상법"}, "잘못된 항목"]]
+        self.assertEqual(len(merge_summary_items(items)), 2)
+
+
+# 청크 요약(map) → 병합(reduce), 일부 청크 실패 시 전체 실패
+@mock.patch("upload.views.summary_chunk_tokens", return_value=30)
+class SummarizeContractTests(SimpleTestCase):
+    def test_chunks_are_summarized_and_merged(self, _):
+        def summarize(text, user_id=None):
+            return json.dumps([{"sentence": text.splitlines()[0], "risk": "low"}], ensure_ascii=False)
+
+        with mock.patch("upload.views.summarize_text_with_openai", side_effect=summarize) as call:
+            items = summarize_contract(CONTRACT)
+        self.assertGreater(call.call_count, 1)
+        self.assertEqual(len(items), call.call_count)
+
+    def test_invalid_chunk_fails_whole_summary(self, _):
+        responses = iter(['[{"sentence": "a"}]', "요약할 수 없습니다."] + ['[]'] * 10)
+        with mock.patch("upload.views.SUMMARY_MAX_PARALLEL", 1), \
+                mock.patch("upload.views.summarize_text_with_openai", side_effect=lambda *args: next(responses)):
+            with self.assertRaises(ValueError):
+                summarize_contract(CONTRACT)
+
+    def test_failed_call_fails_whole_summary(self, _):
+        with mock.patch("upload.views.summarize_text_with_openai", side_effect=RuntimeError("boom")):
+            with self.assertRaises(ValueError):
+                summarize_contract(CONTRACT)
+
+
+# 분석 캐시 버전은 실제로 쓰이는 청크 크기를 따름
+class AnalysisVersionTests(SimpleTestCase):
+    def test_version_follows_effective_chunk_size(self):
+        version, chunk_tokens = analysis_version(), summary_chunk_tokens()
+        with override_settings(LLM_CONTEXT_TOKENS={SUMMARY_MODEL: 6000}):
+            self.assertLess(summary_chunk_tokens(), chunk_tokens)
+            self.assertNotEqual(analysis_version(), version)
+        self.assertEqual(analysis_version(), version)
+
+
+PDF_BYTES = b"%PDF-1.4\n" + b"0" * 3000 + b"\n%%EOF"
+
+
+# 업로드 스트리밍 수집 (해시/크기/시그니처 검사)
+class PDFIngestUploadHandlerTests(SimpleTestCase):
+    def ingest(self, data, max_bytes=10_000, chunk=1000):
+        handler = PDFIngestUploadHandler(max_bytes=max_bytes)
+        handler.handle_raw_input(None, {}, len(data), b"boundary")
+        handler.new_file("file", "a.pdf", "application/pdf", len(data))
+        for start in range(0, len(data), chunk):
+            handler.receive_data_chunk(data[start:start + chunk], start)
+        file = handler.file_complete(len(data))
+        self.addCleanup(file.close)
+        return file
+
+    def test_pdf_is_hashed_while_streaming(self):
+        file = self.ingest(PDF_BYTES)
+        self.assertIsNone(file.ingest_error)
+        self.assertEqual(file.sha256, hashlib.sha256(PDF_BYTES).hexdigest())
+        self.assertEqual(file.size, len(PDF_BYTES))
+        file.seek(0)
+        self.assertEqual(file.read(), PDF_BYTES)
+
+    def test_non_pdf_is_rejected(self):
+        self.assertEqual(self.ingest(b"hello" * 1000).ingest_error, ERROR_NOT_PDF)
+        self.assertEqual(self.ingest(b"short").ingest_error, ERROR_NOT_PDF)  # 1KB 보다 작은 파일
+
+    def test_oversized_file_is_rejected(self):
+        self.assertEqual(self.ingest(PDF_BYTES, max_bytes=2000).ingest_error, ERROR_TOO_LARGE)
+
+
+# 업로드 API 의 파일 검사 응답
+class DocumentUploadValidationTests(TestCase):
+    def setUp(self):
+        use_temp_media(self)
+        self.user = User.objects.create_user(user_id="tester", user_name="테스터", password="pw-1234")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, data):
+        return self.client.post("/upload/documents/", {"file": SimpleUploadedFile("a.pdf", data)}, format="multipart")
+
+    def test_missing_file(self):
+        self.assertEqual(self.client.post("/upload/documents/", {}, format="multipart").status_code, 400)
+
+    def test_non_pdf(self):
+        self.assertEqual(self.upload(b"not a pdf").status_code, 400)
+        self.assertFalse(Document.objects.exists())
+
+    @override_settings(UPLOAD_MAX_BYTES=2000)
+    def test_too_large(self):
+        self.assertEqual(self.upload(PDF_BYTES).status_code, 413)
+        self.assertFalse(Document.objects.exists())
+
+
+# 백그라운드 분석 작업 (접수 → 단계별 진행 → 완료/실패, 상태 조회 API)
+@mock.patch("upload.jobs.remember_analysis", return_value=None)
+@mock.patch("upload.views.extract_pages_from_pdf", return_value=("제1조 (목적) 용역 계약", [0]))
+class AnalysisJobTests(TestCase):
+    def setUp(self):
+        use_temp_media(self)
+        self.user = User.objects.create_user(user_id="tester", user_name="테스터", password="pw-1234")
+        self.document = Document.objects.create(user=self.user, file="documents/a.pdf", file_name="a", chat_name="a", extracted_text="")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def status(self):
+        return self.client.get(f"/upload/documents/{self.document.id}/status/")
+
+    def test_job_runs_after_commit(self, *_):
+        with mock.patch("upload.jobs.submit") as submit, self.captureOnCommitCallbacks(execute=True):
+            job = enqueue_analysis(self.document)
+        submit.assert_called_once_with(run_analysis_job, job.id)
+        self.assertEqual(self.status().data["status"], AnalysisJob.STATUS_QUEUED)
+
+    def test_successful_job(self, *_):
+        job = AnalysisJob.objects.create(document=self.document)
+        with mock.patch("upload.views.summarize_contract", return_value=[{"sentence": "용역 계약", "types": ["main"], "risk": "low"}]):
+            run_analysis_job(job.id)
+
+        data = self.status().data
+        self.assertEqual(data["status"], AnalysisJob.STATUS_DONE)
+        self.assertEqual(set(data["stage_timings"]), {AnalysisJob.STATUS_EXTRACTING, AnalysisJob.STATUS_SUMMARIZING})
+        self.assertIn("duration_ms", data["stage_timings"][AnalysisJob.STATUS_EXTRACTING])
+        self.assertEqual(data["stats"]["total"], 1)
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.extracted_text, "제1조 (목적) 용역 계약")
+
+    def test_summary_error_is_shown_to_user(self, *_):
+        job = AnalysisJob.objects.create(document=self.document)
+        with mock.patch("upload.views.summarize_contract", side_effect=ValueError("요약 실패")), self.assertLogs("upload.jobs", "ERROR"):
+            run_analysis_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (AnalysisJob.STATUS_FAILED, "요약 실패"))
+        self.assertIsNotNone(job.finished_at)
+
+        # 추출 단계 결과는 요약 실패와 무관하게 저장됨
+        self.document.refresh_from_db()
+        self.assertEqual((self.document.extracted_text, self.document.page_offsets), ("제1조 (목적) 용역 계약", [0]))
+        self.assertGreater(self.document.token_count, 0)
+
+    def test_unexpected_error_is_hidden(self, *_):
+        job = AnalysisJob.objects.create(document=self.document)
+        with mock.patch("upload.views.summarize_contract", side_effect=KeyError("내부 오류")), self.assertLogs("upload.jobs", "ERROR"):
+            run_analysis_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (AnalysisJob.STATUS_FAILED, "문서 분석 중 오류가 발생했습니다."))
+
+    def test_stale_jobs_are_failed(self, *_):
+        old = timezone.now() - timedelta(hours=2)
+        stuck = AnalysisJob.objects.create(document=self.document, status=AnalysisJob.STATUS_SUMMARIZING, started_at=old)
+        queued = AnalysisJob.objects.create(document=self.document)
+        AnalysisJob.objects.filter(pk=queued.pk).update(created_at=old)
+        finished = AnalysisJob.objects.create(document=self.document, status=AnalysisJob.STATUS_DONE, started_at=old)
+        running = AnalysisJob.objects.create(document=self.document, status=AnalysisJob.STATUS_EXTRACTING, started_at=timezone.now())
+
+        self.assertEqual(AnalysisJob.objects.fail_stale(timezone.now() - timedelta(hours=1), "시간 초과"), 2)
+        statuses = dict(AnalysisJob.objects.values_list("pk", "status"))
+        self.assertEqual(statuses[stuck.pk], AnalysisJob.STATUS_FAILED)
+        self.assertEqual(statuses[queued.pk], AnalysisJob.STATUS_FAILED)
+        self.assertEqual(statuses[finished.pk], AnalysisJob.STATUS_DONE)
+        self.assertEqual(statuses[running.pk], AnalysisJob.STATUS_EXTRACTING)
+
+    def test_status_of_other_users_document(self, *_):
+        AnalysisJob.objects.create(document=self.document)
+        other = User.objects.create_user(user_id="other", user_name="다른", password="pw-1234")
+        self.client.force_authenticate(other)
+        self.assertEqual(self.status().status_code, 404)
+
+
+# 조항별 분석 결과 저장과 재구성
+class ClauseAnalysisTests(TestCase):
+    ITEMS = [
+        {"title": "해지", "risk": "HIGH", "types": ["toxin", "ambi"], "sentence": "갑은 언제든지 해지할 수 있다.", "law": "민법 제673조"},
+        {"title": "기간", "risk": "unknown", "types": ["main", 3], "sentence": "계약 기간은 1년으로 한다."},
+        "잘못된 항목",
+    ]
+
+    def setUp(self):
+        self.media_root = use_temp_media(self)
+        user = User.objects.create_user(user_id="tester", user_name="테스터", password="pw-1234")
+        self.document = Document.objects.create(user=user, file="documents/a.pdf", file_name="a", chat_name="a", extracted_text="")
+
+    def test_items_are_normalized(self):
+        save_clause_analysis(self.document, self.ITEMS)
+        first, second = ClauseAnalysis.objects.filter(document=self.document)
+        self.assertEqual((first.position, first.risk, first.is_toxin, first.is_ambi, first.is_main), (0, "high", True, True, False))
+        self.assertEqual((second.risk, second.types, second.is_main), ("low", ["main"], True))
+
+    def test_saving_again_replaces_previous_result(self):
+        save_clause_analysis(self.document, self.ITEMS)
+        save_clause_analysis(self.document, self.ITEMS[:1])
+        self.assertEqual(ClauseAnalysis.objects.filter(document=self.document).count(), 1)
+
+    def test_stats_and_summary_context_come_from_rows(self):
+        save_clause_analysis(self.document, self.ITEMS)
+        stats = clause_stats(self.document)
+        self.assertEqual((stats["total"], stats["toxin"], stats["main"], stats["risk_high"], stats["risk_low"]), (2, 1, 1, 1, 1))
+
+        _, _, clauses = load_summary_context(self.document)
+        self.assertEqual([c["title"] for c in clauses], ["해지", "기간"])
+        self.assertEqual(clauses[1]["law"], "-")
+
+    def test_summary_pdf_is_rendered_into_media_root(self):
+        self.assertIsNone(ensure_summary_pdf(self.document))
+        save_clause_analysis(self.document, self.ITEMS)
+        name = ensure_summary_pdf(self.document)
+        self.assertTrue(os.path.isfile(os.path.join(self.media_root, name)))
+        self.assertEqual(ensure_summary_pdf(self.document), name)
@@ -4,4 +4,5 @@ from .import views
 
 urlpatterns = [
     path('documents/', views.DocumentUploadView.as_view(), name='upload'),
+    path('documents/<int:document_id>/status/', views.DocumentStatusView.as_view(), name='upload-status'),
 ]
\ No newline at end of file
@@ -4,57 +4,85 @@ from drf_yasg import openapi
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from core.models import Document
-import pdfplumber
-from openai import OpenAI
+from core.models import Document, AnalysisJob, ClauseAnalysis
+from config.db_router import ReplicaRoutingMixin
+from .pdf_text import extract_pages, join_pages
+from .chunking import build_chunks
+from .rendering import render_to_storage
+from consult.retrieval import build_document_index
+from core.llm import chat_completion
+from core.llm_resilience import LLMUnavailable, ensure_available
+from core.tokens import ContextBudget, count_tokens
+from core.metrics import stage
 from django.conf import settings
 import os
 from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
 from rest_framework import status
 import json
-from django.core.files.base import ContentFile
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, KeepTogether, PageBreak
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-import io
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+from django.db import transaction
+from django.db.models import Count, Q
 from datetime import datetime
+from .jobs import enqueue_analysis, record_cache_hit
+from .dedupe import attach_cached_analysis, compute_sha256, find_cached_analysis, store_original
+from .handlers import ERROR_NOT_PDF, ERROR_TOO_LARGE, PDFIngestUploadHandler
+
+# PDF 텍스트 추출 함수 (전체 텍스트, 페이지별 시작 오프셋 반환)
+# 파일 경로가 주어지면 페이지 구간을 프로세스 풀에 나눠 병렬 추출함
+def extract_pages_from_pdf(file):
+    pages = extract_pages(
+        file,
+        workers=getattr(settings, "PDF_EXTRACT_WORKERS", 1),
+        pages_per_task=getattr(settings, "PDF_EXTRACT_PAGES_PER_TASK", 8),
+    )
+    return join_pages(pages)
 
-# PDF 텍스트 추출 함수
 def extract_text_from_pdf(file):
-    text = ''   # 텍스트 담을 변수 
-    with pdfplumber.open(file) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() or ''
+    text, _ = extract_pages_from_pdf(file)
     return text
 
-# 요약 함수 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
-
-def summarize_text_with_openai(text):
-    try:
-        prompt = GUIDELINE_PROMPT.replace("{{context}}", "").replace("{{user_question}}", text)
-
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a helpful AI assistant specialized in legal contract review. 모든 답변은 한국어로 제공하세요."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.5,
-            max_tokens=2500,
-        )
+# 요약 함수 (동일 요청은 core.llm 응답 캐시에서 반환)
+SUMMARY_MODEL = "gpt-4o"
+SUMMARY_SYSTEM_PROMPT = "You are a helpful AI assistant specialized in legal contract review. 모든 답변은 한국어로 제공하세요."
+SUMMARY_CHUNK_TOKENS = getattr(settings, "SUMMARY_CHUNK_TOKENS", 3000)  # 요약 호출 1회에 보내는 원문 토큰 수(청크 크기)
+SUMMARY_MAX_TOKENS = 2500                                               # 청크 1개 요약 응답 최대 토큰
+SUMMARY_MAX_PARALLEL = getattr(settings, "SUMMARY_MAX_PARALLEL", 4)     # 동시에 진행할 청크 요약 호출 수
+SUMMARY_TIMEOUT = getattr(settings, "LLM_SUMMARY_TIMEOUT", 120)         # 청크 1개 요약의 마감 시간(초, 재시도 포함)
+
+# OpenAI 호출 실패(한도 초과, 네트워크 오류 등)는 예외로 올려 "JSON 형식 오류"와 구분함
+def summarize_text_with_openai(text, user_id=None):
+    prompt = GUIDELINE_PROMPT.replace("{{context}}", "").replace("{{user_question}}", text)
+
+    result = chat_completion(
+        model=SUMMARY_MODEL,
+        messages=[
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.5,
+        max_tokens=SUMMARY_MAX_TOKENS,
+        timeout=SUMMARY_TIMEOUT,
+        endpoint="summary",
+        user_id=user_id,
+        validate=lambda content: validate_summary_json(strip_code_fence(content)),  # JSON 배열이 아닌 응답은 캐시하지 않음
+    )
+    result = strip_code_fence(result)
+    print("✅ GPT 원본 응답:", repr(result[:1000]))
+    return result
 
-        result = response.choices[0].message.content.strip()
-        result = result.replace("```json", "").replace("```", "").strip()  # 백틱 제거
-        print("✅ GPT 원본 응답:", repr(result[:1000]))
-        return result
+# 응답을 감싼 ```json 백틱 제거
+def strip_code_fence(text):
+    return text.replace("```json", "").replace("```", "").strip()
 
+# 청크 1개 요약 → (응답, 예외)
+def _summarize_chunk(text, user_id=None):
+    try:
+        return summarize_text_with_openai(text, user_id), None
     except Exception as e:
-        print(f"OpenAI 요약 실패: {e}")
-        return ""
+        print(f"OpenAI 요약 실패: {type(e).__name__} - {e}")
+        return "", e
 
 # 요약 결과가 JSON 형식인지 확인하는 함수
 def validate_summary_json(json_text):
@@ -63,8 +91,61 @@ def validate_summary_json(json_text):
         if not isinstance(parsed, list):  # 리스트 형식이 아닌 경우 예외 발생
             raise ValueError("요약 데이터는 리스트가 아닙니다.")
         return True  # 유효한 JSON
-    except json.JSONDecodeError:
-        return False  # 파싱 실패
+    except ValueError:
+        return False  # 파싱 실패 또는 리스트가 아님
+
+# 청크별 요약 결과(JSON 배열들)를 하나로 병합 - 같은 원문 문장은 한 번만 남기고 유형/위험도는 합침
+RISK_ORDER = {"low": 0, "mid": 1, "high": 2}
+
+def merge_summary_items(results):
+    merged = {}
+    for items in results:
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            key = re.sub(r"\s+", "", item.get("sentence") or "") or (item.get("title"), item.get("law"))
+            if key not in merged:
+                merged[key] = dict(item)
+                continue
+
+            existing = merged[key]
+            types = list(existing.get("types") or [])
+            types += [t for t in (item.get("types") or []) if t not in types]
+            existing["types"] = types
+            if RISK_ORDER.get(str(item.get("risk")).lower(), 0) > RISK_ORDER.get(str(existing.get("risk")).lower(), 0):
+                existing["risk"] = item.get("risk")
+    return list(merged.values())
+
+# 청크 크기(토큰): SUMMARY_CHUNK_TOKENS 와, 모델 컨텍스트에서 응답/시스템 프롬프트/지침을 뺀 남은 예산 중 작은 값
+def summary_chunk_tokens():
+    budget = ContextBudget(SUMMARY_MODEL, SUMMARY_MAX_TOKENS)
+    budget.reserve(SUMMARY_SYSTEM_PROMPT)
+    budget.reserve(GUIDELINE_PROMPT.replace("{{context}}", "").replace("{{user_question}}", ""))
+    return max(1, budget.take(SUMMARY_CHUNK_TOKENS))
+
+# 긴 계약서를 조항 단위 청크로 나눠 동시에 요약(map)한 뒤 결과를 병합(reduce)
+# user_id: 사용량 기록(LLMCallLog)용
+def summarize_contract(text, user_id=None):
+    chunks = build_chunks(text, summary_chunk_tokens(), size=count_tokens)
+    if not chunks:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(SUMMARY_MAX_PARALLEL, len(chunks)))) as pool:
+        outcomes = list(pool.map(_summarize_chunk, chunks, [user_id] * len(chunks)))
+
+    # 호출 자체가 실패한 청크가 있으면 일부 조항이 빠진 결과가 캐시되지 않도록 전체 실패 처리 (remember_analysis 전에 중단)
+    errors = [e for _, e in outcomes if e is not None]
+    if errors:
+        if isinstance(errors[0], LLMUnavailable):
+            raise ValueError("OpenAI 호출이 많거나 응답이 없어 요약하지 못했습니다. 잠시 후 다시 시도해주세요.")
+        raise ValueError(f"OpenAI 요약 호출에 실패했습니다 ({len(errors)}/{len(chunks)}개 구간).")
+
+    # 응답이 JSON 배열이 아닌 청크가 하나라도 있으면 일부 조항이 빠지므로 마찬가지로 전체 실패 처리
+    responses = [r for r, _ in outcomes]
+    invalid = sum(not validate_summary_json(r) for r in responses)
+    if invalid:
+        raise ValueError(f"OpenAI 요약 결과가 유효한 JSON 형식이 아닙니다 ({invalid}/{len(chunks)}개 구간).")
+    return merge_summary_items([json.loads(r) for r in responses])
 
 # 요약 JSON을 PDF 템플릿용 컨텍스트로 변환
 from collections import Counter
@@ -114,11 +195,58 @@ def build_summary_context(items):
 
     return stats, highlights, clauses
 
+# 조항별 분석 결과 저장 (재분석 시 기존 결과를 교체)
+def save_clause_analysis(document, items):
+    ClauseAnalysis.objects.filter(document=document).delete()
+    ClauseAnalysis.objects.bulk_create([
+        ClauseAnalysis.from_item(document, position, item)
+        for position, item in enumerate(items)
+        if isinstance(item, dict)
+    ])
+
+# DB에 저장된 조항 분석으로 요약본 컨텍스트 재구성 (LLM 재호출 없음)
+def load_summary_context(document):
+    items = [c.as_item() for c in ClauseAnalysis.objects.filter(document=document).order_by('position')]
+    return build_summary_context(items)
+
+# 조항 통계 집계 (build_summary_context 의 stats 와 같은 키)
+def clause_stats(document):
+    return ClauseAnalysis.objects.filter(document=document).aggregate(
+        total=Count('id'),
+        main=Count('id', filter=Q(is_main=True)),
+        toxin=Count('id', filter=Q(is_toxin=True)),
+        ambi=Count('id', filter=Q(is_ambi=True)),
+        risk_high=Count('id', filter=Q(risk='high')),
+        risk_mid=Count('id', filter=Q(risk='mid')),
+        risk_low=Count('id', filter=Q(risk='low')),
+    )
+
+# 요약본 PDF 준비 - 없으면 DB에 저장된 조항 분석으로 렌더링 (같은 내용/제목의 PDF가 이미 저장돼 있으면 재사용)
+# 제목은 문서 이름 (문서마다 다르므로 분석 캐시에는 요약본을 공유하지 않음)
+# 분석이 끝나지 않은 문서는 None 반환 (분석 캐시 항목이 지워져도 문서의 조항 분석이 남아 있으면 렌더링)
+def ensure_summary_pdf(document):
+    if document.summary_file:
+        return document.summary_file.name
+    if not document.analysis_id and not ClauseAnalysis.objects.filter(document=document).exists():
+        return None
+
+    _, highlights, clauses = load_summary_context(document)
+    name = render_to_storage(document.file_name or "", highlights, clauses)
+
+    document.summary_file.name = name
+    document.save(update_fields=["summary_file"])
+    return name
+
 # PDF 문서 업로드 기능
-class DocumentUploadView(APIView):
+class DocumentUploadView(ReplicaRoutingMixin, APIView):
     permission_classes = [IsAuthenticated]  # 장고에서 제공하는 권한 클래스
     parser_classes = [MultiPartParser]  # 파일 데이터를 안전하게 읽도록 도와주는 역할 
 
+    # 업로드 본문을 파싱하기 전에 스트리밍 수집 핸들러(해시/크기/시그니처 검사) 지정
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [PDFIngestUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
     def handle_exception(self, exc):
         if isinstance(exc, (AuthenticationFailed, NotAuthenticated)):
             return Response(
@@ -129,6 +257,7 @@ class DocumentUploadView(APIView):
 
     @swagger_auto_schema(
         operation_summary="PDF 문서 업로드",
+        operation_description="원본 PDF를 저장하고 즉시 202를 반환합니다. 텍스트 추출·요약·요약본 생성은 백그라운드에서 진행되며, 진행 상황은 상태 조회 API로 확인합니다.",
         manual_parameters=[
             openapi.Parameter(
                 'file', openapi.IN_FORM,  # form-data에 들어가는 값
@@ -138,30 +267,50 @@ class DocumentUploadView(APIView):
             ),
         ],
         responses={
-            200: openapi.Response('업로드 성공'),
-            400: openapi.Response('요청 오류'),
+            202: openapi.Response('업로드 접수 (분석 진행 중)'),
+            400: openapi.Response('요청 오류 (파일 없음, PDF 아님)'),
             401: openapi.Response('액세스 토큰 만료 또는 유효하지 않음'),
+            413: openapi.Response('파일 크기 초과'),
+            503: openapi.Response('AI 서비스 일시 중단 (Retry-After 후 재시도)'),
         }
     )
 
     # 클라이언트가 보낸 파일 받아오기
+    # 단계별 시간(/metrics): receive(본문 수신/파싱) → dedupe_lookup → storage_write → db_insert
+    # 추출/요약/렌더링은 분석 작업(analysis_job)에서 따로 측정
     def post(self, request):
         user = request.user
-        file = request.FILES.get('file')
+        with stage("receive"):
+            file = request.FILES.get('file')
 
         if not file:
             return Response({'error': '파일이 없습니다.'}, status=400)
 
-        if not file.name.endswith('.pdf'):
+        # 파일 내용 검사 결과 (확장자 대신 %PDF 시그니처, 최대 크기)
+        ingest_error = getattr(file, 'ingest_error', None)
+        if ingest_error == ERROR_TOO_LARGE:
+            max_mb = getattr(settings, "UPLOAD_MAX_BYTES", 0) // (1024 * 1024)
+            return Response({'error': f'파일 크기는 {max_mb}MB 를 넘을 수 없습니다.'}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if ingest_error == ERROR_NOT_PDF:
             return Response({'error': 'PDF 파일만 업로드 가능합니다.'}, status=400)
 
-        # 텍스트 자동 추출
-        extracted_text = extract_text_from_pdf(file)
-        summary_text = summarize_text_with_openai(extracted_text[:3000])
-
-        # 요약 결과가 유효한 JSON인지 검사
-        if not validate_summary_json(summary_text):
-            return Response({'error': 'OpenAI 요약 결과가 유효한 JSON 형식이 아닙니다.'}, status=400)
+        # 같은 파일 + 같은 분석 버전이면 추출/요약 결과와 저장된 PDF를 그대로 재사용
+        # (해시는 업로드를 받으면서 계산됨, 다른 핸들러로 들어온 경우에만 다시 읽음)
+        with stage("dedupe_lookup"):
+            content_hash = getattr(file, 'sha256', None) or compute_sha256(file)
+            cached = find_cached_analysis(content_hash, analysis_version())
+
+        # OpenAI 회로 차단 중이면 새 분석은 접수하지 않음 (저장 후 실패할 작업을 쌓지 않도록)
+        if not cached:
+            try:
+                ensure_available(SUMMARY_MODEL)
+            except LLMUnavailable as e:
+                response = Response(
+                    {'error': 'AI 서비스가 일시적으로 응답하지 않습니다. 잠시 후 다시 시도해주세요.', 'retry_after': e.retry_after},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                )
+                response['Retry-After'] = str(e.retry_after or 1)
+                return response
 
         timestamp = datetime.now().strftime("%Y.%m.%d_%H:%M")
                 # os.path.splitext() → ('이름', '.확장자') 튜플 반환
@@ -170,107 +319,98 @@ class DocumentUploadView(APIView):
         filename, ext = os.path.splitext(os.path.basename(file.name))
         file_name_only = f"{filename}_{timestamp}"
 
-        # Register fonts
-        pdfmetrics.registerFont(TTFont('NanumGothic', 'fonts/NanumGothic-Regular.ttf'))
-        pdfmetrics.registerFont(TTFont('NanumGothic-Bold', 'fonts/NanumGothic-Bold.ttf'))
-        pdfmetrics.registerFont(TTFont('NanumGothic-ExtraBold', 'fonts/NanumGothic-ExtraBold.ttf'))
-
-        # Create PDF from summary JSON
-        summary_data = json.loads(summary_text)
-        _, highlights, clauses = build_summary_context(summary_data)
-
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
-        styles.add(ParagraphStyle(name='H1', parent=styles['Normal'], fontName='NanumGothic-ExtraBold', fontSize=18, spaceAfter=12))
-        styles.add(ParagraphStyle(name='H2', parent=styles['Normal'], fontName='NanumGothic-Bold', fontSize=14, spaceBefore=6, spaceAfter=6))
-        styles.add(ParagraphStyle(name='Label', parent=styles['Normal'], fontName='NanumGothic-Bold', fontSize=11, textColor=colors.HexColor('#374151'), spaceBefore=4, spaceAfter=2))
-        styles.add(ParagraphStyle(name='Body', parent=styles['Normal'], fontName='NanumGothic', fontSize=11, leading=16))
-        styles.add(ParagraphStyle(name='Quote', parent=styles['Normal'], fontName='NanumGothic', fontSize=10.5, backColor=colors.HexColor('#F9FAFB'), borderWidth=1, borderColor=colors.HexColor('#E5E7EB'), borderPadding=6, leading=15))
-
-        def risk_badge(text, risk):
-            # 작은 1행 테이블로 배지 스타일 구성
-            bg = {'low': colors.HexColor('#E8F5E9'), 'mid': colors.HexColor('#FFF3E0'), 'high': colors.HexColor('#FFEBEE')}.get(risk, colors.whitesmoke)
-            fg = {'low': colors.HexColor('#1B5E20'), 'mid': colors.HexColor('#E65100'), 'high': colors.HexColor('#B71C1C')}.get(risk, colors.black)
-            t = Table([[Paragraph(text, ParagraphStyle(name='Badge', fontName='NanumGothic-Bold', fontSize=9, textColor=fg))]], colWidths=[45])
-            t.setStyle(TableStyle([
-                ('BACKGROUND', (0,0), (-1,-1), bg),
-                ('BOX', (0,0), (-1,-1), 0.5, bg),
-                ('INNERPADDING', (0,0), (-1,-1), 3),
-            ]))
-            return t
-
-        def divider():
-            line = Table([['']], colWidths=['*'], rowHeights=[1])
-            line.setStyle(TableStyle([
-                ('BACKGROUND', (0,0), (-1,-1), colors.HexColor('#E5E7EB')),
-            ]))
-            return line
-
-        elements = []
-        # 문서 제목
-        elements.append(Paragraph(f"{file_name_only} 요약본", styles['H1']))
-        elements.append(divider())
-        elements.append(Spacer(1, 8))
-
-        if highlights:
-            elements.append(Spacer(1, 10))
-            elements.append(Paragraph('핵심 시정 권고', styles['H2']))
-            for h in highlights[:5]:
-                elements.append(Paragraph(f"• {h}", styles['Body']))
-
-        elements.append(Spacer(1, 12))
-        elements.append(divider())
-        elements.append(Spacer(1, 8))
-        elements.append(Paragraph('조항별 분석', styles['H2']))
-
-        # 조항 카드 반복
-        for idx, c in enumerate(clauses, 1):
-            header = Table([[Paragraph(f"[{idx}] {c['title']}", styles['H2']), risk_badge(c['risk'].upper(), c['risk'])]], colWidths=['*', 55])
-            header.setStyle(TableStyle([
-                ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-                ('ALIGN', (1,0), (1,0), 'RIGHT'),
-            ]))
-
-            # 섹션 블록들(원문/법령/해설/개선안)
-            blocks = []
-            blocks.append(Paragraph('원문', styles['Label']))
-            blocks.append(Paragraph(f"\"{c['original']}\"", styles['Body']))
-            blocks.append(Paragraph('관련 법령', styles['Label']))
-            blocks.append(Paragraph(c['law'], styles['Body']))
-            blocks.append(Paragraph('해설', styles['Label']))
-            blocks.append(Paragraph(c['commentary'], styles['Body']))
-            blocks.append(Paragraph('개선안', styles['Label']))
-            blocks.append(Paragraph(c['recommendation'], styles['Body']))
-
-            elements.append(KeepTogether([header] + blocks + [Spacer(1, 10)]))
-
-        doc.build(elements)
-        buffer.seek(0)
-
-        summary_file_name = f"{file_name_only}_요약본.pdf"
-        summary_content = ContentFile(buffer.read(), name=summary_file_name)
-
-        # pdfplumber 등으로 파일을 읽으면, 내부 읽기 위치(pointer)가 파일 끝으로 이동함
-        # seek(0) → 읽기 위치를 처음(0바이트)으로 되돌려서 저장 시 빈 파일이 되지 않도록 함
-        try:
-            file.seek(0)
-        except Exception:
-            pass
-
-        # 원본 계약서 PDF 저장
-        # 요약본 PDF 저장 (AI 분석 결과)
-        document = Document.objects.create(
+        document = Document(
             user=user,
-            file=file,  # 원본 계약서 PDF 저장
-            summary_file=summary_content,  # 요약본 PDF 저장
             file_name=file_name_only,
-            extracted_text=extracted_text,
+            extracted_text='',
             chat_name=file_name_only,
+            content_hash=content_hash,
         )
 
-        return Response({'message': '업로드 성공', 'document_id': document.id}, status=200)
-    
+        with transaction.atomic():
+            if cached:
+                with stage("db_insert"):
+                    attach_cached_analysis(document, cached)
+                    document.save()
+                    save_clause_analysis(document, json.loads(cached.summary_json))
+                    build_document_index(document)
+                    job = record_cache_hit(document)
+            else:
+                # 원본 계약서 PDF만 먼저 저장하고, 분석(추출/요약/요약본 생성)은 워커 풀에 맡김
+                # (임시 파일을 저장소로 옮기므로 업로드 내용은 한 번만 기록됨)
+                with stage("storage_write"):
+                    document.file.name = store_original(file, content_hash)
+                with stage("db_insert"):
+                    document.save()
+                    job = enqueue_analysis(document)
+
+        return Response({
+            'message': '업로드 접수',
+            'document_id': document.id,
+            'job_id': job.id,
+            'status': job.status,
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+# 문서 분석 진행 상황 조회
+class DocumentStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def handle_exception(self, exc):
+        if isinstance(exc, (AuthenticationFailed, NotAuthenticated)):
+            return Response(
+                {"detail": "액세스 토큰이 만료되었거나 유효하지 않습니다."},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        return super().handle_exception(exc)
+
+    @swagger_auto_schema(
+        operation_summary="문서 분석 상태 조회",
+        operation_description="status: queued / extracting / summarizing / rendering / done / failed, stage_timings: 단계별 시작 시각과 소요 시간(ms)",
+        responses={
+            200: openapi.Response(
+                description="분석 상태",
+                examples={
+                    "application/json": {
+                        "document_id": 1,
+                        "job_id": 1,
+                        "status": "summarizing",
+                        "error": "",
+                        "stage_timings": {
+                            "extracting": {"started_at": "2025-08-20T10:00:00+09:00", "duration_ms": 812.4},
+                            "summarizing": {"started_at": "2025-08-20T10:00:01+09:00"}
+                        },
+                    }
+                }
+            ),
+            401: openapi.Response('액세스 토큰 만료 또는 유효하지 않음'),
+            404: openapi.Response('문서 없음'),
+        }
+    )
+    def get(self, request, document_id):
+        job = (
+            AnalysisJob.objects
+            .filter(document_id=document_id, document__user=request.user)
+            .order_by('-id')
+            .first()
+        )
+        if job is None:
+            return Response({"error": "해당 문서를 찾을 수 없습니다."}, status=404)
+
+        return Response({
+            "document_id": job.document_id,
+            "job_id": job.id,
+            "status": job.status,
+            "error": job.error,
+            "cache_hit": job.cache_hit,
+            "stage_timings": job.stage_timings,
+            "stats": clause_stats(job.document_id) if job.status == AnalysisJob.STATUS_DONE else None,
+            "created_at": job.created_at.isoformat(),
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        }, status=200)
+
+
 GUIDELINE_PROMPT = """
 당신은 **근로 계약** 전문 변호사입니다.
 당신의 임무는 제공된 계약서를 기반으로 피계약자가 주의깊게 살펴보아야 할 주요 조항과 독소 조항, 그리고 모호한 표현들을 찾아내는 것입니다.
@@ -307,4 +447,10 @@ GUIDELINE_PROMPT = """
 ## 입력 데이터
 - Context: {{context}}
 - 계약서: {{user_question}}
-"""
\ No newline at end of file
+"""
+
+# 분석 결과 캐시 키에 포함되는 버전 (프롬프트/모델/실제 청크 크기가 바뀌면 캐시가 자연히 무효화됨)
+# 청크 크기는 설정값이 아니라 모델 컨텍스트 예산을 반영한 summary_chunk_tokens() 기준
+def analysis_version():
+    parts = [SUMMARY_MODEL, SUMMARY_SYSTEM_PROMPT, GUIDELINE_PROMPT, f"{summary_chunk_tokens()}tok"]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:16]